@@ -1,29 +1,132 @@
 """SmartCanteen — Flask application factory."""
 
-from flask import Flask, send_from_directory
+from utils.boot import BootProfile, mark_imports_done, warm_up  # first: times the imports below
+from flask import send_from_directory
 import os
 
 from config import Config
-from extensions import jwt, cors, init_supabase
+from extensions import jwt, cors, init_supabase, init_repository, init_otp_store
 from routes.auth_routes import auth_bp
 from routes.food_routes import food_bp
+from routes.kitchen_routes import kitchen_bp
 from routes.order_routes import order_bp
+from routes.ops_routes import ops_bp
+from services.kitchen_queue import init_kitchen_queue
+from services.order_events import init_order_events
+from utils.admission import init_admission
+from utils.aio import AsyncFlask, run_sync
+from utils.compression import init_compression
+from utils.email_dispatcher import init_email_dispatcher
+from utils.idempotency import init_idempotency
+from utils.metrics import init_metrics
+from utils.rate_limit import init_rate_limiter
+from utils.tracing import init_tracing
 from utils.responses import error_response
+from utils.serializers import init_serializers
+from utils.token_cache import init_token_cache
+from utils.ttl_store import create_ttl_store
 
+mark_imports_done()
 
-def create_app(config_class=Config) -> Flask:
-    app = Flask(__name__)
+
+def create_app(config_class=Config, asgi: bool = False) -> AsyncFlask:
+    """Build the app; *asgi* wires the async clients for ``asgi.py``."""
+    app = AsyncFlask(__name__)
+    app.asgi = asgi
     app.config.from_object(config_class)
+    app.boot_profile = profile = BootProfile(lazy=config_class.LAZY_INIT)
 
     # ── Extensions ──────────────────────────────────────────────────
-    jwt.init_app(app)
-    cors.init_app(app, resources={r"/api/*": {"origins": config_class.CORS_ORIGINS}})
-    init_supabase(config_class.SUPABASE_URL, config_class.SUPABASE_KEY)
+    with profile.phase("extensions"):
+        jwt.init_app(app)
+        init_token_cache(
+            jwt,
+            store=create_ttl_store(
+                config_class.OTP_STORE_BACKEND,
+                config_class.OTP_STORE_PATH or None,
+                table="revoked_tokens",
+            ),
+            maxsize=config_class.JWT_CLAIMS_CACHE_SIZE,
+            token_lifetime=config_class.JWT_ACCESS_TOKEN_EXPIRES.total_seconds(),
+        )
+        cors.init_app(app, resources={r"/api/*": {"origins": config_class.CORS_ORIGINS}})
+        if config_class.DATABASE_BACKEND == "supabase" or config_class.SUPABASE_URL:
+            init_supabase(config_class.SUPABASE_URL, config_class.SUPABASE_KEY,
+                          instrument=config_class.METRICS_ENABLED or config_class.TRACING_ENABLED,
+                          asynchronous=asgi, lazy=config_class.LAZY_INIT)
+        init_repository(
+            config_class.DATABASE_BACKEND,
+            dsn=config_class.DATABASE_URL,
+            pool_min=config_class.DATABASE_POOL_MIN_SIZE,
+            pool_max=config_class.DATABASE_POOL_MAX_SIZE,
+            pool_timeout=config_class.DATABASE_POOL_TIMEOUT,
+            prepare=config_class.DATABASE_PREPARE,
+            asynchronous=asgi,
+        )
+        init_otp_store(
+            config_class.OTP_STORE_BACKEND,
+            config_class.OTP_STORE_PATH or None,
+            config_class.OTP_STORE_MAX_ENTRIES,
+        )
+        init_order_events(config_class.SSE_BUFFER_SIZE, config_class.SSE_MAX_STREAMS)
+        init_serializers(config_class.RESPONSE_JSON_ENCODER, config_class.RESPONSE_MSGPACK)
+        init_email_dispatcher(
+            app,
+            status_store=create_ttl_store(
+                config_class.OTP_STORE_BACKEND,
+                config_class.OTP_STORE_PATH or None,
+                table="email_deliveries",
+            ),
+        )
+        init_kitchen_queue(
+            app,
+            cooked_store=create_ttl_store(
+                config_class.OTP_STORE_BACKEND,
+                config_class.OTP_STORE_PATH or None,
+                table="kitchen_cooked",
+            ),
+        )
+        init_idempotency(
+            app,
+            store=create_ttl_store(
+                config_class.OTP_STORE_BACKEND,
+                config_class.OTP_STORE_PATH or None,
+                table="idempotency_keys",
+                max_entries=config_class.IDEMPOTENCY_MAX_ENTRIES,
+            ),
+        )
+        init_rate_limiter(
+            app,
+            store=create_ttl_store(
+                config_class.OTP_STORE_BACKEND,
+                config_class.OTP_STORE_PATH or None,
+                table="rate_limits",
+            ),
+        )
 
     # ── Blueprints ──────────────────────────────────────────────────
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(food_bp)
-    app.register_blueprint(order_bp)
+    with profile.phase("blueprints"):
+        app.register_blueprint(auth_bp)
+        app.register_blueprint(food_bp)
+        app.register_blueprint(order_bp)
+        app.register_blueprint(kitchen_bp)
+        app.register_blueprint(ops_bp)
+
+    # ── Metrics, tracing & compression (request hooks) ─────────────
+    with profile.phase("hooks"):
+        if config_class.METRICS_ENABLED:
+            init_metrics(app)
+        init_tracing(app)
+        # After metrics/tracing: their timings include the wait for a slot
+        init_admission(app)
+        if config_class.COMPRESSION_ENABLED:
+            # Registered last so it runs first: the metrics/tracing hooks time it too
+            init_compression(
+                app,
+                min_size=config_class.COMPRESSION_MIN_SIZE,
+                gzip_level=config_class.COMPRESSION_GZIP_LEVEL,
+                brotli_quality=config_class.COMPRESSION_BROTLI_QUALITY,
+            )
 
     # ── Global error handlers ───────────────────────────────────────
     @app.errorhandler(404)
@@ -51,6 +154,10 @@ def create_app(config_class=Config) -> Flask:
     def missing_token_callback(reason):
         return error_response(f"Authorization required: {reason}", 401)
 
+    @jwt.revoked_token_loader
+    def revoked_token_callback(_jwt_header, _jwt_payload):
+        return error_response("Token has been revoked", 401)
+
     # ── Health check ────────────────────────────────────────────────
     @app.route("/api/health")
     def health():
@@ -114,12 +221,30 @@ def create_app(config_class=Config) -> Flask:
 
 
 # ── WSGI entry point (used by gunicorn: gunicorn app:application) ────
-application = create_app()
+def create_wsgi_app(config_class=Config) -> AsyncFlask:
+    """Build the WSGI app, warm it up if configured and start the keep-alive."""
+    from utils.keep_alive import start_keep_alive
+
+    app = create_app(config_class)
+    if config_class.WARMUP:
+        run_sync(warm_up(app))
+    with app.boot_profile.phase("keep_alive"):
+        start_keep_alive(app)
+    app.boot_profile.mark_ready()
+    return app
+
+
+def __getattr__(name):
+    # ``application`` is built on first access (gunicorn's app lookup), so
+    # importing this module for create_app — asgi.py, the benchmarks —
+    # does not also build the WSGI app and start its keep-alive thread.
+    if name == "application":
+        global application
+        application = create_wsgi_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# ── Keep-alive self-ping (prevents Render free-tier sleep) ──────────
-from utils.keep_alive import start_keep_alive
-start_keep_alive(application)
 
 # ── Run directly ────────────────────────────────────────────────────
 if __name__ == "__main__":
-    application.run(host="0.0.0.0", port=5000, debug=Config.DEBUG)
+    create_wsgi_app().run(host="0.0.0.0", port=5000, debug=Config.DEBUG)
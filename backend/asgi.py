@@ -0,0 +1,24 @@
+"""ASGI entry point — serve the same blueprints as async handlers.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+Route handlers are awaited on uvicorn's event loop with the async
+Supabase / Postgres / email clients; see utils.aio. The WSGI deployment
+(``gunicorn app:application``) is unchanged.
+"""
+
+from app import create_app
+from config import Config
+from utils.aio import ASGIAdapter
+from utils.keep_alive import start_keep_alive
+
+
+def create_asgi_app(config_class=Config) -> ASGIAdapter:
+    """Build the ASGI app; WARMUP runs in the lifespan startup, on the server's loop."""
+    flask_app = create_app(config_class, asgi=True)
+    with flask_app.boot_profile.phase("keep_alive"):
+        start_keep_alive(flask_app)
+    return ASGIAdapter(flask_app, threads=config_class.ASGI_THREADS)
+
+
+application = create_asgi_app()
@@ -0,0 +1,6 @@
+"""Benchmarks that run the Flask app against a local PostgREST stand-in.
+
+Run from the ``backend/`` directory, e.g.::
+
+    python -m bench.bench_checkout --latency-ms 40
+"""
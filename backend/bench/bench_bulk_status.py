@@ -0,0 +1,64 @@
+"""Kitchen rush: N single PATCH /api/orders/<id> vs. one bulk-status call.
+
+Seeds ``--orders`` orders in ``preparing`` for each run and moves them all
+to ``ready``, once with one PATCH per order and once with
+``PATCH /api/orders/bulk-status``.
+
+    python -m bench.bench_bulk_status --latency-ms 40 --orders 50
+"""
+
+import argparse
+import time
+
+from bench.common import auth_headers, boot_app, seed_basic
+from bench.fake_postgrest import FakeDatabase
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--orders", type=int, default=50)
+    args = parser.parse_args()
+
+    db = FakeDatabase()
+    app, server = boot_app(args.latency_ms, args.jitter_ms, db=db)
+    seed = seed_basic(db)
+    headers = auth_headers(app, seed["admin"])
+    client = app.test_client()
+
+    def new_batch():
+        return [o["id"] for o in db.add_rows(
+            "orders", [{"user_id": seed["user"]["id"], "status": "preparing"}] * args.orders
+        )]
+
+    # Single PATCH per order
+    ids = new_batch()
+    before, start = server.config["requests"], time.perf_counter()
+    ok = sum(
+        client.patch(f"/api/orders/{oid}", json={"status": "ready"}, headers=headers).status_code == 200
+        for oid in ids
+    )
+    single = (time.perf_counter() - start, server.config["requests"] - before, ok)
+
+    # One bulk call
+    ids = new_batch()
+    before, start = server.config["requests"], time.perf_counter()
+    resp = client.patch(
+        "/api/orders/bulk-status",
+        json={"updates": [{"order_id": oid, "status": "ready"} for oid in ids]},
+        headers=headers,
+    )
+    bulk = (time.perf_counter() - start, server.config["requests"] - before,
+            resp.get_json()["meta"]["applied"])
+
+    print(f"\n{args.orders} orders preparing → ready, "
+          f"latency {args.latency_ms}±{args.jitter_ms} ms per DB call")
+    print(f"{'':24}{'seconds':>10}{'orders/s':>12}{'DB calls':>10}{'applied':>9}")
+    for label, (secs, calls, applied) in (("single PATCH x N", single), ("bulk-status x 1", bulk)):
+        print(f"{label:24}{secs:>10.3f}{args.orders / secs:>12.1f}{calls:>10}{applied:>9}")
+    print(f"speed-up: {single[0] / bulk[0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Checkout latency: place_order() RPC vs. the legacy three-call path.
+
+Every PostgREST request to the stand-in server sleeps ``--latency-ms``
+(plus up to ``--jitter-ms``), emulating the round-trip from Render to
+the Supabase region. The RPC path makes one request per checkout; the
+legacy path makes three.
+
+    python -m bench.bench_checkout --latency-ms 40 --iterations 200
+"""
+
+import argparse
+import random
+
+from bench.common import auth_headers, boot_app, print_table, run_timed, seed_basic
+from bench.fake_postgrest import FakeDatabase
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--items", type=int, default=3, help="distinct foods per order")
+    args = parser.parse_args()
+
+    db = FakeDatabase()
+    app, server = boot_app(args.latency_ms, args.jitter_ms, db=db)
+    seed = seed_basic(db)
+    headers = auth_headers(app, seed["user"])
+    food_ids = [f["id"] for f in seed["foods"]]
+
+    def checkout(_i):
+        items = [{"food_id": fid, "quantity": random.randint(1, 3)}
+                 for fid in random.sample(food_ids, args.items)]
+        with app.test_client() as client:
+            resp = client.post("/api/orders", json={"items": items}, headers=headers)
+        return resp.status_code == 201
+
+    results = {}
+    for label, use_rpc in (("legacy (3 calls)", False), ("rpc (1 call)", True)):
+        app.config["ORDER_PLACEMENT_RPC"] = use_rpc
+        run_timed(checkout, 10, args.concurrency)  # warm up connections
+        before = server.config["requests"]
+        summary = run_timed(checkout, args.iterations, args.concurrency)
+        summary["db_calls/req"] = round((server.config["requests"] - before) / args.iterations, 2)
+        results[label] = summary
+
+    print_table(
+        f"POST /api/orders — latency {args.latency_ms}±{args.jitter_ms} ms per DB call, "
+        f"concurrency {args.concurrency}",
+        results,
+    )
+    for label, summary in results.items():
+        print(f"  {label}: {summary['db_calls/req']} PostgREST calls per checkout")
+
+
+if __name__ == "__main__":
+    main()
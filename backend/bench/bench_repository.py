@@ -0,0 +1,110 @@
+"""Repository backends side by side: PostgREST over HTTP vs. direct Postgres.
+
+Generates one dataset (``bench.datagen``), loads it into the PostgREST
+stand-in and, with COPY, into the Postgres database at ``--dsn`` (which
+must already have ``supabase_schema.sql`` applied; its tables are
+truncated), then times the same repository calls on both backends.
+
+``--latency-ms`` is added to every PostgREST request only; the direct
+connection pays whatever the path to ``--dsn`` costs. Point ``--dsn`` at
+a database in the same region as your PostgREST endpoint for an
+apples-to-apples network comparison.
+
+    python -m bench.bench_repository --dsn postgresql://postgres@localhost/bench --scale 0.05
+"""
+
+import argparse
+import random
+
+from bench.common import FAKE_SUPABASE_KEY, print_table, run_timed
+from bench.datagen import CATEGORIES, generate
+from bench.fake_postgrest import FakeDatabase, start_server
+
+_COLUMNS = {
+    "users": ("id", "name", "email", "phone", "role", "created_at"),
+    "foods": ("id", "name", "price", "category", "is_available", "image_url", "created_at"),
+    "orders": ("id", "user_id", "status", "total_price", "created_at"),
+    "order_items": ("id", "order_id", "food_id", "quantity", "price"),
+}
+
+
+def load_postgres(dsn: str, db: FakeDatabase) -> None:
+    """Replace the contents of the four tables with the generated rows."""
+    import psycopg
+
+    with psycopg.connect(dsn) as conn:
+        conn.execute("TRUNCATE order_items, orders, foods, users")
+        for table, columns in _COLUMNS.items():
+            with conn.cursor().copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                for row in db.tables[table]:
+                    copy.write_row([row.get(col) for col in columns])
+        conn.commit()
+        conn.execute("ANALYZE")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", required=True, help="Postgres with supabase_schema.sql applied")
+    parser.add_argument("--scale", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="per PostgREST call")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-prepare", action="store_true", help="disable prepared statements")
+    args = parser.parse_args()
+
+    from supabase import create_client
+
+    from repositories import SupabaseRepository
+    from repositories.postgres_repo import PostgresRepository
+    from utils.aio import run_sync
+
+    data = generate(FakeDatabase(), scale=args.scale, seed=args.seed)
+    print(f"Dataset {data['counts']} built in {data['seconds']} s; loading Postgres…")
+    load_postgres(args.dsn, data["db"])
+
+    server = start_server(data["db"], latency_ms=args.latency_ms)
+    client = create_client(server.url, FAKE_SUPABASE_KEY)
+    backends = {
+        "supabase": SupabaseRepository(lambda: client),
+        "postgres": PostgresRepository(args.dsn, max_size=args.concurrency,
+                                       prepare=not args.no_prepare),
+    }
+
+    rng = random.Random(args.seed)
+    users = [rng.choice(data["users"]) for _ in range(args.iterations)]
+    categories = [rng.choice(CATEGORIES) for _ in range(args.iterations)]
+    # A page-2 keyset from the admin listing, the same on both backends
+    first = run_sync(backends["postgres"].list_orders(limit=50, with_user=True))
+    after = (first[-1]["created_at"], first[-1]["id"])
+
+    calls = {
+        "list_orders admin (50 + users)": lambda r, i: r.list_orders(limit=51, with_user=True),
+        "list_orders admin page 2": lambda r, i: r.list_orders(after=after, limit=51, with_user=True),
+        "list_orders status=pending": lambda r, i: r.list_orders(status="pending", limit=51,
+                                                                 with_user=True),
+        "list_orders user": lambda r, i: r.list_orders(user_id=users[i]["id"], limit=51),
+        "get_user_by_email": lambda r, i: r.get_user_by_email(users[i]["email"]),
+        "list_foods category": lambda r, i: r.list_foods(categories[i]),
+    }
+
+    results = {}
+    for label, call in calls.items():
+        for name, repo in backends.items():
+            def fn(i, repo=repo, call=call):
+                run_sync(call(repo, i))
+                return True
+
+            run_timed(fn, min(20, args.iterations), args.concurrency)  # warm-up
+            results[f"{label} [{name}]"] = run_timed(fn, args.iterations, args.concurrency)
+
+    backends["postgres"].close()
+    print_table(
+        f"Repository calls — PostgREST +{args.latency_ms} ms vs. direct Postgres, "
+        f"concurrency {args.concurrency}",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Response encoding side by side: jsonify vs. stdlib json vs. orjson vs. MessagePack.
+
+Encodes the two largest bodies the API sends — the full menu and an
+admin order page (orders with their items, foods and user) — built from
+``bench.datagen`` rows, the way ``success_response`` does. The
+``cached`` rows splice a ``Serialized`` body into the envelope, as the
+menu endpoint does on cache hits.
+
+    python -m bench.bench_serialization --scale 0.05
+"""
+
+import argparse
+import random
+
+from bench.common import print_table, run_timed
+from bench.datagen import generate
+from bench.fake_postgrest import FakeDatabase
+
+
+def admin_page(db: FakeDatabase, rng: random.Random, size: int) -> list[dict]:
+    """*size* orders shaped like GET /api/orders/admin returns them."""
+    foods = {f["id"]: f for f in db.tables["foods"]}
+    users = {u["id"]: u for u in db.tables["users"]}
+    items_by_order: dict = {}
+    for item in db.tables["order_items"]:
+        items_by_order.setdefault(item["order_id"], []).append(item)
+    orders = rng.sample(db.tables["orders"], min(size, len(db.tables["orders"])))
+    return [
+        {
+            **order,
+            "users": {k: users[order["user_id"]][k] for k in ("name", "email", "phone")},
+            "order_items": [
+                {**item, "foods": {k: foods[item["food_id"]][k] for k in ("name", "image_url")}}
+                for item in items_by_order.get(order["id"], [])
+            ],
+        }
+        for order in orders
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    from flask import Flask
+
+    from utils import serializers
+    from utils.serializers import JSON_MIMETYPE, MSGPACK_MIMETYPE, Serialized, encode_envelope
+
+    data = generate(FakeDatabase(), scale=args.scale, seed=args.seed)
+    print(f"Dataset {data['counts']} built in {data['seconds']} s")
+    bodies = {
+        "menu": [f for f in data["foods"] if f["is_available"]],
+        f"admin page ({args.page_size})": admin_page(data["db"], random.Random(args.seed), args.page_size),
+    }
+
+    app = Flask(__name__)
+    json_encoders = ["stdlib"] + (["orjson"] if serializers.orjson is not None else [])
+    if serializers.msgpack is None:
+        print("msgpack not installed — skipping MessagePack")
+
+    results = {}
+    for label, body in bodies.items():
+        envelope = {"success": True, "message": "Success", "data": body}
+        cached = {**envelope, "data": Serialized(body)}
+
+        def fn(i):
+            return bool(app.json.response(envelope).get_data())
+
+        run_timed(fn, min(20, args.iterations))  # warm-up
+        results[f"{label} [jsonify]"] = run_timed(fn, args.iterations)
+        for encoder in json_encoders:
+            serializers.init_serializers(encoder)
+            results[f"{label} [{encoder}]"] = run_timed(
+                lambda i: bool(encode_envelope(envelope, JSON_MIMETYPE)), args.iterations)
+        serializers.init_serializers()
+        results[f"{label} [json, cached]"] = run_timed(
+            lambda i: bool(encode_envelope(cached, JSON_MIMETYPE)), args.iterations)
+        if MSGPACK_MIMETYPE in serializers.offered_mimetypes():
+            results[f"{label} [msgpack]"] = run_timed(
+                lambda i: bool(encode_envelope(envelope, MSGPACK_MIMETYPE)), args.iterations)
+            results[f"{label} [msgpack, cached]"] = run_timed(
+                lambda i: bool(encode_envelope(cached, MSGPACK_MIMETYPE)), args.iterations)
+
+    sizes = {f"{label} ({mimetype.split('/')[1]})": len(encode_envelope({"data": body}, mimetype))
+             for label, body in bodies.items() for mimetype in serializers.offered_mimetypes()}
+    print_table(f"Response encoding — {args.iterations} encodes each, one thread", results)
+    print("\nBody sizes (bytes): " + ", ".join(f"{k} {v}" for k, v in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
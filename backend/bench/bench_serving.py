@@ -0,0 +1,232 @@
+"""Serving modes side by side: gunicorn (WSGI threads) vs. uvicorn (ASGI).
+
+Starts the PostgREST stand-in (filled by ``bench.datagen``) and the stub
+email provider in this process, then runs the app under each server as a
+subprocess — one worker each — and drives it with many concurrent
+keep-alive connections from an asyncio load generator. OTP emails are
+sent inline (EMAIL_ASYNC=false) so the login scenario includes the
+provider call.
+
+With per-call latency on the database and email provider, a gunicorn
+worker serves at most ``--wsgi-threads`` requests at a time and the rest
+queue; the ASGI worker overlaps every request's I/O waits on one loop.
+``cpu_ms/req`` is the server process's own CPU time per request — on a
+machine with few cores the load generator and the stand-ins compete
+with the server for CPU, so compare it alongside the latencies.
+
+    python -m bench.bench_serving --latency-ms 20 --concurrency 64
+
+``--admission`` keeps admission control on (the ADMISSION_* defaults, or
+the values in the environment) to check that its limits shed nothing a
+worker can serve in time:
+
+    python -m bench.bench_serving --admission --modes wsgi --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.common import FAKE_SUPABASE_KEY, print_table, summarise
+from bench.datagen import CATEGORIES, generate
+from bench.fake_postgrest import FakeDatabase, start_server
+from bench.stub_email import start_stub_email
+
+JWT_SECRET = "bench-secret-key-with-enough-bytes-for-hs256"
+SCENARIOS = ("menu", "user_orders", "admin_orders", "checkout", "login")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_command(mode: str, port: int, threads: int) -> list[str]:
+    if mode == "wsgi":
+        return [sys.executable, "-m", "gunicorn", "app:application", "--bind", f"127.0.0.1:{port}",
+                "--workers", "1", "--threads", str(threads), "--log-level", "warning"]
+    return [sys.executable, "-m", "uvicorn", "asgi:application", "--host", "127.0.0.1",
+            "--port", str(port), "--workers", "1", "--log-level", "warning", "--no-access-log"]
+
+
+def start_app(mode: str, env: dict, threads: int) -> tuple[subprocess.Popen, str]:
+    """Run the app under gunicorn or uvicorn and wait for /api/health."""
+    port = _free_port()
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen(_server_command(mode, port, threads), cwd=backend_dir,
+                            env={**os.environ, **env})
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with {proc.returncode}")
+        try:
+            if httpx.get(f"{url}/api/health", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{mode} server did not become healthy")
+
+
+def server_cpu_seconds(pid: int) -> float | None:
+    """User + system CPU of *pid* and its children (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as fh:
+            fields = fh.read().rsplit(")", 1)[1].split()
+        total = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{pid}/task/{pid}/children", encoding="ascii") as fh:
+            children = [int(child) for child in fh.read().split()]
+    except (OSError, ValueError, IndexError):
+        return None
+    return total + sum(server_cpu_seconds(child) or 0.0 for child in children)
+
+
+def make_tokens(users: list[dict]) -> list[dict]:
+    """Authorization headers signed with the servers' JWT secret."""
+    from flask import Flask
+    from flask_jwt_extended import JWTManager, create_access_token
+
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = JWT_SECRET
+    JWTManager(app)
+    with app.app_context():
+        return [
+            {"Authorization": "Bearer " + create_access_token(
+                identity=user["id"],
+                additional_claims={"role": user["role"], "email": user["email"], "name": user["name"]},
+            )}
+            for user in users
+        ]
+
+
+async def run_load(url: str, make_request, iterations: int, concurrency: int) -> dict:
+    """Issue *iterations* requests from *concurrency* connections; summarise latency."""
+    durations: list[float] = []
+    errors = 0
+    indices = iter(range(iterations))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+
+        async def connection():
+            nonlocal errors
+            for i in indices:
+                method, path, kwargs, expected = make_request(i)
+                start = time.perf_counter()
+                try:
+                    ok = (await client.request(method, path, **kwargs)).status_code == expected
+                except httpx.HTTPError:
+                    ok = False
+                durations.append(time.perf_counter() - start)
+                errors += 0 if ok else 1
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(concurrency)))
+        wall = time.perf_counter() - wall_start
+    return summarise(durations, wall, errors)
+
+
+def build_scenarios(data: dict, seed: int) -> dict:
+    """``{label: make_request(i) -> (method, path, kwargs, expected status)}``."""
+    rng = random.Random(seed)
+    users = rng.sample(data["users"], min(len(data["users"]), 200))
+    user_headers = make_tokens(users)
+    admin_headers = make_tokens([data["admin"]])[0]
+    foods = [f["id"] for f in data["foods"] if f["is_available"]]
+    emails = [u["email"] for u in data["users"]]
+
+    def checkout(i):
+        items = [{"food_id": fid, "quantity": rng.randint(1, 3)}
+                 for fid in rng.sample(foods, rng.randint(1, 4))]
+        return "POST", "/api/orders", {"json": {"items": items},
+                                       "headers": user_headers[i % len(user_headers)]}, 201
+
+    return {
+        "menu": ("GET /api/foods?category=", lambda i: (
+            "GET", f"/api/foods?category={CATEGORIES[i % len(CATEGORIES)]}", {}, 200)),
+        "user_orders": ("GET /api/orders/user", lambda i: (
+            "GET", "/api/orders/user", {"headers": user_headers[i % len(user_headers)]}, 200)),
+        "admin_orders": ("GET /api/orders/admin", lambda i: (
+            "GET", "/api/orders/admin?limit=50", {"headers": admin_headers}, 200)),
+        "checkout": ("POST /api/orders", checkout),
+        "login": ("POST /api/auth/login", lambda i: (
+            "POST", "/api/auth/login", {"json": {"email": emails[i % len(emails)]}}, 200)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=0.005,
+                        help="small by default: the stand-in's own CPU time should not dominate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="per PostgREST call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--email-latency-ms", type=float, default=150.0)
+    parser.add_argument("--iterations", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--wsgi-threads", type=int, default=8, help="gunicorn --threads")
+    parser.add_argument("--modes", default="wsgi,asgi")
+    parser.add_argument("--admission", action="store_true",
+                        help="keep admission control on (ADMISSION_* defaults or environment)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    args = parser.parse_args()
+
+    data = generate(FakeDatabase(), scale=args.scale, seed=args.seed)
+    print(f"Dataset {data['counts']} built in {data['seconds']} s")
+    db_server = start_server(data["db"], latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    email = start_stub_email(args.email_latency_ms)
+    env = {
+        "SUPABASE_URL": db_server.url,
+        "SUPABASE_KEY": FAKE_SUPABASE_KEY,
+        "JWT_SECRET_KEY": JWT_SECRET,
+        "DATABASE_BACKEND": "supabase",
+        "DEV_OTP": "false",
+        "EMAIL_ASYNC": "false",
+        "BREVO_API_KEY": "bench-key",
+        "BREVO_SENDER_EMAIL": "noreply@bench.local",
+        "BREVO_API_URL": email.url,
+        "EMAIL_HTTP_POOL_SIZE": str(args.concurrency),  # not the bottleneck under test
+        "RENDER_EXTERNAL_URL": "",
+        # Measure the serving modes, not the OTP rate limits or load shedding
+        "RATE_LIMIT_ENABLED": "false",
+        "ADMISSION_ENABLED": "true" if args.admission else "false",
+    }
+    scenarios = build_scenarios(data, args.seed)
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        proc, url = start_app(mode, env, args.wsgi_threads)
+        try:
+            for name in selected:
+                label, make_request = scenarios[name]
+                asyncio.run(run_load(url, make_request, min(20, args.iterations), 4))  # warm-up
+                cpu_before = server_cpu_seconds(proc.pid)
+                summary = asyncio.run(run_load(url, make_request, args.iterations, args.concurrency))
+                cpu_after = server_cpu_seconds(proc.pid)
+                if cpu_before is not None and cpu_after is not None:
+                    summary["cpu_ms/req"] = round((cpu_after - cpu_before) / args.iterations * 1000, 2)
+                results[f"{label} [{mode}]"] = summary
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print_table(
+        f"gunicorn {args.wsgi_threads} threads vs. uvicorn — {args.latency_ms}±{args.jitter_ms} ms "
+        f"per DB call, {args.email_latency_ms} ms per email, concurrency {args.concurrency}"
+        f"{', admission control on' if args.admission else ''}",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
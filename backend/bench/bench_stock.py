@@ -0,0 +1,146 @@
+"""Stock under a checkout rush: hundreds of parallel POST /api/orders for one item.
+
+Seeds one stock-tracked food (``--stock`` portions) and fires
+``--requests`` checkouts of ``--quantity`` each on ``--concurrency``
+threads through the app. Exactly ``stock // quantity`` orders must
+succeed, the stock must end at ``stock % quantity`` and the order items
+must add up to what was taken; the script exits non-zero otherwise.
+
+Meanwhile ``--imports`` menu imports (POST /api/foods/import) change the
+item's price one after another; they must leave the stock to the
+checkouts.
+
+Runs against the PostgREST stand-in by default (its ``place_order``
+mirror runs under one lock), or with ``--dsn`` against a real Postgres
+database with ``supabase_schema.sql`` applied (DATABASE_BACKEND=postgres),
+where the function's conditional UPDATE is what keeps the count exact:
+
+    python -m bench.bench_stock --requests 300 --concurrency 64 --stock 40
+    python -m bench.bench_stock --dsn postgresql://postgres@localhost/bench
+"""
+
+import argparse
+import os
+import sys
+import threading
+from collections import Counter
+
+from bench.common import auth_headers, boot_app, print_table, run_timed, seed_basic
+from bench.fake_postgrest import FakeDatabase
+
+
+def seed_postgres(dsn: str, stock: int) -> dict:
+    """Insert a user and one tracked food into *dsn*; returns them PostgREST-shaped."""
+    import psycopg
+    from psycopg.rows import dict_row
+
+    with psycopg.connect(dsn, row_factory=dict_row, autocommit=True) as conn:
+        user = conn.execute(
+            "INSERT INTO users (name, email, phone) VALUES ('Bench User', %s, '9000000001') "
+            "RETURNING id::text, name, email, role",
+            (f"user-{os.getpid()}@bench.local",),
+        ).fetchone()
+        food = conn.execute(
+            "INSERT INTO foods (name, price, category, stock) VALUES ('Samosa', 15, 'Snacks', %s) "
+            "RETURNING id::text",
+            (stock,),
+        ).fetchone()
+    return {"user": user, "food_id": food["id"]}
+
+
+def read_postgres(dsn: str, food_id: str) -> dict:
+    import psycopg
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        stock, available = conn.execute(
+            "SELECT stock, is_available FROM foods WHERE id = %s", (food_id,)).fetchone()
+        sold, = conn.execute(
+            "SELECT COALESCE(sum(quantity), 0) FROM order_items WHERE food_id = %s", (food_id,)).fetchone()
+    return {"stock": stock, "is_available": available, "sold": sold}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--stock", type=int, default=40)
+    parser.add_argument("--quantity", type=int, default=1, help="portions per order")
+    parser.add_argument("--imports", type=int, default=20, help="price-changing menu imports during the rush")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="per PostgREST call")
+    parser.add_argument("--dsn", help="Postgres with supabase_schema.sql applied")
+    args = parser.parse_args()
+
+    db = FakeDatabase()
+    if args.dsn:
+        os.environ["DATABASE_BACKEND"] = "postgres"
+        os.environ["DATABASE_URL"] = args.dsn
+        os.environ.setdefault("DATABASE_POOL_MAX_SIZE", str(min(args.concurrency, 20)))
+    app, _server = boot_app(args.latency_ms, db=db)
+    if args.dsn:
+        seed = seed_postgres(args.dsn, args.stock)
+        user, food_id = seed["user"], seed["food_id"]
+    else:
+        seed = seed_basic(db, foods=1)
+        user, food_id = seed["user"], seed["foods"][0]["id"]
+        seed["foods"][0]["stock"] = args.stock
+    headers = auth_headers(app, user)
+    admin_headers = {**auth_headers(app, {**user, "role": "admin"}), "Content-Type": "text/csv"}
+
+    statuses: Counter = Counter()
+    messages: Counter = Counter()
+    lock = threading.Lock()
+
+    def checkout(_i):
+        with app.test_client() as client:
+            resp = client.post("/api/orders", headers=headers,
+                               json={"items": [{"food_id": food_id, "quantity": args.quantity}]})
+        with lock:
+            statuses[resp.status_code] += 1
+            if resp.status_code != 201:
+                messages[resp.get_json()["message"]] += 1
+        return resp.status_code in (201, 400)
+
+    imports: Counter = Counter()
+
+    def import_prices():
+        for i in range(args.imports):
+            body = f"id,price\n{food_id},{15 + i % 2}\n".encode()
+            with app.test_client() as client:
+                resp = client.post("/api/foods/import?format=csv", headers=admin_headers, data=body)
+            ok = resp.status_code == 200 and resp.get_json()["data"]["updated"] == 1
+            imports["ok" if ok else "failed"] += 1
+
+    importer = threading.Thread(target=import_prices)
+    importer.start()
+    summary = run_timed(checkout, args.requests, args.concurrency)
+    importer.join()
+    if args.dsn:
+        final = read_postgres(args.dsn, food_id)
+    else:
+        food = db.by_id("foods", food_id)
+        final = {"stock": food["stock"], "is_available": food["is_available"],
+                 "sold": sum(i["quantity"] for i in db.tables["order_items"] if i["food_id"] == food_id)}
+
+    print_table(
+        f"POST /api/orders x{args.requests} for one item, concurrency {args.concurrency} "
+        f"({'postgres' if args.dsn else 'postgrest stand-in'})",
+        {"checkout": summary},
+    )
+    expected_orders = min(args.requests, args.stock // args.quantity)
+    expected_stock = args.stock - expected_orders * args.quantity
+    print(f"\nstatus codes: {dict(statuses)}")
+    for message, count in messages.most_common():
+        print(f"  {count} x {message}")
+    print(f"menu imports {imports['ok']} ok, {imports['failed']} failed (expected {args.imports} ok)")
+    print(f"orders placed {statuses[201]} (expected {expected_orders}); sold {final['sold']}, "
+          f"stock left {final['stock']} (expected {expected_stock}), available {final['is_available']}")
+
+    ok = (statuses[201] == expected_orders and final["stock"] == expected_stock
+          and final["sold"] == expected_orders * args.quantity
+          and final["is_available"] == (expected_stock > 0) and imports["ok"] == args.imports)
+    print("PASS — no overselling" if ok else "FAIL — stock and orders disagree")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Shared helpers for the benchmark scripts: app bootstrap, seeding, stats."""
+
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_postgrest import FakeDatabase, start_server
+
+# A syntactically valid (unsigned) service-role JWT for supabase-py
+FAKE_SUPABASE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench"
+
+
+def boot_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, db: FakeDatabase | None = None,
+             **config_overrides):
+    """Start the fake PostgREST server and build the Flask app against it.
+
+    Returns ``(app, server)``. Must run before anything imports ``config``,
+    because Config reads the environment at import time.
+    """
+    server = start_server(db, latency_ms=latency_ms, jitter_ms=jitter_ms)
+    os.environ["SUPABASE_URL"] = server.url
+    os.environ["SUPABASE_KEY"] = FAKE_SUPABASE_KEY
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-enough-bytes-for-hs256")
+    os.environ.setdefault("DEV_OTP", "true")
+    os.environ["RENDER_EXTERNAL_URL"] = ""
+    # Measure the code paths, not the OTP rate limits or load shedding
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+    from app import create_app
+    from config import Config
+
+    app = create_app(Config)
+    app.config.update(config_overrides)
+    return app, server
+
+
+def auth_headers(app, user: dict) -> dict:
+    """Return an Authorization header carrying a JWT for *user*."""
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(
+            identity=user["id"],
+            additional_claims={"role": user["role"], "email": user["email"], "name": user["name"]},
+        )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_basic(db: FakeDatabase, foods: int = 20) -> dict:
+    """Insert one admin, one user and *foods* available food items."""
+    admin = db.add_rows("users", [{"name": "Bench Admin", "email": "admin@bench.local",
+                                   "phone": "9000000000", "role": "admin"}])[0]
+    user = db.add_rows("users", [{"name": "Bench User", "email": "user@bench.local",
+                                  "phone": "9000000001", "role": "user"}])[0]
+    food_rows = db.add_rows("foods", [
+        {"name": f"Item {i:03d}", "price": 20.0 + i, "category": ("Snacks", "Meals", "Drinks")[i % 3]}
+        for i in range(foods)
+    ])
+    return {"admin": admin, "user": user, "foods": food_rows}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of *samples* (0 < pct <= 100)."""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_timed(fn, iterations: int, concurrency: int = 1) -> dict:
+    """Call *fn(i)* *iterations* times on *concurrency* threads and summarise."""
+    durations: list[float] = []
+    errors = 0
+
+    def one(i):
+        start = time.perf_counter()
+        ok = fn(i)
+        return time.perf_counter() - start, ok
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for seconds, ok in pool.map(one, range(iterations)):
+            durations.append(seconds)
+            errors += 0 if ok else 1
+    wall = time.perf_counter() - wall_start
+    return summarise(durations, wall, errors)
+
+
+def summarise(durations: list[float], wall_seconds: float, errors: int = 0) -> dict:
+    return {
+        "requests": len(durations),
+        "errors": errors,
+        "req_per_s": round(len(durations) / wall_seconds, 1) if wall_seconds else 0.0,
+        "mean_ms": round(statistics.fmean(durations) * 1000, 2),
+        "p50_ms": round(percentile(durations, 50) * 1000, 2),
+        "p95_ms": round(percentile(durations, 95) * 1000, 2),
+        "p99_ms": round(percentile(durations, 99) * 1000, 2),
+    }
+
+
+def print_table(title: str, rows: dict[str, dict]) -> None:
+    """Print ``{label: summary}`` as an aligned table."""
+    cols = ["requests", "errors", "req_per_s", "mean_ms", "p50_ms", "p95_ms", "p99_ms"]
+    for extra in ("db_calls/req", "cpu_ms/req"):
+        if any(extra in summary for summary in rows.values()):
+            cols.append(extra)
+    width = max(len(label) for label in rows) + 2
+    print(f"\n{title}")
+    print("".ljust(width) + "".join(c.rjust(13) for c in cols))
+    for label, summary in rows.items():
+        print(label.ljust(width) + "".join(str(summary.get(c, "")).rjust(13) for c in cols))
@@ -0,0 +1,124 @@
+"""Synthetic dataset generator for the benchmark PostgREST stand-in.
+
+At ``scale=1.0`` it produces the size of a busy campus term: 10,000
+foods, 50,000 users and 1,000,000 orders with 1–4 items each (about
+2.5M ``order_items`` rows; roughly 1.5 GB of memory and 30–40 s to
+build). Data is deterministic for a given seed (timestamps are relative
+to now), so runs on different commits see the same tables.
+
+    python -m bench.datagen --scale 0.1
+"""
+
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from bench.fake_postgrest import FakeDatabase
+
+FULL_SIZE = {"foods": 10_000, "users": 50_000, "orders": 1_000_000}
+
+CATEGORIES = ("Breakfast", "Meals", "Snacks", "Beverages", "Desserts", "Combos", "Specials")
+DISHES = ("Masala Dosa", "Veg Thali", "Paneer Roll", "Cold Coffee", "Samosa", "Idli Vada",
+          "Chicken Biryani", "Gulab Jamun", "Lemon Soda", "Pav Bhaji", "Fried Rice", "Poha")
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _status_for(age: timedelta, rng: random.Random) -> str:
+    """Old orders are completed; only the last hour has work in progress."""
+    if age > timedelta(hours=1):
+        return "completed"
+    return rng.choice(("pending", "pending", "preparing", "ready", "completed"))
+
+
+def generate(db: FakeDatabase | None = None, scale: float = 1.0, seed: int = 42,
+             days: int = 120, now: datetime | None = None) -> dict:
+    """Fill *db* (a new FakeDatabase by default) and return a summary.
+
+    The summary holds the database plus ``admin``, ``users`` and ``foods``
+    rows for scenarios to draw from.
+    """
+    db = db or FakeDatabase()
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    counts = {k: max(1, int(v * scale)) for k, v in FULL_SIZE.items()}
+    started = time.perf_counter()
+
+    admin = {"id": _uuid(rng), "name": "Bench Admin", "email": "admin@bench.local",
+             "phone": "9000000000", "role": "admin",
+             "created_at": (now - timedelta(days=days + 1)).isoformat()}
+    users = [admin] + [
+        {
+            "id": _uuid(rng),
+            "name": f"Student {i:05d}",
+            "email": f"student{i:05d}@bench.local",
+            "phone": f"9{i:09d}",
+            "role": "user",
+            "created_at": (now - timedelta(days=rng.uniform(1, days))).isoformat(),
+        }
+        for i in range(counts["users"])
+    ]
+    foods = [
+        {
+            "id": _uuid(rng),
+            "name": f"{rng.choice(DISHES)} #{i:05d}",
+            "price": float(rng.randrange(10, 300, 5)),
+            "category": rng.choice(CATEGORIES),
+            "is_available": rng.random() < 0.9,
+            "image_url": None,
+            "created_at": (now - timedelta(days=days + 1)).isoformat(),
+        }
+        for i in range(counts["foods"])
+    ]
+    db.bulk_load("users", users)
+    db.bulk_load("foods", foods)
+
+    # Popular items and regular customers: skew picks towards the front
+    students = users[1:]
+    orders, items = [], []
+    span_seconds = days * 86400
+    for _ in range(counts["orders"]):
+        age = timedelta(seconds=span_seconds * rng.random() ** 2)
+        order_id = _uuid(rng)
+        total = 0.0
+        for _line in range(rng.randint(1, 4)):
+            food = foods[int(len(foods) * rng.random() ** 3)]
+            qty = rng.randint(1, 3)
+            total += food["price"] * qty
+            items.append({"id": _uuid(rng), "order_id": order_id, "food_id": food["id"],
+                          "quantity": qty, "price": food["price"] * qty})
+        orders.append({
+            "id": order_id,
+            "user_id": students[int(len(students) * rng.random() ** 2)]["id"],
+            "status": _status_for(age, rng),
+            "total_price": round(total, 2),
+            "created_at": (now - age).isoformat(),
+        })
+    db.bulk_load("orders", orders)
+    db.bulk_load("order_items", items)
+
+    return {
+        "db": db,
+        "admin": admin,
+        "users": students,
+        "foods": foods,
+        "counts": {name: len(rows) for name, rows in db.tables.items()},
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    summary = generate(scale=args.scale, seed=args.seed)
+    print(f"Generated {summary['counts']} in {summary['seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,662 @@
+"""Local PostgREST stand-in for benchmarks.
+
+Serves the subset of the PostgREST HTTP API that supabase-py uses in this
+app (``/rest/v1/<table>`` CRUD with filters, embeds, ordering, limits and
+upserts, plus ``/rest/v1/rpc/<fn>``) from in-memory tables, with a
+configurable per-request latency to emulate the network hop to Supabase.
+
+Run standalone::
+
+    python -m bench.fake_postgrest --port 54321 --latency-ms 40
+
+or embed it with :func:`start_server`.
+"""
+
+import argparse
+import bisect
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from zoneinfo import ZoneInfo
+
+# child table -> { parent table: fk column }
+FOREIGN_KEYS = {
+    "orders": {"users": "user_id"},
+    "order_items": {"orders": "order_id", "foods": "food_id"},
+}
+
+# Column defaults mirroring supabase_schema.sql
+DEFAULTS = {
+    "users": {"role": "user"},
+    "foods": {"is_available": True, "stock": None, "image_url": None},
+    "orders": {"status": "pending", "total_price": 0},
+    "order_items": {},
+}
+
+
+class PostgrestError(Exception):
+    def __init__(self, message, code="P0001", status=400, details=None, hint=None):
+        super().__init__(message)
+        self.payload = {"code": code, "message": message, "details": details, "hint": hint}
+        self.status = status
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ── Parsing helpers ─────────────────────────────────────────────────
+def _split_top(text: str, sep: str = ",") -> list[str]:
+    """Split on *sep* outside parentheses and double quotes."""
+    parts, depth, quoted, buf = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+
+def _coerce(raw, sample):
+    """Coerce the query-string literal *raw* to the type of *sample*."""
+    if raw is None:
+        return None
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, (int, float)) and not isinstance(sample, bool):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _compare(op: str, value, raw: str) -> bool:
+    if op == "is":
+        lowered = raw.lower()
+        if lowered == "null":
+            return value is None
+        if lowered in ("true", "false"):
+            return value is (lowered == "true")
+        return False
+    if op == "in":
+        items = [_unquote(v) for v in _split_top(raw.strip("()"))]
+        return any(value is not None and _coerce(i, value) == value for i in items)
+    if value is None:
+        return False
+    target = _coerce(_unquote(raw), value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = float(value)
+    if op == "eq":
+        return value == target
+    if op == "neq":
+        return value != target
+    if op == "gt":
+        return value > target
+    if op == "gte":
+        return value >= target
+    if op == "lt":
+        return value < target
+    if op == "lte":
+        return value <= target
+    if op in ("like", "ilike"):
+        pattern = re.escape(str(target)).replace(r"\*", ".*").replace("%", ".*")
+        flags = re.IGNORECASE if op == "ilike" else 0
+        return re.fullmatch(pattern, str(value), flags) is not None
+    raise PostgrestError(f"unsupported operator {op}", code="PGRST100")
+
+
+def _parse_condition(expr: str):
+    """Return a predicate for ``col.op.value`` / ``and(...)`` / ``or(...)``."""
+    for logic in ("and", "or"):
+        if expr.startswith(logic + "("):
+            subs = [_parse_condition(s) for s in _split_top(expr[len(logic) + 1:-1])]
+            if logic == "and":
+                return lambda row: all(p(row) for p in subs)
+            return lambda row: any(p(row) for p in subs)
+    negate = False
+    col, rest = expr.split(".", 1)
+    if rest.startswith("not."):
+        negate, rest = True, rest[4:]
+    op, raw = rest.split(".", 1)
+    pred = lambda row: _compare(op, row.get(col), raw)  # noqa: E731
+    return (lambda row: not pred(row)) if negate else pred
+
+
+def _filter_predicates(params: list[tuple[str, str]]):
+    preds = []
+    for key, value in params:
+        if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+            continue
+        if key in ("or", "and"):
+            preds.append(_parse_condition(f"{key}{value}"))
+            continue
+        negate = value.startswith("not.")
+        if negate:
+            value = value[4:]
+        op, raw = value.split(".", 1)
+        pred = (lambda c, o, r: lambda row: _compare(o, row.get(c), r))(key, op, raw)
+        preds.append((lambda p: lambda row: not p(row))(pred) if negate else pred)
+    return preds
+
+
+def _parse_select(select: str):
+    """Return (columns | None for *, {embed_name: sub_select})."""
+    columns, embeds = [], {}
+    for part in _split_top(select or "*"):
+        if "(" in part:
+            name, sub = part.split("(", 1)
+            name = name.split(":")[-1].split("!")[0].strip()
+            embeds[name] = sub[:-1]
+        else:
+            columns.append(part)
+    if not columns or "*" in columns:
+        return None, embeds
+    return columns, embeds
+
+
+# ── In-memory database ──────────────────────────────────────────────
+# Columns with a hash index (``col=eq.X`` lookups and embeds), besides id
+INDEXED_COLUMNS = {
+    "users": ("email",),
+    "orders": ("user_id",),
+    "order_items": ("order_id", "food_id"),
+}
+
+
+def _sort_key(columns: tuple):
+    return lambda row: tuple((row.get(c) is None, row.get(c)) for c in columns)
+
+
+class FakeDatabase:
+    """Dict-of-lists tables with PostgREST-style query evaluation.
+
+    Hash indexes on ``id`` and INDEXED_COLUMNS and cached sort orders are
+    kept up to date on writes, so first-page keyset queries stay fast on
+    benchmark-sized tables (see bench.datagen).
+    """
+
+    def __init__(self):
+        self.tables: dict[str, list[dict]] = {name: [] for name in DEFAULTS}
+        self.indexes: dict[str, dict] = {name: {} for name in DEFAULTS}
+        self.column_indexes: dict[tuple, dict] = {}   # (table, column) -> {value: [rows]}
+        self.sorted_views: dict[tuple, list] = {}     # (table, columns) -> rows ascending
+        self.rpcs: dict = dict(DEFAULT_RPCS)
+        self.lock = threading.RLock()
+
+    # rows
+    def add_rows(self, table: str, rows: list[dict]) -> list[dict]:
+        created = []
+        with self.lock:
+            for row in rows:
+                full = dict(DEFAULTS.get(table, {}))
+                full.setdefault("id", str(uuid.uuid4()))
+                if table != "order_items":
+                    full.setdefault("created_at", _now_iso())
+                full.update({k: v for k, v in row.items()})
+                if full.get("id") is None:
+                    full["id"] = str(uuid.uuid4())
+                self.tables.setdefault(table, []).append(full)
+                self.indexes.setdefault(table, {})[full["id"]] = full
+                created.append(full)
+            self._index_new_rows(table, created)
+        return created
+
+    def bulk_load(self, table: str, rows: list[dict]) -> None:
+        """Append complete rows (with ids) without per-row defaults — for datasets."""
+        with self.lock:
+            self.tables.setdefault(table, []).extend(rows)
+            index = self.indexes.setdefault(table, {})
+            for row in rows:
+                index[row["id"]] = row
+            self._invalidate(table)
+
+    def _index_new_rows(self, table: str, rows: list[dict]) -> None:
+        for (t, column), index in self.column_indexes.items():
+            if t == table:
+                for row in rows:
+                    index.setdefault(row.get(column), []).append(row)
+        for (t, columns), view in self.sorted_views.items():
+            if t == table:
+                key = _sort_key(columns)
+                for row in rows:
+                    bisect.insort(view, row, key=key)
+
+    def _invalidate(self, table: str, columns=None) -> None:
+        """Drop derived indexes of *table* (only those touching *columns*, if given)."""
+        for key in [k for k in self.column_indexes if k[0] == table]:
+            if columns is None or key[1] in columns:
+                del self.column_indexes[key]
+        for key in [k for k in self.sorted_views if k[0] == table]:
+            if columns is None or set(key[1]) & set(columns):
+                del self.sorted_views[key]
+
+    def by_id(self, table: str, row_id):
+        return self.indexes.get(table, {}).get(row_id)
+
+    def column_index(self, table: str, column: str) -> dict:
+        """Lazily built ``{value: [rows]}`` index, maintained on insert."""
+        index = self.column_indexes.get((table, column))
+        if index is None:
+            index = {}
+            for row in self.tables[table]:
+                index.setdefault(row.get(column), []).append(row)
+            self.column_indexes[(table, column)] = index
+        return index
+
+    def sorted_view(self, table: str, columns: tuple) -> list:
+        view = self.sorted_views.get((table, columns))
+        if view is None:
+            view = sorted(self.tables[table], key=_sort_key(columns))
+            self.sorted_views[(table, columns)] = view
+        return view
+
+    def _candidates(self, table: str, params):
+        """Rows that can match *params*, or None meaning "every row"."""
+        # Fast path for ``id=eq.X`` / ``id=in.(...)`` lookups
+        for key, value in params:
+            if key == "id" and value.startswith("eq."):
+                row = self.by_id(table, _unquote(value[3:]))
+                return [row] if row else []
+            if key == "id" and value.startswith("in."):
+                ids = [_unquote(v) for v in _split_top(value[3:].strip("()"))]
+                return [r for r in (self.by_id(table, i) for i in ids) if r]
+        indexed = INDEXED_COLUMNS.get(table, ())
+        for key, value in params:
+            if key in indexed and value.startswith("eq."):
+                return self.column_index(table, key).get(_unquote(value[3:]), [])
+        return None
+
+    def select(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        if table not in self.tables:
+            raise PostgrestError(f'relation "public.{table}" does not exist', "42P01", 404)
+        qs = dict(params)
+        preds = _filter_predicates(params)
+        offset = int(qs.get("offset", 0))
+        limit = int(qs["limit"]) if "limit" in qs else None
+        clauses = []
+        for clause in _split_top(qs.get("order", "")):
+            col, *mods = clause.split(".")
+            clauses.append((col, "desc" in mods))
+        with self.lock:
+            candidates = self._candidates(table, params)
+            directions = {desc for _col, desc in clauses}
+            if candidates is None and clauses and len(directions) == 1:
+                # Walk a cached sort order and stop once the page is full
+                view = self.sorted_view(table, tuple(col for col, _desc in clauses))
+                ordered = reversed(view) if directions.pop() else iter(view)
+                rows, wanted = [], None if limit is None else offset + limit
+                for row in ordered:
+                    if all(p(row) for p in preds):
+                        rows.append(row)
+                        if wanted is not None and len(rows) >= wanted:
+                            break
+            else:
+                pool = self.tables[table] if candidates is None else candidates
+                rows = [r for r in pool if all(p(r) for p in preds)]
+                for col, desc in reversed(clauses):
+                    rows.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            if limit is not None:
+                rows = rows[offset: offset + limit]
+            elif offset:
+                rows = rows[offset:]
+            return [self._shape(table, r, qs.get("select", "*")) for r in rows]
+
+    def _shape(self, table: str, row: dict, select: str) -> dict:
+        columns, embeds = _parse_select(select)
+        out = dict(row) if columns is None else {c: row.get(c) for c in columns}
+        for rel, sub in embeds.items():
+            child_fk = FOREIGN_KEYS.get(rel, {}).get(table)
+            parent_fk = FOREIGN_KEYS.get(table, {}).get(rel)
+            if child_fk:
+                children = self.column_index(rel, child_fk).get(row["id"], [])
+                out[rel] = [self._shape(rel, c, sub) for c in children]
+            elif parent_fk:
+                parent = self.by_id(rel, row.get(parent_fk))
+                out[rel] = self._shape(rel, parent, sub) if parent else None
+            else:
+                raise PostgrestError(
+                    f"Could not find a relationship between '{table}' and '{rel}'",
+                    "PGRST200",
+                )
+        return out
+
+    def insert(self, table: str, payload, params, prefer: str) -> list[dict]:
+        rows = payload if isinstance(payload, list) else [payload]
+        if "resolution=merge-duplicates" in prefer:
+            conflict = dict(params).get("on_conflict", "id")
+            out = []
+            with self.lock:
+                for row in rows:
+                    existing = None
+                    if row.get(conflict) is not None:
+                        pool = self._candidates(table, [(conflict, f"eq.{row[conflict]}")])
+                        existing = next(
+                            (r for r in (self.tables[table] if pool is None else pool)
+                             if r.get(conflict) == row[conflict]),
+                            None,
+                        )
+                    if existing is not None:
+                        self._invalidate(table, row.keys())
+                        existing.update(row)
+                        out.append(existing)
+                    else:
+                        out.extend(self.add_rows(table, [row]))
+            return [dict(r) for r in out]
+        self._check_foreign_keys(table, rows)
+        return [dict(r) for r in self.add_rows(table, rows)]
+
+    def _check_foreign_keys(self, table: str, rows: list[dict]) -> None:
+        for parent, column in FOREIGN_KEYS.get(table, {}).items():
+            for row in rows:
+                if row.get(column) is not None and self.by_id(parent, row[column]) is None:
+                    raise PostgrestError(
+                        f'insert or update on table "{table}" violates foreign key constraint',
+                        "23503", 409,
+                    )
+
+    def _matching(self, table: str, params) -> list[dict]:
+        preds = _filter_predicates(params)
+        pool = self._candidates(table, params)
+        return [r for r in (self.tables[table] if pool is None else pool) if all(p(r) for p in preds)]
+
+    def update(self, table: str, payload: dict, params) -> list[dict]:
+        with self.lock:
+            rows = self._matching(table, params)
+            if rows:
+                self._invalidate(table, payload.keys())
+            for row in rows:
+                row.update(payload)
+            return [dict(r) for r in rows]
+
+    def delete(self, table: str, params) -> list[dict]:
+        with self.lock:
+            doomed = self._matching(table, params)
+            ids = {r["id"] for r in doomed}
+            if ids:
+                self.tables[table] = [r for r in self.tables[table] if r["id"] not in ids]
+                self._invalidate(table)
+            for row_id in ids:
+                self.indexes[table].pop(row_id, None)
+            return [dict(r) for r in doomed]
+
+    def rpc(self, name: str, args: dict):
+        fn = self.rpcs.get(name)
+        if fn is None:
+            raise PostgrestError(f"Could not find the function public.{name}", "PGRST202", 404)
+        with self.lock:
+            return fn(self, args)
+
+
+# ── RPC functions (Python mirrors of supabase_schema.sql) ───────────
+def rpc_place_order(db: FakeDatabase, args: dict) -> dict:
+    """Mirror of the ``place_order(p_user_id, p_items)`` SQL function (runs under the db lock)."""
+    items = args.get("p_items") or []
+    if not isinstance(items, list) or not items:
+        raise PostgrestError("Order must contain at least one item")
+    wanted: dict = {}
+    for item in items:
+        qty = int(item.get("quantity") or 0)
+        if qty < 1:
+            raise PostgrestError(f"Invalid quantity for food item {item.get('food_id')}")
+        wanted[item.get("food_id")] = wanted.get(item.get("food_id"), 0) + qty
+    foods = {}
+    for food_id, qty in sorted(wanted.items()):
+        food = db.by_id("foods", food_id)
+        if food is None:
+            raise PostgrestError(f"Food item {food_id} not found")
+        if food.get("stock") == 0:
+            raise PostgrestError(f"'{food['name']}' is sold out")
+        if not food["is_available"]:
+            raise PostgrestError(f"'{food['name']}' is currently unavailable")
+        if food.get("stock") is not None and food["stock"] < qty:
+            raise PostgrestError(f"Only {food['stock']} left of '{food['name']}'")
+        foods[food_id] = food
+    db._check_foreign_keys("orders", [{"user_id": args.get("p_user_id")}])
+    sold_out = []
+    db._invalidate("foods", ("stock", "is_available"))
+    for food_id, qty in sorted(wanted.items()):
+        food = foods[food_id]
+        if food.get("stock") is not None:
+            food["stock"] -= qty
+            food["is_available"] = food["stock"] > 0
+            if food["stock"] == 0:
+                sold_out.append(food_id)
+    total, lines = 0.0, []
+    for item in items:
+        food, qty = foods[item["food_id"]], int(item["quantity"])
+        total += food["price"] * qty
+        lines.append({"food_id": food["id"], "quantity": qty, "price": food["price"] * qty})
+    order = db.add_rows("orders", [{
+        "user_id": args.get("p_user_id"), "status": "pending", "total_price": round(total, 2),
+    }])[0]
+    for line in lines:
+        line["order_id"] = order["id"]
+    db.add_rows("order_items", [dict(line) for line in lines])
+    return {**order, "items": lines, "sold_out": sold_out}
+
+
+def rpc_restock_food(db: FakeDatabase, args: dict) -> dict | None:
+    """Mirror of the ``restock_food(p_food_id, p_add, p_set)`` SQL function."""
+    add, stock = args.get("p_add"), args.get("p_set")
+    if (add is not None and add < 1) or (stock is not None and stock < 0):
+        raise PostgrestError("Invalid stock change")
+    food = db.by_id("foods", args.get("p_food_id"))
+    if food is None:
+        return None
+    db._invalidate("foods", ("stock", "is_available"))
+    if add is not None:
+        food["stock"] = (food.get("stock") or 0) + add
+        food["is_available"] = True
+    else:
+        food["stock"] = stock
+        if stock is not None:
+            food["is_available"] = stock > 0
+    return dict(food)
+
+
+FOOD_IMPORT_COLUMNS = ("name", "price", "category", "is_available", "image_url")
+
+
+def rpc_update_foods(db: FakeDatabase, args: dict) -> list[dict]:
+    """Mirror of the ``update_foods(p_rows)`` SQL function."""
+    updated = []
+    for row in args.get("p_rows") or []:
+        food = db.by_id("foods", row.get("id"))
+        if food is None:
+            continue
+        changes = {col: row[col] for col in FOOD_IMPORT_COLUMNS if col in row}
+        db._invalidate("foods", tuple(changes))
+        food.update(changes)
+        updated.append(dict(food))
+    return updated
+
+
+def rpc_order_stats(db: FakeDatabase, args: dict) -> dict:
+    """Mirror of the ``order_stats(p_from, p_to, p_top, p_tz)`` SQL function."""
+    start = datetime.fromisoformat(args["p_from"])
+    end = datetime.fromisoformat(args["p_to"])
+    tz = ZoneInfo(args.get("p_tz") or "UTC")
+    orders = {}
+    for order in db.tables.get("orders", []):
+        created = datetime.fromisoformat(order["created_at"])
+        if start <= created < end:
+            orders[order["id"]] = (order, created.astimezone(tz))
+    status_counts, by_day, by_hour, foods = {}, {}, {}, {}
+    for order, local_time in orders.values():
+        price = order["total_price"]
+        status_counts[order["status"]] = status_counts.get(order["status"], 0) + 1
+        for buckets, key in ((by_day, local_time.date().isoformat()), (by_hour, local_time.hour)):
+            n, revenue = buckets.get(key, (0, 0))
+            buckets[key] = (n + 1, revenue + price)
+    for item in db.tables.get("order_items", []):
+        if item["order_id"] in orders:
+            quantity, revenue = foods.get(item["food_id"], (0, 0))
+            foods[item["food_id"]] = (quantity + item["quantity"], revenue + item["price"])
+    top = sorted(foods.items(), key=lambda kv: (-kv[1][0], kv[0]))[:int(args.get("p_top") or 5)]
+    count = len(orders)
+    revenue = sum(order["total_price"] for order, _ in orders.values())
+    return {
+        "order_count": count,
+        "revenue": revenue,
+        "average_order_value": round(revenue / count, 2) if count else 0,
+        "status_counts": status_counts,
+        "revenue_by_day": [{"day": k, "orders": n, "revenue": r} for k, (n, r) in sorted(by_day.items())],
+        "revenue_by_hour": [{"hour": k, "orders": n, "revenue": r} for k, (n, r) in sorted(by_hour.items())],
+        "top_foods": sorted(
+            ({"food_id": fid, "name": db.by_id("foods", fid)["name"], "quantity": q, "revenue": r}
+             for fid, (q, r) in top if db.by_id("foods", fid) is not None),
+            key=lambda f: (-f["quantity"], f["name"]),
+        ),
+    }
+
+
+DEFAULT_RPCS = {
+    "place_order": rpc_place_order,
+    "restock_food": rpc_restock_food,
+    "update_foods": rpc_update_foods,
+    "order_stats": rpc_order_stats,
+}
+
+
+# ── HTTP layer ──────────────────────────────────────────────────────
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakePostgREST/1.0"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without NODELAY the
+        # Nagle/delayed-ACK interaction adds ~40 ms to every response.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *_args):  # silence per-request logging
+        pass
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        segments = [s for s in parts.path.split("/") if s]
+        if segments[:2] != ["rest", "v1"] or len(segments) < 3:
+            raise PostgrestError("not found", "PGRST000", 404)
+        return segments[2:], params
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else None
+
+    def _send(self, status: int, payload=None, empty: bool = True) -> None:
+        body = b"" if payload is None and empty else json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        cfg = self.server.config
+        delay = cfg["latency_ms"] + random.uniform(0, cfg["jitter_ms"])
+        if delay:
+            time.sleep(delay / 1000.0)
+        db: FakeDatabase = self.server.db
+        cfg["requests"] += 1
+        try:
+            path, params = self._route()
+            prefer = self.headers.get("Prefer", "")
+            # Always drain the body (postgrest-py sends "{}" with DELETE) so
+            # the keep-alive connection stays in sync
+            body = self._body()
+            if path[0] == "rpc":
+                result = db.rpc(path[1], body or {})
+                self._send(200, result, empty=False)  # a NULL result is the body "null"
+                return
+            table = path[0]
+            if method == "GET" or method == "HEAD":
+                self._send(200, db.select(table, params))
+            elif method == "POST":
+                rows = db.insert(table, body, params, prefer)
+                self._send(201, None if "return=minimal" in prefer else rows)
+            elif method == "PATCH":
+                rows = db.update(table, body or {}, params)
+                self._send(200, None if "return=minimal" in prefer else rows)
+            elif method == "DELETE":
+                rows = db.delete(table, params)
+                self._send(200, None if "return=minimal" in prefer else rows)
+        except PostgrestError as exc:
+            self._send(exc.status, exc.payload)
+        except Exception as exc:  # noqa: BLE001
+            self._send(500, {"code": "XX000", "message": str(exc), "details": None, "hint": None})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakePostgrestServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 resets connections under bench bursts
+
+    def __init__(self, address, db: FakeDatabase, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        super().__init__(address, _Handler)
+        self.db = db
+        self.config = {"latency_ms": latency_ms, "jitter_ms": jitter_ms, "requests": 0}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(db: FakeDatabase | None = None, port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0) -> FakePostgrestServer:
+    """Start a fake PostgREST server on a background thread and return it."""
+    server = FakePostgrestServer(("127.0.0.1", port), db or FakeDatabase(), latency_ms, jitter_ms)
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-postgrest").start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakePostgrestServer(("127.0.0.1", args.port), FakeDatabase(),
+                                 args.latency_ms, args.jitter_ms)
+    print(f"Fake PostgREST listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Stub email provider for benchmarks.
+
+Accepts the Brevo (``POST /v3/smtp/email``) and Resend (``POST /emails``)
+send APIs with a configurable latency and failure rate, and remembers the
+last OTP sent to each address so a scenario can complete the
+login → verify-otp flow. Point the app at it with ``BREVO_API_URL`` /
+``RESEND_API_URL``.
+"""
+
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_OTP_RE = re.compile(r"\b(\d{6})\b")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StubEmail/1.0"
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *_args):
+        pass
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server: StubEmailServer = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        delay = server.latency_ms + random.uniform(0, server.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000.0)
+        if self.path == "/v3/smtp/email":        # Brevo
+            recipients = [r.get("email") for r in payload.get("to", [])]
+            text = payload.get("textContent") or payload.get("htmlContent") or ""
+        elif self.path == "/emails":             # Resend
+            recipients = list(payload.get("to", []))
+            text = payload.get("text") or payload.get("html") or ""
+        else:
+            self._send(404, {"message": "not found"})
+            return
+        if random.random() < server.failure_rate:
+            server.record(None, None, ok=False)
+            self._send(503, {"message": "stub provider failure"})
+            return
+        match = _OTP_RE.search(text)
+        for to in recipients:
+            server.record(to, match.group(1) if match else None, ok=True)
+        self._send(201, {"messageId": f"<{uuid.uuid4().hex}@stub>", "id": uuid.uuid4().hex})
+
+
+class StubEmailServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 failure_rate: float = 0.0):
+        super().__init__(address, _Handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.sent = 0
+        self.failed = 0
+        self._otps: dict[str, str] = {}
+        self._cond = threading.Condition()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, to: str | None, otp: str | None, ok: bool) -> None:
+        with self._cond:
+            if not ok:
+                self.failed += 1
+                return
+            self.sent += 1
+            if to and otp:
+                self._otps[to.lower()] = otp
+            self._cond.notify_all()
+
+    def wait_for_otp(self, email: str, timeout: float = 10.0) -> str | None:
+        """Pop the last OTP sent to *email*, waiting up to *timeout* seconds."""
+        deadline = time.monotonic() + timeout
+        key = email.lower()
+        with self._cond:
+            while key not in self._otps:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._otps.pop(key)
+
+
+def start_stub_email(latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                     failure_rate: float = 0.0, port: int = 0) -> StubEmailServer:
+    """Start the stub provider on a background thread and return it."""
+    server = StubEmailServer(("127.0.0.1", port), latency_ms, jitter_ms, failure_rate)
+    threading.Thread(target=server.serve_forever, daemon=True, name="stub-email").start()
+    return server
@@ -0,0 +1,241 @@
+"""Endpoint benchmark suite against a synthetic dataset.
+
+Boots the Flask app against the PostgREST stand-in (filled by
+``bench.datagen``) and a stub email provider, runs each scenario and
+reports req/s and p50/p95/p99 per endpoint. Results can be saved as JSON
+and compared with a previous run, e.g. the same command on another
+commit::
+
+    python -m bench.suite --scale 0.1 --latency-ms 20 --json before.json
+    git checkout my-branch
+    python -m bench.suite --scale 0.1 --latency-ms 20 --compare before.json
+
+Scenarios: menu, checkout, admin_orders, user_orders, login.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import time
+
+from bench.common import auth_headers, boot_app, print_table, run_timed
+from bench.datagen import CATEGORIES, generate
+from bench.fake_postgrest import FakeDatabase
+from bench.stub_email import start_stub_email
+
+SCENARIOS = ("menu", "checkout", "admin_orders", "user_orders", "login")
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Suite:
+    def __init__(self, args):
+        self.args = args
+        db = FakeDatabase()
+        self.data = generate(db, scale=args.scale, seed=args.seed)
+        self.email = start_stub_email(args.email_latency_ms)
+        # Real (stubbed) OTP emails instead of the dev shortcut
+        os.environ["DEV_OTP"] = "false"
+        self.app, self.server = boot_app(
+            args.latency_ms, args.jitter_ms, db=db,
+            DEV_OTP=False,
+            BREVO_API_KEY="bench-key",
+            BREVO_SENDER_EMAIL="noreply@bench.local",
+            BREVO_API_URL=self.email.url,
+        )
+        self.admin_headers = auth_headers(self.app, self.data["admin"])
+        self.rng = random.Random(args.seed)
+        self.available_foods = [f["id"] for f in self.data["foods"] if f["is_available"]]
+        self.results: dict[str, dict] = {}
+
+    # ── helpers ─────────────────────────────────────────────────────
+    def _request(self, method: str, url: str, **kwargs):
+        with self.app.test_client() as client:
+            return client.open(url, method=method, **kwargs)
+
+    def _measure(self, label: str, fn, iterations: int | None = None) -> None:
+        iterations = iterations or self.args.iterations
+        run_timed(fn, min(10, iterations), self.args.concurrency)  # warm-up
+        before = self.server.config["requests"]
+        summary = run_timed(fn, iterations, self.args.concurrency)
+        summary["db_calls/req"] = round((self.server.config["requests"] - before) / iterations, 2)
+        self.results[label] = summary
+
+    def _user_headers(self):
+        user = self.rng.choice(self.data["users"])
+        return auth_headers(self.app, user)
+
+    # ── scenarios ───────────────────────────────────────────────────
+    def menu(self) -> None:
+        self._measure("GET /api/foods", lambda _i: self._request("GET", "/api/foods").status_code == 200)
+        self._measure(
+            "GET /api/foods?category=",
+            lambda _i: self._request(
+                "GET", f"/api/foods?category={self.rng.choice(CATEGORIES)}").status_code == 200,
+        )
+
+    def checkout(self) -> None:
+        headers = [self._user_headers() for _ in range(50)]
+
+        def place(i):
+            items = [{"food_id": fid, "quantity": self.rng.randint(1, 3)}
+                     for fid in self.rng.sample(self.available_foods, self.rng.randint(1, 4))]
+            resp = self._request("POST", "/api/orders", json={"items": items},
+                                 headers=headers[i % len(headers)])
+            return resp.status_code == 201
+
+        self._measure("POST /api/orders", place)
+
+    def admin_orders(self) -> None:
+        cursors = []
+
+        def first_page(_i):
+            resp = self._request("GET", "/api/orders/admin?limit=50", headers=self.admin_headers)
+            if resp.status_code == 200 and resp.get_json()["meta"]["next_cursor"]:
+                cursors.append(resp.get_json()["meta"]["next_cursor"])
+            return resp.status_code == 200
+
+        def next_page(i):
+            cursor = cursors[i % len(cursors)]
+            resp = self._request("GET", f"/api/orders/admin?limit=50&cursor={cursor}",
+                                 headers=self.admin_headers)
+            return resp.status_code == 200
+
+        def pending(_i):
+            resp = self._request("GET", "/api/orders/admin?status=pending&limit=50",
+                                 headers=self.admin_headers)
+            return resp.status_code == 200
+
+        self._measure("GET /api/orders/admin", first_page)
+        if cursors:
+            self._measure("GET /api/orders/admin (page 2)", next_page)
+        self._measure("GET /api/orders/admin?status=pending", pending)
+
+    def user_orders(self) -> None:
+        headers = [self._user_headers() for _ in range(200)]
+        self._measure(
+            "GET /api/orders/user",
+            lambda i: self._request("GET", "/api/orders/user", headers=headers[i % len(headers)])
+            .status_code == 200,
+        )
+
+    def login(self) -> None:
+        """OTP request then verification, each timed separately."""
+        iterations = self.args.iterations
+        users = self.rng.sample(self.data["users"], min(len(self.data["users"]), iterations + 10))
+        otps: dict[str, str] = {}
+
+        def request_otp(i):
+            resp = self._request("POST", "/api/auth/login", json={"email": users[i]["email"]})
+            return resp.status_code == 200
+
+        def verify(i):
+            email = users[i]["email"]
+            otp = otps.get(email) or self.email.wait_for_otp(email, timeout=10)
+            if otp is None:
+                return False
+            resp = self._request("POST", "/api/auth/verify-otp", json={"email": email, "otp": otp})
+            return resp.status_code == 200
+
+        warm = users[:10]
+        users = users[10:]
+        for user in warm:  # warm-up: open the provider connection
+            self._request("POST", "/api/auth/login", json={"email": user["email"]})
+        before = self.server.config["requests"]
+        self.results["POST /api/auth/login"] = run_timed(request_otp, len(users), self.args.concurrency)
+        self.results["POST /api/auth/login"]["db_calls/req"] = round(
+            (self.server.config["requests"] - before) / len(users), 2)
+
+        # Collect the delivered OTPs outside the timed section
+        deadline = time.monotonic() + 30
+        for user in users:
+            otp = self.email.wait_for_otp(user["email"], timeout=max(0.0, deadline - time.monotonic()))
+            if otp:
+                otps[user["email"]] = otp
+        before = self.server.config["requests"]
+        self.results["POST /api/auth/verify-otp"] = run_timed(verify, len(users), self.args.concurrency)
+        self.results["POST /api/auth/verify-otp"]["db_calls/req"] = round(
+            (self.server.config["requests"] - before) / len(users), 2)
+
+    # ── reporting ───────────────────────────────────────────────────
+    def report(self) -> dict:
+        return {
+            "revision": _git_revision(),
+            "params": {k: v for k, v in vars(self.args).items() if k not in ("json", "compare")},
+            "dataset": self.data["counts"],
+            "results": self.results,
+        }
+
+
+def _print_comparison(current: dict, baseline: dict) -> None:
+    print(f"\nChange vs. {baseline.get('revision') or 'baseline'} "
+          f"(negative latency / positive req/s is better)")
+    width = max(len(label) for label in current["results"]) + 2
+    print("".ljust(width) + "req_per_s".rjust(12) + "p50_ms".rjust(10) + "p99_ms".rjust(10))
+    for label, now in current["results"].items():
+        before = baseline.get("results", {}).get(label)
+        if not before:
+            print(label.ljust(width) + "(new)".rjust(12))
+            continue
+
+        def delta(key):
+            if not before.get(key):
+                return "n/a"
+            return f"{(now[key] - before[key]) / before[key] * 100:+.1f}%"
+
+        print(label.ljust(width) + delta("req_per_s").rjust(12)
+              + delta("p50_ms").rjust(10) + delta("p99_ms").rjust(10))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=0.1,
+                        help="dataset size; 1.0 = 10k foods, 50k users, 1M orders")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="per PostgREST call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--email-latency-ms", type=float, default=150.0)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    suite = Suite(args)
+    print(f"Dataset {suite.data['counts']} built in {suite.data['seconds']} s")
+    for name in selected:
+        getattr(suite, name)()
+
+    report = suite.report()
+    print_table(
+        f"{report['revision'] or 'working tree'} — {args.latency_ms}±{args.jitter_ms} ms per DB call, "
+        f"concurrency {args.concurrency}",
+        suite.results,
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nSaved {args.json}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            _print_comparison(report, json.load(fh))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,89 @@
-from flask_jwt_extended import JWTManager
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING
+
 from flask_cors import CORS
 
-jwt = JWTManager()
+from repositories import Repository, create_repository
+from utils.metrics import InstrumentedClient
+from utils.token_cache import CachingJWTManager, RevocationList
+from utils.ttl_store import TTLStore, MemoryTTLStore, create_ttl_store
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+jwt = CachingJWTManager()  # revocation list + claims cache installed by init_token_cache
 cors = CORS()
-supabase: Client = None  # initialised in create_app
+supabase: "Client" = None  # initialised in create_app (or on first use with lazy=True)
+_supabase_factory = None
+_supabase_lock = threading.Lock()
+repository: Repository = None  # initialised in create_app
+otp_store: TTLStore = MemoryTTLStore()  # replaced in create_app
 
 
-def init_supabase(url: str, key: str) -> Client:
-    """Create and cache the Supabase client."""
-    global supabase
-    supabase = create_client(url, key)
+def init_supabase(url: str, key: str, instrument: bool = True, asynchronous: bool = False,
+                  lazy: bool = False) -> "Client | None":
+    """Create and cache the Supabase client.
+
+    With *instrument*, every ``.execute()`` is counted and timed for
+    ``/api/metrics`` and recorded as a span when tracing is on (see
+    utils.metrics.InstrumentedClient). *asynchronous* creates a
+    ``supabase.AsyncClient`` (awaitable ``.execute()``) for ASGI mode.
+    *lazy* defers importing supabase-py and building the client to the
+    first ``get_supabase()`` call (returns None here).
+    """
+    global supabase, _supabase_factory
+
+    def build():
+        from supabase import AsyncClient, create_client
+
+        client = AsyncClient(url, key) if asynchronous else create_client(url, key)
+        return InstrumentedClient(client) if instrument else client
+
+    supabase = None
+    _supabase_factory = build
+    if not lazy:
+        supabase = build()
     return supabase
 
 
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """Return the initialised Supabase client (call-time lookup)."""
+    global supabase
+    if supabase is None and _supabase_factory is not None:
+        with _supabase_lock:
+            if supabase is None:
+                supabase = _supabase_factory()
     return supabase
+
+
+def init_repository(backend: str = "supabase", **options) -> Repository:
+    """Create the repository the services query through.
+
+    "supabase" goes through the client above; "postgres" connects
+    directly (see repositories.create_repository for *options*).
+    """
+    global repository
+    repository = create_repository(backend, supabase=get_supabase, **options)
+    return repository
+
+
+def get_repository() -> Repository:
+    """Return the initialised repository (call-time lookup)."""
+    return repository
+
+
+def init_otp_store(backend: str, path: str | None = None, max_entries: int = 10_000) -> TTLStore:
+    """Create the OTP store ("memory" per worker, or "sqlite" shared by all)."""
+    global otp_store
+    otp_store = create_ttl_store(backend, path, table="otp_codes", max_entries=max_entries)
+    return otp_store
+
+
+def get_otp_store() -> TTLStore:
+    """Return the initialised OTP store (call-time lookup)."""
+    return otp_store
+
+
+def get_revocations() -> RevocationList:
+    """Return the token revocation list (call-time lookup)."""
+    return jwt.revocations
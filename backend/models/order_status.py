@@ -0,0 +1,42 @@
+"""Order lifecycle — the one transition table used by validation and queries."""
+
+ORDER_STATUSES = ("pending", "preparing", "ready", "completed")
+
+# Allowed status transitions (current → set of valid next statuses)
+VALID_TRANSITIONS: dict[str, frozenset[str]] = {
+    "pending": frozenset({"preparing"}),
+    "preparing": frozenset({"ready"}),
+    "ready": frozenset({"completed"}),
+    "completed": frozenset(),  # terminal state
+}
+
+# Statuses an order can be moved *to* (what PATCH /api/orders/<id> accepts)
+TARGET_STATUSES = tuple(
+    s for s in ORDER_STATUSES if any(s in nxt for nxt in VALID_TRANSITIONS.values())
+)
+
+
+def source_statuses(new_status: str) -> list[str]:
+    """Statuses from which an order may move to *new_status*.
+
+    Used as the ``status IN (...)`` predicate of the conditional UPDATE.
+    """
+    return [s for s in ORDER_STATUSES if new_status in VALID_TRANSITIONS[s]]
+
+
+def transition_path(current: str, target: str) -> list[str]:
+    """Statuses an order passes through from *current* to *target* (excluding *current*).
+
+    Empty if it is already there; ValueError if *target* is unreachable.
+    """
+    paths = {current: []}
+    frontier = [current]
+    while frontier:
+        status = frontier.pop(0)
+        if status == target:
+            return paths[status]
+        for nxt in sorted(VALID_TRANSITIONS.get(status, ())):
+            if nxt not in paths:
+                paths[nxt] = paths[status] + [nxt]
+                frontier.append(nxt)
+    raise ValueError(f"An order cannot move from '{current}' to '{target}'")
@@ -1,4 +1,6 @@
-from marshmallow import Schema, fields, validate, pre_load
+from marshmallow import Schema, ValidationError, fields, validate, pre_load, validates_schema
+
+from models.order_status import TARGET_STATUSES
 
 
 # ── Auth ────────────────────────────────────────────────────────────
@@ -20,6 +22,16 @@ class VerifyOtpSchema(Schema):
     otp = fields.Str(required=True, validate=validate.Length(equal=6))
 
 
+class RevokeSchema(Schema):
+    user_id = fields.Str(validate=validate.Length(min=1, max=64))
+    token = fields.Str(validate=validate.Length(min=1))
+
+    @validates_schema
+    def require_target(self, data, **kwargs):
+        if not data.get("user_id") and not data.get("token"):
+            raise ValidationError("Provide user_id and/or token", "_schema")
+
+
 # ── Food ────────────────────────────────────────────────────────────
 class _NormaliseImageUrl:
     """Mixin that converts empty image_url strings to None before load."""
@@ -35,6 +47,7 @@ class FoodCreateSchema(_NormaliseImageUrl, Schema):
     price = fields.Float(required=True, validate=validate.Range(min=0))
     category = fields.Str(required=True, validate=validate.Length(min=1, max=100))
     is_available = fields.Bool(load_default=True)
+    stock = fields.Int(allow_none=True, validate=validate.Range(min=0))  # omitted/None = not tracked
     image_url = fields.Url(load_default=None, allow_none=True)
 
 
@@ -43,7 +56,19 @@ class FoodUpdateSchema(_NormaliseImageUrl, Schema):
     price = fields.Float(validate=validate.Range(min=0))
     category = fields.Str(validate=validate.Length(min=1, max=100))
     is_available = fields.Bool()
-    image_url = fields.Url(allow_none=True)
+    image_url = fields.Url(allow_none=True)  # stock changes go through RestockSchema
+
+
+class RestockSchema(Schema):
+    """Either ``add`` portions or ``stock`` to set (None stops tracking)."""
+
+    add = fields.Int(validate=validate.Range(min=1))
+    stock = fields.Int(allow_none=True, validate=validate.Range(min=0))
+
+    @validates_schema
+    def _one_change(self, data, **kwargs):
+        if ("add" in data) == ("stock" in data):
+            raise ValidationError("Provide either add or stock")
 
 
 # ── Order ───────────────────────────────────────────────────────────
@@ -59,7 +84,31 @@ class OrderCreateSchema(Schema):
 
 
 class OrderStatusUpdateSchema(Schema):
-    status = fields.Str(
+    status = fields.Str(required=True, validate=validate.OneOf(TARGET_STATUSES))
+
+
+class OrderBulkStatusItemSchema(Schema):
+    order_id = fields.UUID(required=True)
+    status = fields.Str(required=True, validate=validate.OneOf(TARGET_STATUSES))
+
+
+class OrderBulkStatusSchema(Schema):
+    updates = fields.List(
+        fields.Nested(OrderBulkStatusItemSchema),
         required=True,
-        validate=validate.OneOf(["pending", "preparing", "ready", "completed"]),
+        validate=validate.Length(min=1, max=200),
     )
+
+
+# ── Kitchen ─────────────────────────────────────────────────────────
+class KitchenBatchSchema(Schema):
+    food_id = fields.UUID(required=True)
+    order_ids = fields.List(fields.UUID(), required=True, validate=validate.Length(min=1, max=200))
+
+
+# ── Operations ──────────────────────────────────────────────────────
+class TracingConfigSchema(Schema):
+    enabled = fields.Bool()
+    sample_rate = fields.Float(validate=validate.Range(min=0, max=1))
+    slow_span_ms = fields.Float(validate=validate.Range(min=0))
+    n_plus_one_threshold = fields.Int(validate=validate.Range(min=2))
@@ -0,0 +1,29 @@
+"""Data access backends — see repositories.base.Repository.
+
+  1. SupabaseRepository — supabase-py client, PostgREST over HTTPS
+  2. PostgresRepository — direct Postgres with a connection pool
+                          (optional psycopg dependency)
+"""
+
+from repositories.base import Repository
+from repositories.supabase_repo import SupabaseRepository
+
+
+def create_repository(backend: str, *, supabase=None, dsn: str | None = None,
+                      pool_min: int = 1, pool_max: int = 10, pool_timeout: float = 5.0,
+                      prepare: bool = True, asynchronous: bool = False) -> Repository:
+    """Build the repository for *backend* ("supabase" or "postgres").
+
+    *supabase* is a zero-argument callable returning the client;
+    *asynchronous* selects the asyncio connection pool (ASGI mode).
+    """
+    backend = (backend or "supabase").lower()
+    if backend == "supabase":
+        return SupabaseRepository(supabase)
+    if backend == "postgres":
+        from repositories.postgres_repo import PostgresRepository
+
+        return PostgresRepository(dsn, min_size=pool_min, max_size=pool_max,
+                                  timeout=pool_timeout, prepare=prepare,
+                                  asynchronous=asynchronous)
+    raise ValueError(f"Unknown database backend: {backend!r}")
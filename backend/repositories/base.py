@@ -0,0 +1,140 @@
+"""Repository interface — every database access the services need.
+
+Rows are plain dicts shaped like PostgREST JSON (UUIDs and timestamps as
+strings, numerics as numbers), whichever backend produced them, so the
+services, cursors and ETags do not care where data comes from.
+
+Validation failures raised by the database (SQLSTATE P0001 from
+``place_order()``, unique violations) surface as ValueError.
+
+Data methods are coroutines. With the blocking clients (WSGI) they never
+suspend and are run with ``utils.aio.run_sync``; with the async clients
+(ASGI) they are awaited on the event loop.
+"""
+
+from abc import ABC, abstractmethod
+
+
+class Repository(ABC):
+    """Interface implemented by the Supabase and direct Postgres backends."""
+
+    name = "base"
+
+    def stats(self) -> dict:
+        """Connection pool gauges for ``/api/metrics`` (empty if not pooled)."""
+        return {}
+
+    def close(self) -> None:
+        """Release pooled connections."""
+
+    async def aclose(self) -> None:
+        """Release pooled connections from the event loop (ASGI shutdown)."""
+        self.close()
+
+    # ── Users ───────────────────────────────────────────────────────
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> dict | None:
+        """Return ``{id, name, email, phone, role, created_at}`` or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_user(self, data: dict) -> dict:
+        """Insert a user; ValueError if the email is already registered."""
+        raise NotImplementedError
+
+    # ── Foods ───────────────────────────────────────────────────────
+    @abstractmethod
+    async def list_foods(self, category: str | None = None, available_only: bool = True) -> list[dict]:
+        """Food rows ordered by name."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_foods(self, food_ids: list[str]) -> list[dict]:
+        """Food rows for *food_ids* (missing ids are skipped)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_food(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_food(self, food_id: str, data: dict) -> dict | None:
+        """Apply *data* and return the row, or None if it does not exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_food(self, food_id: str) -> bool:
+        """Delete the row; False if it did not exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_foods(self, rows: list[dict]) -> list[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_foods(self, rows: list[dict]) -> list[dict]:
+        """Run ``update_foods()``: each ``{id, ...}`` row sets only the columns it names.
+
+        Returns the updated rows; ids that do not exist are skipped.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def restock_food(self, food_id: str, add: int | None = None,
+                           stock: int | None = None) -> dict | None:
+        """Run ``restock_food()``: add *add* portions, else set *stock*; None if no such food."""
+        raise NotImplementedError
+
+    # ── Orders ──────────────────────────────────────────────────────
+    @abstractmethod
+    async def place_order(self, user_id: str, items: list[dict]) -> dict:
+        """Run ``place_order()`` in one transaction; the order plus ``items`` and ``sold_out``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_order(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_order_items(self, rows: list[dict]) -> list[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_orders(self, *, user_id: str | None = None, status: str | None = None,
+                          after: tuple[str, str] | None = None, limit: int = 50,
+                          with_user: bool = False) -> list[dict]:
+        """Orders newest first with ``order_items`` (and ``users`` if *with_user*).
+
+        *after* is a ``(created_at, id)`` keyset: only rows strictly
+        older in (created_at DESC, id DESC) order are returned.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_order_status(self, order_id: str, new_status: str,
+                                  from_statuses: list[str]) -> dict | None:
+        """Compare-and-set: move the order only if its status is in *from_statuses*."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_order_statuses(self, moves: dict[str, tuple[list[str], list[str]]]) -> list[dict]:
+        """Bulk compare-and-set, ``{new_status: (order_ids, from_statuses)}``.
+
+        Returns the updated rows.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_order_statuses(self, order_ids: list[str]) -> dict[str, str]:
+        """``{order_id: status}`` for the orders that exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def order_stats(self, start: str, end: str, top: int = 5, tz: str = "UTC") -> dict:
+        """Run ``order_stats()``: aggregates of the orders created in [*start*, *end*).
+
+        ``{order_count, revenue, average_order_value, status_counts,
+        revenue_by_day, revenue_by_hour, top_foods}`` with days and hours
+        local to *tz*; *start* and *end* are ISO timestamps with offset.
+        """
+        raise NotImplementedError
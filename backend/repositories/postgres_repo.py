@@ -0,0 +1,394 @@
+"""Repository talking to Postgres directly (psycopg 3 + psycopg_pool).
+
+Compared with PostgREST over HTTPS this skips the HTTP hop and the JSON
+round-trip at both ends:
+
+  * a bounded connection pool per process (re-created after a fork, so
+    gunicorn ``--preload`` workers never share sockets)
+  * server-side prepared statements on first use (``prepare_threshold=0``;
+    turn off with DATABASE_PREPARE=false behind pgbouncer in transaction
+    mode, which cannot keep them)
+  * reads in autocommit (no BEGIN/COMMIT round-trips), multi-statement
+    writes inside ``conn.transaction()``
+  * order listings as one statement: the page is cut first, then items
+    are aggregated per order with ``json_agg`` (and the user looked up)
+  * *asynchronous* (ASGI mode) swaps in ``AsyncConnectionPool`` so the
+    same statements are awaited on the event loop
+
+Works against the same ``supabase_schema.sql``; ``DATABASE_URL`` is the
+Supabase "connection string" (direct or session pooler) or any Postgres.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+from repositories.base import Repository
+from utils.aio import maybe_await
+from utils.metrics import record_postgres_query
+from utils.tracing import current_trace, statement_span
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg.rows import dict_row
+    from psycopg.types.json import Jsonb
+    from psycopg_pool import AsyncConnectionPool, ConnectionPool, PoolTimeout
+except ImportError:  # optional dependency, only needed for DATABASE_BACKEND=postgres
+    psycopg = None
+
+_USER_COLUMNS = "id, name, email, phone, role, created_at"
+
+# Columns a caller may write (keys come from the marshmallow schemas;
+# the allow-list keeps them out of the SQL text otherwise)
+_WRITABLE = {
+    "users": {"name", "email", "phone", "role"},
+    "foods": {"id", "name", "price", "category", "is_available", "stock", "image_url", "created_at"},
+    "orders": {"user_id", "status", "total_price"},
+    "order_items": {"order_id", "food_id", "quantity", "price"},
+}
+
+_ORDER_PAGE_SQL = """
+SELECT o.*{user_column},
+       COALESCE((SELECT json_agg(oi) FROM order_items oi WHERE oi.order_id = o.id), '[]'::json)
+           AS order_items
+FROM (
+    SELECT * FROM orders
+    WHERE {where}
+    ORDER BY created_at DESC, id DESC
+    LIMIT %(limit)s
+) o
+ORDER BY o.created_at DESC, o.id DESC
+"""
+# Per-row primary key lookups: the page is small, the users table is not
+_USER_COLUMN = """,
+       (SELECT json_build_object('name', u.name, 'email', u.email, 'phone', u.phone)
+        FROM users u WHERE u.id = o.user_id) AS users"""
+
+
+def _jsonable(value):
+    """Match PostgREST's JSON: UUIDs/timestamps as strings, numerics as numbers."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _row(record: dict) -> dict:
+    return {key: _jsonable(value) for key, value in record.items()}
+
+
+def _columns(table: str, data: dict) -> list[str]:
+    unknown = set(data) - _WRITABLE[table]
+    if unknown:
+        raise ValueError(f"Unknown {table} column(s): {', '.join(sorted(unknown))}")
+    return list(data)
+
+
+class PostgresRepository(Repository):
+    """Direct Postgres backend with a bounded, lazily opened pool."""
+
+    name = "postgres"
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, prepare: bool = True, asynchronous: bool = False):
+        if psycopg is None:
+            raise RuntimeError(
+                "DATABASE_BACKEND=postgres needs psycopg and psycopg-pool "
+                "(pip install 'psycopg[binary]' psycopg-pool)"
+            )
+        if not dsn:
+            raise ValueError("DATABASE_URL is required for DATABASE_BACKEND=postgres")
+        self._dsn = dsn
+        self._min_size = max(0, min_size)
+        self._max_size = max(1, max_size, self._min_size)
+        self._timeout = timeout
+        self._prepare_threshold = 0 if prepare else None
+        self._asynchronous = asynchronous
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self._async_lock: asyncio.Lock | None = None
+
+    # ── Pool ────────────────────────────────────────────────────────
+    def _pool_options(self) -> dict:
+        return {
+            "min_size": self._min_size,
+            "max_size": self._max_size,
+            "timeout": self._timeout,
+            "kwargs": {
+                "autocommit": True,
+                "row_factory": dict_row,
+                "prepare_threshold": self._prepare_threshold,
+            },
+            "name": "smartserve",
+        }
+
+    def _get_pool(self):
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            with self._lock:
+                if self._pool_pid != pid:
+                    # A forked worker must not touch the parent's sockets;
+                    # drop the inherited pool without closing it
+                    self._pool = ConnectionPool(self._dsn, open=True, **self._pool_options())
+                    self._pool_pid = pid
+        return self._pool
+
+    async def _get_async_pool(self):
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            if self._async_lock is None:
+                self._async_lock = asyncio.Lock()
+            async with self._async_lock:
+                if self._pool_pid != pid:
+                    pool = AsyncConnectionPool(self._dsn, open=False, **self._pool_options())
+                    await pool.open()
+                    self._pool = pool
+                    self._pool_pid = pid
+        return self._pool
+
+    def connection(self):
+        """Borrow a pooled connection (context manager, blocking pool only)."""
+        return self._get_pool().connection()
+
+    @asynccontextmanager
+    async def _connection(self):
+        """Borrow a connection from whichever pool this repository runs."""
+        try:
+            if self._asynchronous:
+                async with (await self._get_async_pool()).connection() as conn:
+                    yield conn
+            else:
+                with self._get_pool().connection() as conn:
+                    yield conn
+        except PoolTimeout as exc:
+            raise RuntimeError("Database is busy, please try again") from exc
+
+    @asynccontextmanager
+    async def _transaction(self, conn):
+        if self._asynchronous:
+            async with conn.transaction():
+                yield
+        else:
+            with conn.transaction():
+                yield
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid() and not self._asynchronous:
+                self._pool.close()
+            self._pool = None
+            self._pool_pid = None
+
+    async def aclose(self) -> None:
+        if not self._asynchronous:
+            self.close()
+            return
+        pool, self._pool, self._pool_pid = self._pool, None, None
+        if pool is not None:
+            await pool.close()
+
+    def stats(self) -> dict:
+        if self._pool is None or self._pool_pid != os.getpid():
+            return {}
+        stats = self._pool.get_stats()
+        return {
+            "size": stats.get("pool_size", 0),
+            "available": stats.get("pool_available", 0),
+            "waiting": stats.get("requests_waiting", 0),
+        }
+
+    # ── Execution ───────────────────────────────────────────────────
+    async def _execute(self, conn, table: str, op: str, query, params=None) -> list[dict]:
+        """Run one statement on *conn*; rows come back PostgREST-shaped."""
+        # Composed statements are only rendered to text when a trace wants it
+        text = query if isinstance(query, str) or current_trace() is None else query.as_string(conn)
+        start = time.perf_counter()
+        ok = False
+        try:
+            with statement_span(table, op, text, params or ()):
+                cur = await maybe_await(conn.execute(query, params))
+                rows = await maybe_await(cur.fetchall()) if cur.description else []
+            ok = True
+        except psycopg.errors.RaiseException as exc:
+            # place_order() validation failures carry a user-facing message
+            raise ValueError(exc.diag.message_primary) from exc
+        except psycopg.errors.InvalidTextRepresentation as exc:
+            raise ValueError(exc.diag.message_primary) from exc
+        finally:
+            record_postgres_query(table, op, time.perf_counter() - start, ok)
+        return [_row(r) for r in rows]
+
+    async def _run(self, table: str, op: str, query, params=None) -> list[dict]:
+        async with self._connection() as conn:
+            return await self._execute(conn, table, op, query, params)
+
+    async def _insert(self, table: str, rows: list[dict], returning: str = "*") -> list[dict]:
+        """Multi-row INSERT; keys missing from a row fall back to the column DEFAULT."""
+        if not rows:
+            return []
+        names: list[str] = []
+        for data in rows:
+            for col in _columns(table, data):
+                if col not in names:
+                    names.append(col)
+        values = sql.SQL(", ").join(
+            sql.SQL("({})").format(sql.SQL(", ").join(
+                sql.Placeholder() if col in data else sql.SQL("DEFAULT") for col in names
+            ))
+            for data in rows
+        )
+        query = sql.SQL("INSERT INTO {} ({}) VALUES {}").format(
+            sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, names)), values,
+        )
+        query += sql.SQL(" RETURNING " + returning)
+        params = [data[col] for data in rows for col in names if col in data]
+        return await self._run(table, "insert", query, params)
+
+    # ── Users ───────────────────────────────────────────────────────
+    async def get_user_by_email(self, email):
+        rows = await self._run("users", "select",
+                               f"SELECT {_USER_COLUMNS} FROM users WHERE email = %s", (email,))
+        return rows[0] if rows else None
+
+    async def create_user(self, data):
+        try:
+            return (await self._insert("users", [data], returning=_USER_COLUMNS))[0]
+        except psycopg.errors.UniqueViolation as exc:
+            raise ValueError("Email already registered") from exc
+
+    # ── Foods ───────────────────────────────────────────────────────
+    async def list_foods(self, category=None, available_only=True):
+        where = ["TRUE"]
+        params = []
+        if available_only:
+            where.append("is_available")
+        if category:
+            where.append("category = %s")
+            params.append(category)
+        return await self._run(
+            "foods", "select",
+            f"SELECT * FROM foods WHERE {' AND '.join(where)} ORDER BY name", params,
+        )
+
+    async def get_foods(self, food_ids):
+        if not food_ids:
+            return []
+        return await self._run("foods", "select", "SELECT * FROM foods WHERE id = ANY(%s::uuid[])",
+                               (list(food_ids),))
+
+    async def create_food(self, data):
+        return (await self._insert("foods", [data]))[0]
+
+    async def update_food(self, food_id, data):
+        if not data:
+            rows = await self.get_foods([food_id])
+            return rows[0] if rows else None
+        query = sql.SQL("UPDATE foods SET {} WHERE id = %s RETURNING *").format(
+            sql.SQL(", ").join(
+                sql.SQL("{} = %s").format(sql.Identifier(col)) for col in _columns("foods", data)
+            )
+        )
+        rows = await self._run("foods", "update", query, [*data.values(), food_id])
+        return rows[0] if rows else None
+
+    async def delete_food(self, food_id):
+        return bool(await self._run("foods", "delete",
+                                    "DELETE FROM foods WHERE id = %s RETURNING id", (food_id,)))
+
+    async def insert_foods(self, rows):
+        return await self._insert("foods", rows)
+
+    async def update_foods(self, rows):
+        result = await self._run("rpc:update_foods", "rpc",
+                                 "SELECT update_foods(%s) AS result", (Jsonb(rows),))
+        foods = result[0]["result"]
+        for food in foods:
+            food["created_at"] = _jsonable(datetime.fromisoformat(food["created_at"]))
+        return foods
+
+    async def restock_food(self, food_id, add=None, stock=None):
+        rows = await self._run("rpc:restock_food", "rpc",
+                               "SELECT restock_food(%s::uuid, %s, %s) AS result", (food_id, add, stock))
+        food = rows[0]["result"]
+        if food is not None:
+            food["created_at"] = _jsonable(datetime.fromisoformat(food["created_at"]))
+        return food
+
+    # ── Orders ──────────────────────────────────────────────────────
+    async def place_order(self, user_id, items):
+        rows = await self._run("rpc:place_order", "rpc",
+                               "SELECT place_order(%s::uuid, %s) AS result", (user_id, Jsonb(items)))
+        order = rows[0]["result"]
+        # to_jsonb() renders timestamps in the session time zone
+        order["created_at"] = _jsonable(datetime.fromisoformat(order["created_at"]))
+        return order
+
+    async def insert_order(self, data):
+        return (await self._insert("orders", [data]))[0]
+
+    async def insert_order_items(self, rows):
+        return await self._insert("order_items", rows)
+
+    async def list_orders(self, *, user_id=None, status=None, after=None, limit=50, with_user=False):
+        where = ["TRUE"]
+        params = {"limit": limit}
+        if user_id:
+            where.append("user_id = %(user_id)s::uuid")
+            params["user_id"] = user_id
+        if status:
+            where.append("status = %(status)s")
+            params["status"] = status
+        if after:
+            where.append("(created_at, id) < (%(after_ts)s::timestamptz, %(after_id)s::uuid)")
+            params["after_ts"], params["after_id"] = after
+        query = _ORDER_PAGE_SQL.format(
+            where=" AND ".join(where),
+            user_column=_USER_COLUMN if with_user else "",
+        )
+        return await self._run("orders", "select", query, params)
+
+    async def update_order_status(self, order_id, new_status, from_statuses):
+        rows = await self._run(
+            "orders", "update",
+            "UPDATE orders SET status = %s WHERE id = %s::uuid AND status = ANY(%s) RETURNING *",
+            (new_status, order_id, list(from_statuses)),
+        )
+        return rows[0] if rows else None
+
+    async def update_order_statuses(self, moves):
+        updated = []
+        async with self._connection() as conn, self._transaction(conn):
+            for new_status, (order_ids, from_statuses) in moves.items():
+                updated.extend(await self._execute(
+                    conn, "orders", "update",
+                    "UPDATE orders SET status = %s "
+                    "WHERE id = ANY(%s::uuid[]) AND status = ANY(%s) RETURNING *",
+                    (new_status, list(order_ids), list(from_statuses)),
+                ))
+        return updated
+
+    async def get_order_statuses(self, order_ids):
+        if not order_ids:
+            return {}
+        rows = await self._run("orders", "select",
+                               "SELECT id, status FROM orders WHERE id = ANY(%s::uuid[])",
+                               (list(order_ids),))
+        return {row["id"]: row["status"] for row in rows}
+
+    async def order_stats(self, start, end, top=5, tz="UTC"):
+        rows = await self._run(
+            "rpc:order_stats", "rpc",
+            "SELECT order_stats(%s::timestamptz, %s::timestamptz, %s, %s) AS result",
+            (start, end, top, tz),
+        )
+        return rows[0]["result"]
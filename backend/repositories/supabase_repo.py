@@ -0,0 +1,161 @@
+"""Repository backed by the supabase-py client (PostgREST over HTTPS)."""
+
+from repositories.base import Repository
+from utils.aio import maybe_await
+
+# SQLSTATEs the services treat as validation errors
+_RAISE_EXCEPTION = "P0001"              # RAISE EXCEPTION in place_order() / restock_food()
+_INVALID_TEXT_REPRESENTATION = "22P02"  # malformed value, e.g. a UUID
+_UNIQUE_VIOLATION = "23505"
+
+_USER_COLUMNS = "id, name, email, phone, role, created_at"
+
+
+def _api_error() -> type:
+    """postgrest's APIError, imported when an error is being handled.
+
+    Keeps supabase-py off the import path, so LAZY_INIT can defer it.
+    """
+    from postgrest.exceptions import APIError
+
+    return APIError
+
+
+async def _data(builder) -> list | dict:
+    """Execute *builder* on the sync or async client and return its data.
+
+    Raises ValueError for the errors PostgresRepository maps the same way.
+    """
+    try:
+        return (await maybe_await(builder.execute())).data
+    except _api_error() as exc:
+        if exc.code in (_RAISE_EXCEPTION, _INVALID_TEXT_REPRESENTATION):
+            raise ValueError(exc.message) from exc
+        raise
+
+
+class SupabaseRepository(Repository):
+    """Every call is one PostgREST request.
+
+    *client* is called for the supabase-py client on every query (normally
+    ``extensions.get_supabase``), so a re-initialised client is picked up.
+    Either ``supabase.Client`` or ``supabase.AsyncClient`` works.
+    """
+
+    name = "supabase"
+
+    def __init__(self, client):
+        self._client = client
+
+    # ── Users ───────────────────────────────────────────────────────
+    async def get_user_by_email(self, email):
+        rows = await _data(self._client().table("users").select(_USER_COLUMNS).eq("email", email))
+        return rows[0] if rows else None
+
+    async def create_user(self, data):
+        try:
+            return (await _data(self._client().table("users").insert(data)))[0]
+        except _api_error() as exc:
+            if exc.code == _UNIQUE_VIOLATION:
+                raise ValueError("Email already registered") from exc
+            raise
+
+    # ── Foods ───────────────────────────────────────────────────────
+    async def list_foods(self, category=None, available_only=True):
+        query = self._client().table("foods").select("*")
+        if available_only:
+            query = query.eq("is_available", True)
+        if category:
+            query = query.eq("category", category)
+        return await _data(query.order("name"))
+
+    async def get_foods(self, food_ids):
+        if not food_ids:
+            return []
+        return await _data(self._client().table("foods").select("*").in_("id", list(food_ids)))
+
+    async def create_food(self, data):
+        return (await _data(self._client().table("foods").insert(data)))[0]
+
+    async def update_food(self, food_id, data):
+        rows = await _data(self._client().table("foods").update(data).eq("id", food_id))
+        return rows[0] if rows else None
+
+    async def delete_food(self, food_id):
+        return bool(await _data(self._client().table("foods").delete().eq("id", food_id)))
+
+    async def insert_foods(self, rows):
+        return await _data(self._client().table("foods").insert(rows))
+
+    async def update_foods(self, rows):
+        return await _data(self._client().rpc("update_foods", {"p_rows": rows}))
+
+    async def restock_food(self, food_id, add=None, stock=None):
+        return await _data(self._client().rpc(
+            "restock_food", {"p_food_id": food_id, "p_add": add, "p_set": stock}
+        ))
+
+    # ── Orders ──────────────────────────────────────────────────────
+    async def place_order(self, user_id, items):
+        return await _data(
+            self._client().rpc("place_order", {"p_user_id": user_id, "p_items": items})
+        )
+
+    async def insert_order(self, data):
+        return (await _data(self._client().table("orders").insert(data)))[0]
+
+    async def insert_order_items(self, rows):
+        return await _data(self._client().table("order_items").insert(rows))
+
+    async def list_orders(self, *, user_id=None, status=None, after=None, limit=50, with_user=False):
+        select = "*, order_items(*), users(name, email, phone)" if with_user else "*, order_items(*)"
+        query = self._client().table("orders").select(select)
+        if user_id:
+            query = query.eq("user_id", user_id)
+        if status:
+            query = query.eq("status", status)
+        if after:
+            # Values were validated by the caller (timestamp + UUID)
+            created_at, order_id = after
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt.{order_id})'
+            )
+        return await _data(
+            query.order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+        )
+
+    async def update_order_status(self, order_id, new_status, from_statuses):
+        rows = await _data(
+            self._client().table("orders")
+            .update({"status": new_status})
+            .eq("id", order_id)
+            .in_("status", from_statuses)
+        )
+        return rows[0] if rows else None
+
+    async def update_order_statuses(self, moves):
+        # PostgREST cannot group writes into one transaction; each target
+        # status is its own atomic conditional UPDATE
+        updated = []
+        for new_status, (order_ids, from_statuses) in moves.items():
+            updated.extend(await _data(
+                self._client().table("orders")
+                .update({"status": new_status})
+                .in_("id", order_ids)
+                .in_("status", from_statuses)
+            ))
+        return updated
+
+    async def get_order_statuses(self, order_ids):
+        if not order_ids:
+            return {}
+        rows = await _data(self._client().table("orders").select("id, status").in_("id", order_ids))
+        return {row["id"]: row["status"] for row in rows}
+
+    async def order_stats(self, start, end, top=5, tz="UTC"):
+        return await _data(self._client().rpc(
+            "order_stats", {"p_from": start, "p_to": end, "p_top": top, "p_tz": tz}
+        ))
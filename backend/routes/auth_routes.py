@@ -1,17 +1,30 @@
-"""Authentication blueprint — register, login (send OTP), verify OTP."""
+"""Authentication blueprint — register, login (send OTP), verify OTP, logout/revoke, OTP delivery status."""
 
 from flask import Blueprint, request
+from flask_jwt_extended import get_jwt, jwt_required
 from marshmallow import ValidationError
 
-from models.schemas import RegisterSchema, LoginSchema, VerifyOtpSchema
-from services.auth_service import register_user, send_otp, send_admin_otp, verify_otp
+from models.schemas import RegisterSchema, LoginSchema, VerifyOtpSchema, RevokeSchema
+from services.auth_service import (
+    register_user,
+    send_otp,
+    send_admin_otp,
+    verify_otp,
+    get_otp_delivery_status,
+    logout_token,
+    revoke,
+)
+from utils.decorators import admin_required, rate_limited
+from utils.email import breaker_states
+from utils.email_dispatcher import get_email_dispatcher
+from utils.http_client import session_stats
 from utils.responses import success_response, error_response
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
 
 @auth_bp.route("/register", methods=["POST"])
-def register():
+async def register():
     """Register a new user."""
     schema = RegisterSchema()
     try:
@@ -20,7 +33,7 @@ def register():
         return error_response("Validation failed", 422, err.messages)
 
     try:
-        user = register_user(data)
+        user = await register_user(data)
         return success_response(user, "User registered successfully", 201)
     except ValueError as e:
         return error_response(str(e), 409)
@@ -29,7 +42,8 @@ def register():
 
 
 @auth_bp.route("/login", methods=["POST"])
-def login():
+@rate_limited("otp_send")
+async def login():
     """Send an OTP to the user's email (simulated)."""
     schema = LoginSchema()
     try:
@@ -38,12 +52,13 @@ def login():
         return error_response("Validation failed", 422, err.messages)
 
     try:
-        dev_otp = send_otp(data["email"])
-        payload = {"email": data["email"]}
+        result = await send_otp(data["email"])
+        payload = {"email": data["email"], **result}
         msg = "OTP sent to your email"
-        if dev_otp:
-            payload["dev_otp"] = dev_otp
+        if result.get("dev_otp"):
             msg = "Dev mode — use the OTP shown on screen"
+        elif result.get("resend_in"):
+            msg = "An OTP was sent moments ago — check your email"
         return success_response(payload, msg)
     except ValueError as e:
         return error_response(str(e), 404)
@@ -54,7 +69,8 @@ def login():
 
 
 @auth_bp.route("/admin-login", methods=["POST"])
-def admin_login():
+@rate_limited("otp_send")
+async def admin_login():
     """Send an OTP to an admin user's email."""
     schema = LoginSchema()
     try:
@@ -63,12 +79,13 @@ def admin_login():
         return error_response("Validation failed", 422, err.messages)
 
     try:
-        dev_otp = send_admin_otp(data["email"])
-        payload = {"email": data["email"]}
+        result = await send_admin_otp(data["email"])
+        payload = {"email": data["email"], **result}
         msg = "OTP sent to your admin email"
-        if dev_otp:
-            payload["dev_otp"] = dev_otp
+        if result.get("dev_otp"):
             msg = "Dev mode — use the OTP shown on screen"
+        elif result.get("resend_in"):
+            msg = "An OTP was sent moments ago — check your admin email"
         return success_response(payload, msg)
     except ValueError as e:
         return error_response(str(e), 404)
@@ -79,7 +96,8 @@ def admin_login():
 
 
 @auth_bp.route("/verify-otp", methods=["POST"])
-def verify():
+@rate_limited("otp_verify")
+async def verify():
     """Verify OTP and issue a JWT."""
     schema = VerifyOtpSchema()
     try:
@@ -88,9 +106,58 @@ def verify():
         return error_response("Validation failed", 422, err.messages)
 
     try:
-        token = verify_otp(data["email"], data["otp"])
+        token = await verify_otp(data["email"], data["otp"])
         return success_response({"access_token": token}, "Login successful")
     except ValueError as e:
         return error_response(str(e), 401)
     except Exception as e:
         return error_response(str(e), 500)
+
+
+@auth_bp.route("/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    """Revoke the token this request carries."""
+    logout_token(get_jwt())
+    return success_response(message="Logged out")
+
+
+@auth_bp.route("/revoke", methods=["POST"])
+@admin_required
+def revoke_tokens():
+    """Admin — revoke a token (``token``) or every current token of a user (``user_id``)."""
+    try:
+        data = RevokeSchema().load(request.get_json(force=True))
+    except ValidationError as err:
+        return error_response("Validation failed", 422, err.messages)
+    try:
+        return success_response(revoke(data.get("user_id"), data.get("token")), "Tokens revoked")
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+
+@auth_bp.route("/otp-delivery/<delivery_id>", methods=["GET"])
+def otp_delivery(delivery_id):
+    """Status of a queued OTP email (queued, sending, retrying, sent, failed)."""
+    try:
+        status = get_otp_delivery_status(delivery_id)
+        return success_response(status)
+    except ValueError as e:
+        return error_response(str(e), 404)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+@auth_bp.route("/email-health", methods=["GET"])
+@admin_required
+def email_health():
+    """Admin — email queue depth, provider circuit breakers and API latency."""
+    dispatcher = get_email_dispatcher()
+    return success_response(
+        {
+            "async": dispatcher is not None,
+            "queue": dispatcher.stats() if dispatcher else None,
+            "providers": breaker_states(),
+            "latency": session_stats(),
+        }
+    )
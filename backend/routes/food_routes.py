@@ -1,32 +1,52 @@
 """Food catalogue blueprint — CRUD for food items."""
 
-from flask import Blueprint, request
+from flask import Blueprint, make_response, request
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 
-from models.schemas import FoodCreateSchema, FoodUpdateSchema
-from services.food_service import get_all_foods, create_food, update_food, delete_food
+from models.schemas import FoodCreateSchema, FoodUpdateSchema, RestockSchema
+from services.food_service import FoodNotFoundError, get_menu, create_food, update_food, delete_food, restock_food
+from services.menu_import import import_foods, iter_csv_rows, iter_ndjson_rows
+from utils.compression import reuse_compressed
 from utils.decorators import admin_required
-from utils.responses import success_response, error_response
+from utils.responses import response_mimetype, success_response, error_response
+from utils.serializers import JSON_MIMETYPE
 
 food_bp = Blueprint("foods", __name__, url_prefix="/api/foods")
 
 
 @food_bp.route("", methods=["GET"])
-def list_foods():
-    """Public — list available food items. Admin sees all."""
+async def list_foods():
+    """Public — list available food items. Admin sees all.
+
+    Sends an ETag per representation (JSON or MessagePack; weak once
+    compressed); a matching ``If-None-Match`` gets an empty 304. The
+    compressed body is kept with the menu cache entry.
+    """
     category = request.args.get("category")
     show_all = request.args.get("all") == "true"
     try:
-        foods = get_all_foods(category=category, available_only=not show_all)
-        return success_response(foods)
+        menu = await get_menu(category=category, available_only=not show_all)
     except Exception as e:
         return error_response(str(e), 500)
 
+    mimetype = response_mimetype()
+    etag = menu["etag"] if mimetype == JSON_MIMETYPE else f"{menu['etag']}-{mimetype.rsplit('/', 1)[1]}"
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+        response.vary.add("Accept")
+    else:
+        response, status_code = success_response(menu["body"])
+        response.status_code = status_code
+        reuse_compressed(response, menu["compressed"])
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 
 @food_bp.route("", methods=["POST"])
 @admin_required
-def add_food():
+async def add_food():
     """Admin — create a new food item."""
     schema = FoodCreateSchema()
     try:
@@ -35,15 +55,51 @@ def add_food():
         return error_response("Validation failed", 422, err.messages)
 
     try:
-        food = create_food(data)
+        food = await create_food(data)
         return success_response(food, "Food item created", 201)
     except Exception as e:
         return error_response(str(e), 500)
 
 
+@food_bp.route("/import", methods=["POST"])
+@admin_required
+async def import_menu():
+    """Admin — bulk create/update food items from a CSV or NDJSON upload.
+
+    The body is either the raw file or a multipart ``file`` field. Rows
+    with an ``id`` update that item; the rest are created. The format
+    comes from ``?format=csv|ndjson`` or the Content-Type; ``?dry_run=true``
+    validates without writing.
+    """
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    content_type = (upload.mimetype if upload else request.mimetype) or ""
+    fmt = request.args.get("format")
+    if not fmt:
+        filename = (upload.filename or "") if upload else ""
+        is_ndjson = "ndjson" in content_type or "jsonl" in content_type or filename.endswith((".ndjson", ".jsonl"))
+        fmt = "ndjson" if is_ndjson else "csv"
+    if fmt not in ("csv", "ndjson"):
+        return error_response("format must be csv or ndjson", 400)
+
+    rows = iter_csv_rows(stream) if fmt == "csv" else iter_ndjson_rows(stream)
+    dry_run = request.args.get("dry_run") == "true"
+    try:
+        summary = await import_foods(rows, dry_run=dry_run)
+    except UnicodeDecodeError:
+        return error_response("Upload must be UTF-8 encoded", 400)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+    message = "Dry run complete" if dry_run else "Menu import complete"
+    return success_response(summary, message)
+
+
 @food_bp.route("/<food_id>", methods=["PUT"])
 @admin_required
-def edit_food(food_id):
+async def edit_food(food_id):
     """Admin — update a food item."""
     schema = FoodUpdateSchema()
     try:
@@ -55,7 +111,7 @@ def edit_food(food_id):
         return error_response("No fields to update", 400)
 
     try:
-        food = update_food(food_id, data)
+        food = await update_food(food_id, data)
         return success_response(food, "Food item updated")
     except ValueError as e:
         return error_response(str(e), 404)
@@ -63,12 +119,33 @@ def edit_food(food_id):
         return error_response(str(e), 500)
 
 
+@food_bp.route("/<food_id>/restock", methods=["POST"])
+@admin_required
+async def restock(food_id):
+    """Admin — add portions (``add``) or set the stock (``stock``; null stops tracking)."""
+    schema = RestockSchema()
+    try:
+        data = schema.load(request.get_json(force=True))
+    except ValidationError as err:
+        return error_response("Validation failed", 422, err.messages)
+
+    try:
+        food = await restock_food(food_id, add=data.get("add"), stock=data.get("stock"))
+        return success_response(food, "Stock updated")
+    except FoodNotFoundError as e:
+        return error_response(str(e), 404)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
 @food_bp.route("/<food_id>", methods=["DELETE"])
 @admin_required
-def remove_food(food_id):
+async def remove_food(food_id):
     """Admin — delete a food item."""
     try:
-        delete_food(food_id)
+        await delete_food(food_id)
         return success_response(message="Food item deleted")
     except ValueError as e:
         return error_response(str(e), 404)
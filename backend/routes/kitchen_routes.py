@@ -0,0 +1,40 @@
+"""Kitchen blueprint — prep queue totals and batches, batch completion."""
+
+from flask import Blueprint, request
+from marshmallow import ValidationError
+
+from models.schemas import KitchenBatchSchema
+from services.kitchen_queue import complete_batch, get_prep_queue
+from utils.decorators import admin_required
+from utils.responses import success_response, error_response
+
+kitchen_bp = Blueprint("kitchen", __name__, url_prefix="/api/kitchen")
+
+
+@kitchen_bp.route("/queue", methods=["GET"])
+@admin_required
+async def prep_queue():
+    """Admin — portions to cook per food across open orders, and FIFO batches."""
+    try:
+        return success_response(await get_prep_queue())
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+@kitchen_bp.route("/batches/complete", methods=["POST"])
+@admin_required
+async def finish_batch():
+    """Admin — mark a batch cooked; orders with nothing left to cook move to ``ready``."""
+    schema = KitchenBatchSchema()
+    try:
+        data = schema.load(request.get_json(force=True))
+    except ValidationError as err:
+        return error_response("Validation failed", 422, err.messages)
+
+    try:
+        result = await complete_batch(str(data["food_id"]), [str(oid) for oid in data["order_ids"]])
+        return success_response(result, f"{len(result['ready'])} order(s) ready")
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(str(e), 500)
@@ -0,0 +1,114 @@
+"""Operations blueprint — metrics, boot profile and tracing controls for monitoring."""
+
+import hmac
+
+from flask import Blueprint, Response, current_app, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from marshmallow import ValidationError
+
+from extensions import get_repository, jwt
+from models.schemas import TracingConfigSchema
+from services.food_service import menu_cache_stats
+from services.order_events import get_order_hub
+from utils.admission import get_admission_controller
+from utils.decorators import admin_required
+from utils.email_dispatcher import get_email_dispatcher
+from utils.metrics import compression_ratio, render_prometheus
+from utils.responses import success_response, error_response
+from utils.tracing import get_tracer
+
+ops_bp = Blueprint("ops", __name__, url_prefix="/api")
+
+
+def _metrics_token_error():
+    """Error response unless the request carries METRICS_TOKEN, or an admin token when none is set."""
+    token = current_app.config.get("METRICS_TOKEN", "")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, token):
+            return error_response("Invalid metrics token", 401)
+        return None
+    verify_jwt_in_request()
+    if get_jwt().get("role") != "admin":
+        return error_response("Admin access required", 403)
+    return None
+
+
+@ops_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint (bearer METRICS_TOKEN, or an admin token when none is set)."""
+    if not current_app.config.get("METRICS_ENABLED", True):
+        return error_response("Metrics are disabled", 404)
+    denied = _metrics_token_error()
+    if denied:
+        return denied
+
+    dispatcher = get_email_dispatcher()
+    hub = get_order_hub().stats()
+    pool = get_repository().stats()
+    claims_cache = jwt.claims_cache.stats() if jwt.claims_cache is not None else {}
+    gauges = {
+        "menu_cache_entries": ("Menu listings currently cached.", menu_cache_stats()["entries"]),
+        "sse_active_streams": ("Open live order streams.", hub["active_streams"]),
+        "email_queue_depth": ("OTP emails waiting for a worker.",
+                              dispatcher.stats()["queue_depth"] if dispatcher else None),
+        "db_pool_connections": ("Open connections in the Postgres pool.", pool.get("size")),
+        "db_pool_available": ("Idle connections in the Postgres pool.", pool.get("available")),
+        "db_pool_waiting": ("Requests waiting for a pooled connection.", pool.get("waiting")),
+        "http_compression_ratio": ("Compressed / original bytes over all compressed responses.",
+                                   compression_ratio()),
+        "jwt_claims_cache_entries": ("Verified tokens in the claims cache.", claims_cache.get("entries")),
+        "jwt_claims_cache_hit_ratio": ("Claims cache hits / lookups since start.", claims_cache.get("hit_ratio")),
+        "boot_seconds": ("Time this worker spent starting up (see /api/boot).",
+                         round(current_app.boot_profile.total_seconds(), 4)),
+    }
+    return Response(render_prometheus(gauges), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@ops_bp.route("/boot", methods=["GET"])
+def boot_profile():
+    """Per-phase startup timings of this worker (same token as /api/metrics)."""
+    denied = _metrics_token_error()
+    if denied:
+        return denied
+    return success_response(current_app.boot_profile.report())
+
+
+@ops_bp.route("/admission", methods=["GET"])
+@admin_required
+def admission_status():
+    """Admin — slots in use, queue depths, average slot time and rejections per endpoint class (this worker)."""
+    controller = get_admission_controller()
+    if controller is None:
+        return success_response({"enabled": False})
+    return success_response({"enabled": True, **controller.stats()})
+
+
+@ops_bp.route("/tracing", methods=["GET"])
+@admin_required
+def tracing_status():
+    """Admin — tracing settings plus summaries of recent traces (this worker)."""
+    tracer = get_tracer()
+    limit = request.args.get("limit", 20, type=int)
+    return success_response(tracer.recent(max(1, min(limit, 50))), meta=tracer.state())
+
+
+@ops_bp.route("/tracing", methods=["PUT"])
+@admin_required
+def configure_tracing():
+    """Admin — switch tracing on/off or change thresholds at runtime (this worker)."""
+    try:
+        data = TracingConfigSchema().load(request.get_json(force=True))
+    except ValidationError as err:
+        return error_response("Validation failed", 422, err.messages)
+    return success_response(get_tracer().configure(**data), "Tracing updated")
+
+
+@ops_bp.route("/tracing/<trace_id>", methods=["GET"])
+@admin_required
+def get_trace(trace_id):
+    """Admin — full span trees recorded under a recent trace id."""
+    records = get_tracer().get(trace_id)
+    if not records:
+        return error_response("Trace not found (only recent traces are kept)", 404)
+    return success_response(records)
@@ -1,17 +1,24 @@
-"""Order blueprint — create orders, list orders, update status."""
+"""Order blueprint — create orders, list orders, dashboard stats, update status, live stream."""
 
-from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
+import time
+
+from flask import Blueprint, Response, current_app, request, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from marshmallow import ValidationError
 
-from models.schemas import OrderCreateSchema, OrderStatusUpdateSchema
+from models.schemas import OrderCreateSchema, OrderStatusUpdateSchema, OrderBulkStatusSchema
 from services.order_service import (
+    OrderConflictError,
     place_order,
     get_user_orders,
     get_all_orders,
     update_order_status,
+    bulk_update_order_status,
 )
-from utils.decorators import admin_required
+from services.order_events import get_order_hub
+from services.stats_service import get_order_stats
+from utils.decorators import admin_required, idempotent
 from utils.responses import success_response, error_response
 
 order_bp = Blueprint("orders", __name__, url_prefix="/api/orders")
@@ -19,8 +26,9 @@ order_bp = Blueprint("orders", __name__, url_prefix="/api/orders")
 
 @order_bp.route("", methods=["POST"])
 @jwt_required()
-def create_order():
-    """Authenticated user — place a new order."""
+@idempotent("orders")
+async def create_order():
+    """Authenticated user — place a new order (retries with the same Idempotency-Key are replayed)."""
     schema = OrderCreateSchema()
     try:
         data = schema.load(request.get_json(force=True))
@@ -30,7 +38,7 @@ def create_order():
     user_id = get_jwt_identity()
 
     try:
-        order = place_order(user_id, data["items"])
+        order = await place_order(user_id, data["items"])
         return success_response(order, "Order placed successfully", 201)
     except ValueError as e:
         return error_response(str(e), 400)
@@ -38,33 +46,64 @@ def create_order():
         return error_response(str(e), 500)
 
 
+def _page_args() -> tuple[str | None, int]:
+    """Read ``?cursor=`` and ``?limit=`` (capped by the service)."""
+    return request.args.get("cursor") or None, request.args.get("limit", type=int)
+
+
 @order_bp.route("/user", methods=["GET"])
 @jwt_required()
-def user_orders():
-    """Authenticated user — list own orders."""
+async def user_orders():
+    """Authenticated user — list own orders, newest first, one page at a time."""
     user_id = get_jwt_identity()
+    cursor, limit = _page_args()
     try:
-        orders = get_user_orders(user_id)
-        return success_response(orders)
+        orders, next_cursor = await get_user_orders(user_id, cursor=cursor, limit=limit)
+        return success_response(orders, meta={"next_cursor": next_cursor})
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
 
 @order_bp.route("/admin", methods=["GET"])
 @admin_required
-def admin_orders():
-    """Admin — list all orders, optionally filtered by status."""
+async def admin_orders():
+    """Admin — list all orders one page at a time, optionally filtered by status."""
     status = request.args.get("status")
+    cursor, limit = _page_args()
     try:
-        orders = get_all_orders(status=status)
-        return success_response(orders)
+        orders, next_cursor = await get_all_orders(status=status, cursor=cursor, limit=limit)
+        return success_response(orders, meta={"next_cursor": next_cursor})
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+@order_bp.route("/stats", methods=["GET"])
+@admin_required
+async def order_stats():
+    """Admin — dashboard aggregates for ``?days=N`` or ``?from=&to=`` (dates), top ``?top=N`` foods."""
+    try:
+        stats = await get_order_stats(
+            days=request.args.get("days", type=int),
+            start=request.args.get("from"),
+            end=request.args.get("to"),
+            top=request.args.get("top", type=int),
+        )
+        return success_response(stats)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except RuntimeError as e:
+        return error_response(str(e), 503)
     except Exception as e:
         return error_response(str(e), 500)
 
 
 @order_bp.route("/<order_id>", methods=["PATCH"])
 @admin_required
-def change_order_status(order_id):
+async def change_order_status(order_id):
     """Admin — update order status with transition validation."""
     schema = OrderStatusUpdateSchema()
     try:
@@ -73,9 +112,80 @@ def change_order_status(order_id):
         return error_response("Validation failed", 422, err.messages)
 
     try:
-        order = update_order_status(order_id, data["status"])
+        order = await update_order_status(order_id, data["status"])
         return success_response(order, "Order status updated")
+    except OrderConflictError as e:
+        return error_response(str(e), 409, {"current_status": e.current_status})
     except ValueError as e:
         return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
+
+
+@order_bp.route("/bulk-status", methods=["PATCH"])
+@admin_required
+async def bulk_change_order_status():
+    """Admin — move many orders at once; reports success/failure per item."""
+    schema = OrderBulkStatusSchema()
+    try:
+        data = schema.load(request.get_json(force=True))
+    except ValidationError as err:
+        return error_response("Validation failed", 422, err.messages)
+
+    try:
+        results = await bulk_update_order_status(data["updates"])
+    except Exception as e:
+        return error_response(str(e), 500)
+    applied = sum(1 for r in results if r["ok"])
+    return success_response(
+        results,
+        f"Updated {applied} of {len(results)} orders",
+        meta={"applied": applied, "failed": len(results) - applied},
+    )
+
+
+@order_bp.route("/stream", methods=["GET"])
+@jwt_required(locations=["headers", "query_string"])
+def order_stream():
+    """Server-Sent Events — live order deltas (admins: all, users: own).
+
+    EventSource cannot set headers, so the JWT may also be passed as
+    ``?jwt=<token>``. Resumes after ``Last-Event-ID``; if those events are
+    gone a ``reset`` event tells the client to re-fetch its list.
+    """
+    hub = get_order_hub()
+    if not hub.try_open_stream():
+        resp, status_code = error_response("Too many live streams, retry shortly", 503)
+        resp.headers["Retry-After"] = "10"
+        return resp, status_code
+
+    is_admin = get_jwt().get("role") == "admin"
+    user_id = get_jwt_identity()
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    cfg = current_app.config
+    heartbeat = cfg.get("SSE_HEARTBEAT_SECONDS", 15)
+    max_duration = cfg.get("SSE_MAX_STREAM_SECONDS", 300)
+
+    def events():
+        after, replay_ok = hub.resolve(last_event_id)
+        yield "retry: 3000\n\n"
+        if not replay_ok:
+            yield f"event: reset\ndata: {json.dumps({'reason': 'replay unavailable'})}\n\n"
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            batch = hub.wait_for_events(after, timeout=heartbeat)
+            if not batch:
+                yield ": ping\n\n"
+                continue
+            for seq, event in batch:
+                after = seq
+                if is_admin or event["user_id"] == user_id:
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        # Ending the stream makes EventSource reconnect with Last-Event-ID,
+        # which frees this thread for other requests periodically.
+
+    resp = Response(stream_with_context(events()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    resp.call_on_close(hub.close_stream)
+    return resp
@@ -1,19 +1,21 @@
 """Authentication service — OTP generation, verification, JWT issuing."""
 
+import math
 import random
 import string
-from datetime import datetime, timedelta
+import time
 
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, decode_token
 
 from flask import current_app
 
-from extensions import get_supabase
-from utils.email import send_otp_email
-
-# In-memory OTP store: { email: { otp, expires_at } }
-_otp_store: dict = {}
+from extensions import get_repository, get_otp_store, get_revocations
+from utils.aio import serving_asgi
+from utils.email import send_otp_email, send_otp_email_async
+from utils.email_dispatcher import get_email_dispatcher
+from utils.tracing import traced
 
+# OTP records live in the configured TTL store: { "otp:<email>": { otp, issued_at } }
 OTP_EXPIRY_MINUTES = 5
 DEV_OTP_CODE = "000000"  # hardcoded dev OTP for quick login
 
@@ -23,103 +25,140 @@ def _generate_otp(length: int = 6) -> str:
 
 
 # ── Register ────────────────────────────────────────────────────────
-def register_user(data: dict) -> dict:
+@traced
+async def register_user(data: dict) -> dict:
     """Insert a new user into the users table and return the row."""
-    # Check duplicate email
-    existing = (
-        get_supabase().table("users")
-        .select("id")
-        .eq("email", data["email"])
-        .execute()
-    )
-    if existing.data:
+    # Check duplicate email (the insert also fails on the unique index)
+    if await get_repository().get_user_by_email(data["email"]):
         raise ValueError("Email already registered")
 
-    result = get_supabase().table("users").insert(data).execute()
-    return result.data[0]
+    return await get_repository().create_user(data)
 
 
 # ── Send OTP (login) ────────────────────────────────────────────────
-def send_otp(email: str) -> str:
-    """Generate an OTP for the given email and store it in memory."""
+@traced
+async def send_otp(email: str) -> dict:
+    """Generate an OTP for the given email, store it and send it."""
     # Verify user exists
-    user = (
-        get_supabase().table("users")
-        .select("id, email, role")
-        .eq("email", email)
-        .execute()
-    )
-    if not user.data:
+    if not await get_repository().get_user_by_email(email):
         raise ValueError("User not found")
 
-    return _generate_and_store_otp(email)
+    return await _generate_and_store_otp(email)
 
 
-def send_admin_otp(email: str) -> str:
+@traced
+async def send_admin_otp(email: str) -> dict:
     """Generate an OTP only if the email belongs to an admin."""
-    user = (
-        get_supabase().table("users")
-        .select("id, email, role")
-        .eq("email", email)
-        .execute()
-    )
-    if not user.data:
+    user = await get_repository().get_user_by_email(email)
+    if not user:
         raise ValueError("User not found")
-    if user.data[0].get("role") != "admin":
+    if user.get("role") != "admin":
         raise ValueError("This account does not have admin privileges")
 
-    return _generate_and_store_otp(email)
+    return await _generate_and_store_otp(email)
+
 
+@traced
+async def _generate_and_store_otp(email: str) -> dict:
+    """Internal: generate OTP, store it, and email it.
 
-def _generate_and_store_otp(email: str) -> str:
-    """Internal: generate OTP, store it, and email it."""
+    Returns extra fields for the response: ``dev_otp`` in dev mode,
+    ``delivery_id`` when the email was queued for background delivery, or
+    ``resend_in`` (seconds) when a code issued less than
+    OTP_RESEND_COOLDOWN_SECONDS ago is still valid and nothing was sent.
+    """
     # Dev mode: skip email, use hardcoded OTP "000000"
     if current_app.config.get("DEV_OTP"):
-        _otp_store[email] = {
-            "otp": DEV_OTP_CODE,
-            "expires_at": datetime.utcnow() + timedelta(minutes=OTP_EXPIRY_MINUTES),
-        }
+        _store_otp(email, DEV_OTP_CODE)
         current_app.logger.info("[DEV] OTP for %s: %s", email, DEV_OTP_CODE)
-        return DEV_OTP_CODE  # return the code so the route can expose it
+        return {"dev_otp": DEV_OTP_CODE}  # return the code so the route can expose it
 
     otp = _generate_otp()
-    _otp_store[email] = {
-        "otp": otp,
-        "expires_at": datetime.utcnow() + timedelta(minutes=OTP_EXPIRY_MINUTES),
-    }
-    # Send OTP via email
-    send_otp_email(email, otp)
-    return None  # no dev OTP to expose
+    wait = _store_otp_unless_recent(email, otp, current_app.config.get("OTP_RESEND_COOLDOWN_SECONDS", 0))
+    if wait > 0:
+        return {"resend_in": math.ceil(wait)}
+
+    dispatcher = get_email_dispatcher()
+    if dispatcher is not None:
+        return {"delivery_id": dispatcher.submit(email, otp)}
+
+    # Inline fallback (EMAIL_ASYNC=false); awaits the async clients under ASGI
+    if serving_asgi():
+        await send_otp_email_async(email, otp)
+    else:
+        send_otp_email(email, otp)
+    return {}
+
+
+@traced
+def get_otp_delivery_status(delivery_id: str) -> dict:
+    """Return the background delivery status for *delivery_id*."""
+    dispatcher = get_email_dispatcher()
+    status = dispatcher.get_status(delivery_id) if dispatcher else None
+    if status is None:
+        raise ValueError("Unknown or expired delivery id")
+    return status
+
+
+def _otp_key(email: str) -> str:
+    return f"otp:{email.lower()}"
+
+
+@traced
+def _store_otp(email: str, otp: str) -> None:
+    """Save *otp* for *email*, replacing any earlier code; expires on its own."""
+    get_otp_store().set(
+        _otp_key(email),
+        {"otp": otp, "issued_at": time.time()},
+        ttl=OTP_EXPIRY_MINUTES * 60,
+    )
+
+
+def _store_otp_unless_recent(email: str, otp: str, cooldown: float) -> float:
+    """Save *otp* unless the current code is younger than *cooldown* seconds.
+
+    Returns 0 when *otp* was stored, else the seconds left on the cooldown.
+    Atomic in the store, so a double-submitted login sends one email. A
+    kept code's expiry moves forward by at most *cooldown*.
+    """
+    outcome = {"wait": 0.0}
+
+    def issue(record):
+        now = time.time()
+        if record is not None and cooldown > 0:
+            wait = record["issued_at"] + cooldown - now
+            if wait > 0:
+                outcome["wait"] = wait
+                return record
+        return {"otp": otp, "issued_at": now}
+
+    get_otp_store().update(_otp_key(email), issue, ttl=OTP_EXPIRY_MINUTES * 60)
+    return outcome["wait"]
 
 
 # ── Verify OTP ──────────────────────────────────────────────────────
-def verify_otp(email: str, otp: str) -> str:
+@traced
+async def verify_otp(email: str, otp: str) -> str:
     """Verify the OTP and return a JWT access token on success."""
-    record = _otp_store.get(email)
-    if not record:
-        raise ValueError("OTP not requested or expired")
+    outcome = {}
 
-    if datetime.utcnow() > record["expires_at"]:
-        _otp_store.pop(email, None)
-        raise ValueError("OTP expired")
+    def check(record):
+        # Runs atomically in the store: consume on match, keep otherwise
+        outcome["found"] = record is not None
+        outcome["matched"] = record is not None and record["otp"] == otp
+        return None if outcome["matched"] else record
 
-    if record["otp"] != otp:
+    get_otp_store().update(_otp_key(email), check)
+    if not outcome["found"]:
+        raise ValueError("OTP not requested or expired")
+    if not outcome["matched"]:
         raise ValueError("Invalid OTP")
 
-    # OTP valid — remove it
-    _otp_store.pop(email, None)
-
     # Fetch user for JWT claims
-    user = (
-        get_supabase().table("users")
-        .select("id, name, email, role")
-        .eq("email", email)
-        .execute()
-    )
-    if not user.data:
+    user_data = await get_repository().get_user_by_email(email)
+    if not user_data:
         raise ValueError("User not found")
 
-    user_data = user.data[0]
     token = create_access_token(
         identity=user_data["id"],
         additional_claims={
@@ -129,3 +168,25 @@ def verify_otp(email: str, otp: str) -> str:
         },
     )
     return token
+
+
+# ── Logout / revoke ─────────────────────────────────────────────────
+def logout_token(claims: dict) -> None:
+    """Revoke the token the request was made with."""
+    get_revocations().revoke_token(claims["jti"], claims["exp"])
+
+
+def revoke(user_id: str | None = None, token: str | None = None) -> dict:
+    """Admin — revoke one token, or every token issued to *user_id* so far."""
+    revoked = {}
+    if token:
+        try:
+            claims = decode_token(token, allow_expired=True)
+        except Exception as exc:
+            raise ValueError(f"Invalid token: {exc}") from exc
+        get_revocations().revoke_token(claims["jti"], claims["exp"])
+        revoked["jti"] = claims["jti"]
+    if user_id:
+        get_revocations().revoke_user(user_id)
+        revoked["user_id"] = user_id
+    return revoked
@@ -1,42 +1,110 @@
 """Food catalogue service."""
 
-from extensions import get_supabase
+import hashlib
+import json
+import uuid
 
+from extensions import get_repository
+from utils.cache import TTLCache
+from utils.serializers import Serialized
+from utils.tracing import traced
 
-def get_all_foods(category: str | None = None, available_only: bool = True) -> list:
+# Per-process menu cache: { (category, available_only): {data, body, etag, compressed} }
+MENU_CACHE_TTL_SECONDS = 30
+MENU_CACHE_MAX_ENTRIES = 64
+_menu_cache = TTLCache(maxsize=MENU_CACHE_MAX_ENTRIES, ttl=MENU_CACHE_TTL_SECONDS)
+
+
+class FoodNotFoundError(ValueError):
+    """No food item has the given id."""
+
+    def __init__(self):
+        super().__init__("Food item not found")
+
+
+def _compute_etag(foods: list) -> str:
+    """Strong validator derived from the canonical JSON of the menu."""
+    canonical = json.dumps(foods, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+@traced
+async def _fetch_foods(category: str | None, available_only: bool) -> list:
+    return await get_repository().list_foods(category, available_only)
+
+
+@traced
+async def get_menu(category: str | None = None, available_only: bool = True) -> dict:
+    """Return the cached menu entry ``{"data": [...], "body": Serialized, "etag": str, "compressed": {}}``.
+
+    Served from the per-process cache when fresh; otherwise loaded from
+    the database and cached for ``MENU_CACHE_TTL_SECONDS``. ``body`` keeps
+    the encoded list per media type and ``compressed`` the compressed
+    response bodies, so cache hits are neither re-encoded nor recompressed.
+    """
+    key = (category or None, bool(available_only))
+
+    async def load() -> dict:
+        foods = await _fetch_foods(category, available_only)
+        return {"data": foods, "body": Serialized(foods), "etag": _compute_etag(foods), "compressed": {}}
+
+    return await _menu_cache.get_or_load_async(key, load)
+
+
+def invalidate_menu_cache() -> None:
+    """Drop every cached menu (call after any write to ``foods``)."""
+    _menu_cache.clear()
+
+
+def menu_cache_stats() -> dict:
+    """Entry count and hit/miss counters of this process's menu cache."""
+    return {"entries": len(_menu_cache), "hits": _menu_cache.hits, "misses": _menu_cache.misses}
+
+
+async def get_all_foods(category: str | None = None, available_only: bool = True) -> list:
     """Return food items, optionally filtered by category and availability."""
-    query = get_supabase().table("foods").select("*")
-    if available_only:
-        query = query.eq("is_available", True)
-    if category:
-        query = query.eq("category", category)
-    result = query.order("name").execute()
-    return result.data
+    return (await get_menu(category, available_only))["data"]
 
 
-def create_food(data: dict) -> dict:
+@traced
+async def create_food(data: dict) -> dict:
     """Insert a new food item (admin only)."""
-    result = get_supabase().table("foods").insert(data).execute()
-    return result.data[0]
+    food = await get_repository().create_food(data)
+    invalidate_menu_cache()
+    return food
 
 
-def update_food(food_id: str, data: dict) -> dict:
+@traced
+async def update_food(food_id: str, data: dict) -> dict:
     """Update an existing food item (admin only)."""
-    # Verify existence
-    existing = get_supabase().table("foods").select("id").eq("id", food_id).execute()
-    if not existing.data:
-        raise ValueError("Food item not found")
+    food = await get_repository().update_food(food_id, data)
+    if food is None:
+        raise FoodNotFoundError()
+    invalidate_menu_cache()
+    return food
 
-    result = (
-        get_supabase().table("foods").update(data).eq("id", food_id).execute()
-    )
-    return result.data[0]
 
+@traced
+async def restock_food(food_id: str, add: int | None = None, stock: int | None = None) -> dict:
+    """Add *add* portions, or set the stock to *stock* (None stops tracking), atomically.
 
-def delete_food(food_id: str) -> None:
-    """Delete a food item (admin only)."""
-    existing = get_supabase().table("foods").select("id").eq("id", food_id).execute()
-    if not existing.data:
-        raise ValueError("Food item not found")
+    Stock left makes the item available again, a stock of 0 unavailable.
+    Raises FoodNotFoundError, or ValueError for a malformed id or change.
+    """
+    try:
+        food_id = str(uuid.UUID(food_id))
+    except ValueError:
+        raise ValueError("Invalid food id")
+    food = await get_repository().restock_food(food_id, add=add, stock=stock)
+    if not food:
+        raise FoodNotFoundError()
+    invalidate_menu_cache()
+    return food
 
-    get_supabase().table("foods").delete().eq("id", food_id).execute()
+
+@traced
+async def delete_food(food_id: str) -> None:
+    """Delete a food item (admin only)."""
+    if not await get_repository().delete_food(food_id):
+        raise FoodNotFoundError()
+    invalidate_menu_cache()
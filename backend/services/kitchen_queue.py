@@ -0,0 +1,251 @@
+"""Kitchen prep queue — open order lines summed per food and cut into batches.
+
+The queue holds this process's view of the ``pending`` and ``preparing``
+orders with their uncooked lines, and per-food totals that are kept up to
+date as order events arrive (``order_events.add_order_listener``): a new
+order adds its lines, a status change moves or drops them. The database
+is read only on first use and every KITCHEN_QUEUE_RESYNC_SECONDS after
+that, which also picks up orders placed through other workers.
+
+Batches are cut per food in FIFO order (oldest order first), at most
+KITCHEN_BATCH_SIZE portions each; an order line is never split, so a
+larger line makes a batch of its own. Completing a batch marks its lines
+cooked in a TTL store (shared when OTP_STORE_BACKEND=sqlite); an order
+whose last uncooked line it was is moved to ``ready`` along
+``VALID_TRANSITIONS`` instead, and that line stays queued until the move
+succeeds, so a failed move is retried by completing the batch again.
+"""
+
+import threading
+import time
+
+from extensions import get_repository
+from services.food_service import get_all_foods
+from services.order_events import ORDER_CREATED, add_order_listener
+from services.order_service import MAX_PAGE_SIZE, advance_orders
+from utils.tracing import traced
+from utils.ttl_store import MemoryTTLStore, TTLStore
+
+OPEN_STATUSES = ("pending", "preparing")
+COOKED_TTL_SECONDS = 12 * 3600  # cooked-line marks outlive any open order
+
+
+class KitchenQueue:
+    """Open orders (oldest first) with their uncooked lines, and running totals per food."""
+
+    def __init__(self, batch_size: int = 10, resync_seconds: float = 30.0,
+                 cooked_store: TTLStore | None = None):
+        self.batch_size = max(1, batch_size)
+        self.resync_seconds = resync_seconds
+        self.cooked_store = cooked_store or MemoryTTLStore()
+        # order_id -> {"id", "created_at", "status", "lines": {food_id: quantity}}
+        self._orders: dict[str, dict] = {}
+        self._totals: dict[str, dict[str, int]] = {}  # food_id -> {status: quantity}
+        self._lock = threading.Lock()
+        self._synced_at: float | None = None
+        self._replays: list[list] = []  # per resync in progress: events seen while it reads
+
+    # ── Incremental updates ─────────────────────────────────────────
+    def _count(self, order: dict, sign: int) -> None:
+        for food_id, quantity in order["lines"].items():
+            totals = self._totals.setdefault(food_id, {status: 0 for status in OPEN_STATUSES})
+            totals[order["status"]] += sign * quantity
+            if not any(totals.values()):
+                del self._totals[food_id]
+
+    def _add(self, order: dict) -> None:
+        if order["id"] in self._orders or order["status"] not in OPEN_STATUSES or not order["lines"]:
+            return
+        self._orders[order["id"]] = order
+        self._count(order, +1)
+
+    def _apply(self, event_type: str, row: dict) -> None:
+        order = self._orders.get(row.get("id"))
+        if order is None:
+            if event_type == ORDER_CREATED and row.get("items") is not None:
+                self._add(_open_order(row, row["items"]))
+            return
+        if row.get("status") == order["status"]:
+            return
+        self._count(order, -1)
+        if row.get("status") in OPEN_STATUSES:
+            order["status"] = row["status"]
+            self._count(order, +1)
+        else:
+            del self._orders[order["id"]]
+
+    def on_order_event(self, event_type: str, row: dict) -> None:
+        with self._lock:
+            self._apply(event_type, row)
+            for replay in self._replays:
+                replay.append((event_type, row))
+
+    # ── Full reads ──────────────────────────────────────────────────
+    def stale(self) -> bool:
+        return self._synced_at is None or time.monotonic() - self._synced_at >= self.resync_seconds
+
+    async def resync(self) -> None:
+        """Rebuild from the open orders in the database; events meanwhile are replayed on top."""
+        replay: list = []
+        with self._lock:
+            self._replays.append(replay)
+        try:
+            rows = []
+            for status in OPEN_STATUSES:
+                rows.extend(await _fetch_open_orders(status))
+            rows.sort(key=lambda row: (row["created_at"], row["id"]))
+            orders = []
+            for row in rows:
+                order = _open_order(row, row.get("order_items") or [])
+                for food_id in self.cooked_store.get(f"cooked:{order['id']}") or ():
+                    order["lines"].pop(food_id, None)
+                orders.append(order)
+        except BaseException:
+            with self._lock:
+                self._replays.remove(replay)
+            raise
+        with self._lock:
+            self._replays.remove(replay)
+            self._orders, self._totals = {}, {}
+            for order in orders:
+                self._add(order)
+            for event_type, row in replay:
+                self._apply(event_type, row)
+            self._synced_at = time.monotonic()
+
+    def knows(self, order_ids: list[str]) -> bool:
+        with self._lock:
+            return all(order_id in self._orders for order_id in order_ids)
+
+    # ── Views ───────────────────────────────────────────────────────
+    def snapshot(self, names: dict[str, str]) -> dict:
+        """Totals per food (largest first) and the FIFO batches to cook next."""
+        with self._lock:
+            orders = list(self._orders.values())
+            totals = {food_id: dict(counts) for food_id, counts in self._totals.items()}
+        batches: list[dict] = []
+        open_batch: dict[str, dict] = {}  # food_id -> batch being filled
+        for order in orders:
+            for food_id, quantity in order["lines"].items():
+                batch = open_batch.get(food_id)
+                if batch is None or batch["quantity"] + quantity > self.batch_size:
+                    batch = {"food_id": food_id, "name": names.get(food_id), "quantity": 0,
+                             "order_ids": [], "oldest_at": order["created_at"]}
+                    batches.append(batch)
+                    open_batch[food_id] = batch
+                batch["quantity"] += quantity
+                batch["order_ids"].append(order["id"])
+        return {
+            "open_orders": len(orders),
+            "batch_size": self.batch_size,
+            "totals": sorted(
+                ({"food_id": food_id, "name": names.get(food_id), **counts, "total": sum(counts.values())}
+                 for food_id, counts in totals.items()),
+                key=lambda row: (-row["total"], row["name"] or ""),
+            ),
+            "batches": batches,
+        }
+
+    # ── Cooking ─────────────────────────────────────────────────────
+    def mark_cooked(self, food_id: str, order_ids: list[str]) -> dict:
+        """Mark *food_id*'s line cooked in each order that still waits on other foods.
+
+        Orders whose last uncooked line it is are reported as ``cooked``
+        and left as they are: they leave the queue once moved to ``ready``.
+        """
+        cooked, waiting, unknown = {}, [], []
+        with self._lock:
+            for order_id in dict.fromkeys(order_ids):
+                order = self._orders.get(order_id)
+                if order is None or food_id not in order["lines"]:
+                    unknown.append(order_id)
+                elif len(order["lines"]) == 1:
+                    cooked[order_id] = order["status"]
+                else:
+                    self._count(order, -1)
+                    del order["lines"][food_id]
+                    self._count(order, +1)
+                    waiting.append(order_id)
+        for order_id in waiting:
+            self.cooked_store.update(
+                f"cooked:{order_id}", lambda done: sorted({*(done or ()), food_id}), ttl=COOKED_TTL_SECONDS,
+            )
+        return {"cooked": cooked, "waiting": waiting, "unknown": unknown}
+
+
+def _open_order(row: dict, items: list[dict]) -> dict:
+    lines: dict[str, int] = {}
+    for item in items:
+        lines[item["food_id"]] = lines.get(item["food_id"], 0) + item["quantity"]
+    return {"id": row["id"], "created_at": row["created_at"], "status": row["status"], "lines": lines}
+
+
+@traced
+async def _fetch_open_orders(status: str) -> list[dict]:
+    """Every order in *status* with its items, a keyset page at a time."""
+    rows, after = [], None
+    while True:
+        page = await get_repository().list_orders(status=status, after=after, limit=MAX_PAGE_SIZE)
+        rows.extend(page)
+        if len(page) < MAX_PAGE_SIZE:
+            return rows
+        after = (page[-1]["created_at"], page[-1]["id"])
+
+
+_queue: KitchenQueue | None = None
+
+
+def _on_order_event(event_type: str, order: dict) -> None:
+    if _queue is not None:
+        _queue.on_order_event(event_type, order)
+
+
+def init_kitchen_queue(app, cooked_store: TTLStore | None = None) -> KitchenQueue:
+    """Create the queue from KITCHEN_* settings and subscribe it to order events."""
+    global _queue
+    cfg = app.config
+    _queue = KitchenQueue(
+        batch_size=cfg.get("KITCHEN_BATCH_SIZE", 10),
+        resync_seconds=cfg.get("KITCHEN_QUEUE_RESYNC_SECONDS", 30.0),
+        cooked_store=cooked_store,
+    )
+    add_order_listener(_on_order_event)
+    return _queue
+
+
+def get_kitchen_queue() -> KitchenQueue | None:
+    return _queue
+
+
+async def _food_names() -> dict[str, str]:
+    return {food["id"]: food["name"] for food in await get_all_foods(available_only=False)}
+
+
+@traced
+async def get_prep_queue() -> dict:
+    """Totals per food across open orders and the suggested batches, oldest first."""
+    queue = get_kitchen_queue()
+    if queue.stale():
+        await queue.resync()
+    return queue.snapshot(await _food_names())
+
+
+@traced
+async def complete_batch(food_id: str, order_ids: list[str]) -> dict:
+    """Mark a cooked batch; every order it finishes is moved to ``ready`` in one call per step.
+
+    Returns ``{food_id, ready, waiting, unknown}``: orders moved to
+    ``ready``, orders still waiting on other foods, and ids that are not
+    open or have no uncooked *food_id* line.
+    """
+    queue = get_kitchen_queue()
+    if queue.stale() or not queue.knows(order_ids):
+        await queue.resync()
+    marked = queue.mark_cooked(food_id, order_ids)
+    ready = await advance_orders(marked["cooked"], "ready") if marked["cooked"] else []
+    return {
+        "food_id": food_id,
+        "ready": [row["id"] for row in ready],
+        "waiting": marked["waiting"],
+        "unknown": marked["unknown"],
+    }
@@ -0,0 +1,204 @@
+"""Bulk menu import — stream CSV/NDJSON rows into ``foods`` in batches.
+
+Rows with an ``id`` update that food item (validated with
+FoodUpdateSchema) and change only the columns they name — never stock,
+which orders and restocks keep; rows without one create a new item
+(FoodCreateSchema). Each batch costs at most three database calls
+(existence check for updates, one ``update_foods()`` call, one insert)
+instead of two calls per item, and the menu cache is invalidated once at
+the end. The upload is parsed in full (at most MAX_IMPORT_ROWS rows)
+before the first batch is written, so an oversized or undecodable file
+writes nothing.
+"""
+
+import csv
+import itertools
+import json
+import uuid
+
+from marshmallow import ValidationError
+
+from extensions import get_repository
+from models.schemas import FoodCreateSchema, FoodUpdateSchema
+from services.food_service import invalidate_menu_cache
+from utils.tracing import traced
+
+IMPORT_BATCH_SIZE = 100
+MAX_IMPORT_ROWS = 5000
+MAX_REPORTED_ERRORS = 200
+
+
+# ── Streaming parsers ───────────────────────────────────────────────
+def _iter_text_lines(stream):
+    """Decode a binary stream line by line without reading it all."""
+    first = True
+    for raw in iter(stream.readline, b""):
+        line = raw.decode("utf-8")
+        if first:
+            line = line.lstrip("\ufeff")
+            first = False
+        yield line
+
+
+def iter_csv_rows(stream):
+    """Yield (row number, dict) from a CSV stream with a header row.
+
+    Empty cells are dropped, so on update rows they leave the column as is.
+    """
+    reader = csv.DictReader(_iter_text_lines(stream))
+    for row in reader:
+        cleaned = {
+            k.strip(): v.strip()
+            for k, v in row.items()
+            if k and isinstance(v, str) and v.strip() != ""
+        }
+        if cleaned:
+            yield reader.line_num, cleaned
+
+
+def iter_ndjson_rows(stream):
+    """Yield (line number, dict) from an NDJSON stream (one object per line).
+
+    A line that is not a JSON object yields ``(line, ValueError)``.
+    """
+    for line_no, line in enumerate(_iter_text_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_no, ValueError(f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield line_no, ValueError("Each line must be a JSON object")
+            continue
+        yield line_no, row
+
+
+# ── Import ──────────────────────────────────────────────────────────
+class _ImportRun:
+    def __init__(self, dry_run: bool, batch_size: int):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors: list[dict] = []
+        self.creates: list[tuple[int, dict]] = []
+        self.updates: list[tuple[int, str, dict]] = []
+
+    def error(self, row: int, errors) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    async def add(self, row_no: int, raw) -> None:
+        self.rows += 1
+        if isinstance(raw, Exception):
+            self.error(row_no, str(raw))
+            return
+        raw = dict(raw)
+        food_id = raw.pop("id", None)
+        try:
+            if food_id:
+                food_id = str(uuid.UUID(str(food_id)))
+                data = FoodUpdateSchema().load(raw)
+                if not data:
+                    raise ValidationError("No fields to update")
+                self.updates.append((row_no, food_id, data))
+            else:
+                self.creates.append((row_no, FoodCreateSchema().load(raw)))
+        except ValidationError as err:
+            self.error(row_no, err.messages)
+            return
+        except ValueError:
+            self.error(row_no, {"id": ["Not a valid UUID."]})
+            return
+        if len(self.creates) + len(self.updates) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        creates, updates = self.creates, self.updates
+        self.creates, self.updates = [], []
+        if updates:
+            await self._flush_updates(updates)
+        if creates:
+            await self._flush_creates(creates)
+
+    async def _flush_updates(self, updates) -> None:
+        ids = list({food_id for _row, food_id, _data in updates})
+        try:
+            existing = {row["id"]: row for row in await get_repository().get_foods(ids)}
+        except Exception as exc:  # noqa: BLE001 — report and keep importing
+            for row_no, _fid, _data in updates:
+                self.error(row_no, f"Lookup failed: {exc}")
+            return
+
+        merged: dict[str, dict] = {}
+        applied_rows = []
+        for row_no, food_id, data in updates:
+            if food_id not in existing:
+                self.error(row_no, "Food item not found")
+                continue
+            # Only the columns the rows name; later rows for the same id win,
+            # like sequential PUTs would
+            merged[food_id] = {**merged.get(food_id, {"id": food_id}), **data}
+            applied_rows.append((row_no, food_id))
+        if not merged:
+            return
+        if not self.dry_run:
+            try:
+                written = {row["id"] for row in await get_repository().update_foods(list(merged.values()))}
+            except Exception as exc:  # noqa: BLE001
+                for row_no, _fid in applied_rows:
+                    self.error(row_no, f"Update failed: {exc}")
+                return
+            for row_no, food_id in applied_rows:
+                if food_id not in written:  # deleted since the existence check
+                    self.error(row_no, "Food item not found")
+            applied_rows = [(row_no, food_id) for row_no, food_id in applied_rows if food_id in written]
+        self.updated += len(applied_rows)
+
+    async def _flush_creates(self, creates) -> None:
+        if not self.dry_run:
+            try:
+                await get_repository().insert_foods([data for _row, data in creates])
+            except Exception as exc:  # noqa: BLE001
+                for row_no, _data in creates:
+                    self.error(row_no, f"Insert failed: {exc}")
+                return
+        self.created += len(creates)
+
+    def summary(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+@traced
+async def import_foods(rows, dry_run: bool = False, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Validate and write ``(row number, dict)`` pairs from *rows* in batches.
+
+    In *dry_run* mode rows are validated (including the existence check
+    for updates) but nothing is written. Returns a summary with per-row
+    errors. Raises ValueError, before anything is written, if the upload
+    exceeds MAX_IMPORT_ROWS.
+    """
+    rows = list(itertools.islice(rows, MAX_IMPORT_ROWS + 1))
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f"Import is limited to {MAX_IMPORT_ROWS} rows; nothing was imported")
+    run = _ImportRun(dry_run, batch_size)
+    try:
+        for row_no, raw in rows:
+            await run.add(row_no, raw)
+        await run.flush()
+    finally:
+        if not dry_run and (run.created or run.updated):
+            invalidate_menu_cache()
+    return run.summary()
@@ -0,0 +1,139 @@
+"""Order event hub — live order deltas for the Server-Sent Events stream.
+
+``order_service`` publishes a small event whenever an order is created
+or changes status. Events are kept in a bounded in-memory ring buffer so
+a reconnecting client can replay what it missed via ``Last-Event-ID``.
+
+Event ids look like ``<epoch>-<seq>``: *epoch* identifies this process,
+so an id issued by another worker (or before a restart) is detected and
+the client is told to re-fetch instead of silently missing events.
+
+In-process consumers (the kitchen queue) register with
+``add_order_listener`` and get the full order — including its ``items``
+when it was just placed — for every published event.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Event types
+ORDER_CREATED = "order_created"
+ORDER_STATUS = "order_status"
+
+
+class OrderEventHub:
+    """Ring buffer of order events plus a cap on concurrent streams."""
+
+    def __init__(self, buffer_size: int = 500, max_streams: int = 4):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.max_streams = max_streams
+        self._events: deque = deque(maxlen=buffer_size)  # (seq, event)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._active_streams = 0
+
+    # ── Publishing ──────────────────────────────────────────────────
+    def publish(self, event_type: str, order: dict) -> str:
+        """Record a delta for *order* and wake every waiting stream."""
+        event = {
+            "type": event_type,
+            "order_id": order.get("id"),
+            "user_id": order.get("user_id"),
+            "status": order.get("status"),
+            "total_price": order.get("total_price"),
+            "created_at": order.get("created_at"),
+            "ts": time.time(),
+        }
+        with self._cond:
+            self._seq += 1
+            event["id"] = f"{self.epoch}-{self._seq}"
+            self._events.append((self._seq, event))
+            self._cond.notify_all()
+        return event["id"]
+
+    # ── Reading ─────────────────────────────────────────────────────
+    def resolve(self, last_event_id: str | None) -> tuple[int, bool]:
+        """Map a client's Last-Event-ID to (sequence to resume after, replay_ok).
+
+        ``replay_ok`` is False when the id is from another process or has
+        already been evicted from the ring buffer — the client must then
+        re-fetch its order list.
+        """
+        with self._cond:
+            current = self._seq
+            oldest = self._events[0][0] if self._events else current + 1
+        if not last_event_id:
+            return current, True
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return current, False
+        seq = int(seq)
+        if seq > current:
+            return current, False
+        # Events seq+1 .. oldest-1 were evicted
+        return seq, seq + 1 >= oldest
+
+    def wait_for_events(self, after_seq: int, timeout: float) -> list[tuple[int, dict]]:
+        """Return events newer than *after_seq*, waiting up to *timeout* seconds."""
+        with self._cond:
+            if self._seq <= after_seq:
+                self._cond.wait(timeout)
+            return [(seq, ev) for seq, ev in self._events if seq > after_seq]
+
+    # ── Stream admission ────────────────────────────────────────────
+    def try_open_stream(self) -> bool:
+        with self._cond:
+            if self._active_streams >= self.max_streams:
+                return False
+            self._active_streams += 1
+            return True
+
+    def close_stream(self) -> None:
+        with self._cond:
+            self._active_streams = max(0, self._active_streams - 1)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active_streams": self._active_streams,
+                "max_streams": self.max_streams,
+                "buffered_events": len(self._events),
+                "last_event_id": f"{self.epoch}-{self._seq}",
+            }
+
+
+_hub = OrderEventHub()
+_listeners: list[Callable[[str, dict], None]] = []
+
+
+def init_order_events(buffer_size: int, max_streams: int) -> OrderEventHub:
+    """Recreate the hub with configured limits (called from create_app)."""
+    global _hub
+    _hub = OrderEventHub(buffer_size=buffer_size, max_streams=max_streams)
+    return _hub
+
+
+def get_order_hub() -> OrderEventHub:
+    return _hub
+
+
+def add_order_listener(listener: Callable[[str, dict], None]) -> None:
+    """Call ``listener(event_type, order)`` for every order event of this process (once per listener)."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def publish_order_event(event_type: str, order: dict) -> None:
+    """Publish an order delta to every live stream and listener in this process."""
+    _hub.publish(event_type, order)
+    for listener in _listeners:
+        try:
+            listener(event_type, order)
+        except Exception:  # noqa: BLE001 — a listener must not fail the order write
+            logger.exception("Order event listener %r failed", listener)
@@ -1,30 +1,83 @@
 """Order service — placing orders, fetching, status transitions."""
 
-from extensions import get_supabase
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from flask import current_app
+
+from extensions import get_repository
+from models.order_status import VALID_TRANSITIONS, source_statuses, transition_path
+from services.food_service import invalidate_menu_cache
+from services.order_events import ORDER_CREATED, ORDER_STATUS, publish_order_event
+from utils.tracing import traced
+
+# Keyset pagination over (created_at DESC, id DESC)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 # Allowed status transitions (current → set of valid next statuses)
-_VALID_TRANSITIONS: dict[str, set[str]] = {
-    "pending": {"preparing"},
-    "preparing": {"ready"},
-    "ready": {"completed"},
-    "completed": set(),  # terminal state
-}
+_VALID_TRANSITIONS = VALID_TRANSITIONS
+
+
+class OrderConflictError(ValueError):
+    """The order is no longer in a state that allows the requested move."""
+
+    def __init__(self, current_status: str, requested_status: str):
+        allowed = sorted(_VALID_TRANSITIONS.get(current_status, ()))
+        super().__init__(
+            f"Order is already '{current_status}' and cannot move to "
+            f"'{requested_status}'. Allowed: {allowed or 'none (terminal state)'}"
+        )
+        self.current_status = current_status
+        self.requested_status = requested_status
 
 
-def place_order(user_id: str, items: list[dict]) -> dict:
+@traced
+async def place_order(user_id: str, items: list[dict]) -> dict:
     """
     Validate food availability, calculate totals server-side,
     insert order + order_items, and return the created order.
+
+    Uses the ``place_order`` database function (one round-trip, one
+    transaction) unless ORDER_PLACEMENT_RPC is disabled, e.g. while the
+    function has not been deployed yet. Stock-tracked foods are only sold
+    through the function, which decrements their stock atomically.
+    """
+    if current_app.config.get("ORDER_PLACEMENT_RPC", True):
+        order = await _place_order_rpc(user_id, items)
+    else:
+        order = await _place_order_multi_call(user_id, items)
+    publish_order_event(ORDER_CREATED, order)
+    return order
+
+
+@traced
+async def _place_order_rpc(user_id: str, items: list[dict]) -> dict:
+    """Place the order through the transactional ``place_order`` RPC."""
+    payload = [
+        {"food_id": str(item["food_id"]), "quantity": item["quantity"]}
+        for item in items
+    ]
+    # Validation failures inside the function surface as ValueError
+    order = await get_repository().place_order(user_id, payload)
+    if order.pop("sold_out", None):
+        # The last portion went: drop this worker's menu so it stops offering the item
+        invalidate_menu_cache()
+    return order
+
+
+@traced
+async def _place_order_multi_call(user_id: str, items: list[dict]) -> dict:
+    """Legacy path: select foods, insert order, insert items.
+
+    Three round-trips and no transaction; kept for deployments that have
+    not run the place_order() migration yet.
     """
     # 1. Fetch all requested food items in one query
     food_ids = [str(item["food_id"]) for item in items]
-    foods_result = (
-        get_supabase().table("foods")
-        .select("id, name, price, is_available")
-        .in_("id", food_ids)
-        .execute()
-    )
-    foods_map = {f["id"]: f for f in foods_result.data}
+    foods_map = {f["id"]: f for f in await get_repository().get_foods(food_ids)}
 
     # 2. Validate availability
     for item in items:
@@ -34,6 +87,9 @@ def place_order(user_id: str, items: list[dict]) -> dict:
             raise ValueError(f"Food item {fid} not found")
         if not food["is_available"]:
             raise ValueError(f"'{food['name']}' is currently unavailable")
+        if food.get("stock") is not None:
+            # Three separate calls cannot take stock atomically
+            raise RuntimeError("Stock-tracked items need ORDER_PLACEMENT_RPC (the place_order() function)")
 
     # 3. Calculate total price server-side
     total_price = 0.0
@@ -52,75 +108,180 @@ def place_order(user_id: str, items: list[dict]) -> dict:
         )
 
     # 4. Insert order
-    order_result = (
-        get_supabase().table("orders")
-        .insert(
-            {
-                "user_id": user_id,
-                "status": "pending",
-                "total_price": round(total_price, 2),
-            }
-        )
-        .execute()
+    order = await get_repository().insert_order(
+        {
+            "user_id": user_id,
+            "status": "pending",
+            "total_price": round(total_price, 2),
+        }
     )
-    order = order_result.data[0]
 
     # 5. Insert order items
     for oi in order_items_payload:
         oi["order_id"] = order["id"]
-    get_supabase().table("order_items").insert(order_items_payload).execute()
+    await get_repository().insert_order_items(order_items_payload)
 
     # 6. Return enriched order
     order["items"] = order_items_payload
     return order
 
 
-def get_user_orders(user_id: str) -> list:
-    """Return all orders for a specific user, newest first."""
-    orders = (
-        get_supabase().table("orders")
-        .select("*, order_items(*)")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
-        .execute()
-    )
-    return orders.data
-
-
-def get_all_orders(status: str | None = None) -> list:
-    """Return all orders (admin). Optionally filter by status."""
-    query = get_supabase().table("orders").select("*, order_items(*), users(name, email, phone)")
-    if status:
-        query = query.eq("status", status)
-    result = query.order("created_at", desc=True).execute()
-    return result.data
-
-
-def update_order_status(order_id: str, new_status: str) -> dict:
-    """Update order status with transition validation."""
-    # Fetch current order
-    order_result = (
-        get_supabase().table("orders")
-        .select("id, status")
-        .eq("id", order_id)
-        .execute()
-    )
-    if not order_result.data:
+# ── Pagination helpers ──────────────────────────────────────────────
+def _encode_cursor(row: dict) -> str:
+    """Opaque cursor pointing just after *row* in (created_at, id) order."""
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(padded))
+        # Both values may be interpolated into a PostgREST filter — accept
+        # only a real timestamp and UUID
+        datetime.fromisoformat(created_at)
+        order_id = str(uuid.UUID(order_id))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+    return created_at, order_id
+
+
+def clamp_page_size(limit: int | None) -> int:
+    """Return *limit* bounded to 1..MAX_PAGE_SIZE (default DEFAULT_PAGE_SIZE)."""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+@traced
+async def _fetch_page(cursor: str | None, limit: int, **filters) -> tuple[list, str | None]:
+    """Apply the keyset predicate, fetch one extra row to detect a next page."""
+    limit = clamp_page_size(limit)
+    after = _decode_cursor(cursor) if cursor else None
+    rows = await get_repository().list_orders(after=after, limit=limit + 1, **filters)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, _encode_cursor(rows[-1])
+    return rows, None
+
+
+@traced
+async def get_user_orders(user_id: str, cursor: str | None = None,
+                          limit: int = DEFAULT_PAGE_SIZE) -> tuple[list, str | None]:
+    """Return one page of a user's orders, newest first, plus the next cursor."""
+    return await _fetch_page(cursor, limit, user_id=user_id)
+
+
+@traced
+async def get_all_orders(status: str | None = None, cursor: str | None = None,
+                         limit: int = DEFAULT_PAGE_SIZE) -> tuple[list, str | None]:
+    """Return one page of all orders (admin), plus the next cursor.
+
+    Optionally filter by status.
+    """
+    return await _fetch_page(cursor, limit, status=status, with_user=True)
+
+
+@traced
+async def update_order_status(order_id: str, new_status: str) -> dict:
+    """Move an order to *new_status* with a single compare-and-set UPDATE.
+
+    The UPDATE only matches while the row is still in one of the valid
+    source states, so two admins advancing the same order cannot both
+    succeed. When nothing matched, one extra read tells "not found"
+    apart from a conflict (OrderConflictError).
+    """
+    sources = source_statuses(new_status)
+    if not sources:
+        raise ValueError(f"No order can transition to '{new_status}'")
+
+    order = await get_repository().update_order_status(order_id, new_status, sources)
+    if order:
+        publish_order_event(ORDER_STATUS, order)
+        return order
+
+    current = await get_repository().get_order_statuses([order_id])
+    if not current:
         raise ValueError("Order not found")
+    raise OrderConflictError(next(iter(current.values())), new_status)
 
-    current_status = order_result.data[0]["status"]
-    allowed = _VALID_TRANSITIONS.get(current_status, set())
 
-    if new_status not in allowed:
-        raise ValueError(
-            f"Cannot transition from '{current_status}' to '{new_status}'. "
-            f"Allowed: {allowed or 'none (terminal state)'}"
-        )
+@traced
+async def bulk_update_order_status(updates: list[dict]) -> list[dict]:
+    """Apply many ``{order_id, status}`` moves with a constant number of calls.
 
-    result = (
-        get_supabase().table("orders")
-        .update({"status": new_status})
-        .eq("id", order_id)
-        .execute()
-    )
-    return result.data[0]
+    One conditional UPDATE per distinct target status (at most three; in one
+    transaction on the Postgres backend), plus one read to explain the items
+    that did not apply. Returns one result per input item, in order:
+    ``{order_id, status, ok[, error, current_status]}``.
+    """
+    results = []
+    by_target: dict[str, list[str]] = {}
+    seen: set[str] = set()
+    for item in updates:
+        order_id, new_status = str(item["order_id"]), item["status"]
+        result = {"order_id": order_id, "status": new_status, "ok": False}
+        results.append(result)
+        if order_id in seen:
+            result["error"] = "Duplicate order_id in request"
+            continue
+        seen.add(order_id)
+        if not source_statuses(new_status):
+            result["error"] = f"No order can transition to '{new_status}'"
+            continue
+        by_target.setdefault(new_status, []).append(order_id)
+
+    updated: dict[str, dict] = {}
+    if by_target:
+        rows = await get_repository().update_order_statuses({
+            new_status: (order_ids, source_statuses(new_status))
+            for new_status, order_ids in by_target.items()
+        })
+        for row in rows:
+            updated[row["id"]] = row
+            publish_order_event(ORDER_STATUS, row)
+
+    missed = [oid for ids in by_target.values() for oid in ids if oid not in updated]
+    current = await get_repository().get_order_statuses(missed) if missed else {}
+
+    for result in results:
+        if "error" in result:
+            continue
+        order_id = result["order_id"]
+        if order_id in updated:
+            result["ok"] = True
+        elif order_id not in current:
+            result["error"] = "Order not found"
+        else:
+            conflict = OrderConflictError(current[order_id], result["status"])
+            result["error"] = str(conflict)
+            result["current_status"] = conflict.current_status
+    return results
+
+
+@traced
+async def advance_orders(current: dict[str, str], target: str) -> list[dict]:
+    """Walk orders ``{order_id: status}`` along the valid transitions to *target*.
+
+    One bulk compare-and-set per step (``pending`` → ``ready`` takes two),
+    each publishing its events. Orders that moved concurrently drop out.
+    Returns the rows that reached *target*.
+    """
+    remaining = {order_id: status for order_id, status in current.items() if status != target}
+    reached = []
+    while remaining:
+        by_target: dict[str, list[str]] = {}
+        for order_id, status in remaining.items():
+            by_target.setdefault(transition_path(status, target)[0], []).append(order_id)
+        rows = await get_repository().update_order_statuses({
+            new_status: (order_ids, source_statuses(new_status))
+            for new_status, order_ids in by_target.items()
+        })
+        remaining = {}
+        for row in rows:
+            publish_order_event(ORDER_STATUS, row)
+            if row["status"] == target:
+                reached.append(row)
+            else:
+                remaining[row["id"]] = row["status"]
+    return reached
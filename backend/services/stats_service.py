@@ -0,0 +1,102 @@
+"""Admin dashboard statistics — aggregated in the database, cached briefly."""
+
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import current_app
+
+from extensions import get_repository
+from utils.cache import TTLCache
+from utils.tracing import traced
+
+DEFAULT_DAYS = 7
+MAX_DAYS = 366
+DEFAULT_TOP = 5
+MAX_TOP = 50
+
+# Per-process cache: { (window key, top): stats }. Windows are whole local
+# days, so "the last 7 days" is the same key until midnight.
+STATS_CACHE_TTL_SECONDS = 30
+STATS_CACHE_MAX_ENTRIES = 32
+_stats_cache = TTLCache(maxsize=STATS_CACHE_MAX_ENTRIES, ttl=STATS_CACHE_TTL_SECONDS)
+
+
+def _timezone() -> ZoneInfo:
+    name = current_app.config.get("STATS_TIMEZONE", "UTC")
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise RuntimeError(f"Unknown STATS_TIMEZONE {name!r}")
+
+
+def _parse_day(value: str, name: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+def resolve_window(tz: ZoneInfo, days: int | None = None, start: str | None = None,
+                   end: str | None = None) -> tuple[date, date]:
+    """First and last local day (inclusive) of the requested window.
+
+    Either *start* and *end* (``YYYY-MM-DD``) or the last *days* days
+    including today.
+    """
+    if start or end:
+        if not (start and end):
+            raise ValueError("Pass both 'from' and 'to', or 'days'")
+        first, last = _parse_day(start, "from"), _parse_day(end, "to")
+        if first > last:
+            raise ValueError("'from' must not be after 'to'")
+    else:
+        days = DEFAULT_DAYS if days is None else days
+        if days < 1:
+            raise ValueError("'days' must be at least 1")
+        last = datetime.now(tz).date()
+        first = last - timedelta(days=days - 1)
+    if (last - first).days + 1 > MAX_DAYS:
+        raise ValueError(f"The window may span at most {MAX_DAYS} days")
+    return first, last
+
+
+def _fill_gaps(stats: dict, first: date, last: date) -> dict:
+    """Zero rows for the days and hours without orders, so charts need no gaps logic."""
+    by_day = {row["day"]: row for row in stats.get("revenue_by_day") or []}
+    by_hour = {row["hour"]: row for row in stats.get("revenue_by_hour") or []}
+    span = (last - first).days + 1
+    days = [(first + timedelta(days=i)).isoformat() for i in range(span)]
+    return {
+        **stats,
+        "revenue_by_day": [by_day.get(day, {"day": day, "orders": 0, "revenue": 0}) for day in days],
+        "revenue_by_hour": [by_hour.get(hour, {"hour": hour, "orders": 0, "revenue": 0}) for hour in range(24)],
+    }
+
+
+@traced
+async def get_order_stats(days: int | None = None, start: str | None = None,
+                          end: str | None = None, top: int | None = None) -> dict:
+    """Revenue per day and hour, counts per status, top foods and average order value.
+
+    Computed by the ``order_stats`` database function over whole local
+    days (STATS_TIMEZONE) and cached for ``STATS_CACHE_TTL_SECONDS``, so
+    the dashboard costs one small query however many orders exist. New
+    orders show up once the entry expires.
+    """
+    tz = _timezone()
+    first, last = resolve_window(tz, days, start, end)
+    top = max(1, min(top or DEFAULT_TOP, MAX_TOP))
+
+    async def load() -> dict:
+        window_start = datetime.combine(first, time.min, tz)
+        window_end = datetime.combine(last + timedelta(days=1), time.min, tz)
+        stats = await get_repository().order_stats(
+            window_start.isoformat(), window_end.isoformat(), top, tz.key,
+        )
+        return {
+            "window": {"from": first.isoformat(), "to": last.isoformat(), "timezone": tz.key},
+            **_fill_gaps(stats, first, last),
+        }
+
+    return await _stats_cache.get_or_load_async((first, last, tz.key, top), load)
+
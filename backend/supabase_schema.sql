@@ -24,6 +24,7 @@ CREATE TABLE IF NOT EXISTS foods (
     price        NUMERIC(10,2) NOT NULL CHECK (price >= 0),
     category     VARCHAR(100)  NOT NULL,
     is_available BOOLEAN        NOT NULL DEFAULT TRUE,
+    stock        INTEGER        CHECK (stock >= 0),  -- portions left; NULL = not tracked
     image_url    TEXT,
     created_at   TIMESTAMPTZ   NOT NULL DEFAULT now()
 );
@@ -47,12 +48,20 @@ CREATE TABLE IF NOT EXISTS order_items (
     price     NUMERIC(10,2)  NOT NULL CHECK (price >= 0)
 );
 
+-- Databases created before stock tracking
+ALTER TABLE foods ADD COLUMN IF NOT EXISTS stock INTEGER CHECK (stock >= 0);
+
 -- ── Indexes ─────────────────────────────────────────────────
 CREATE INDEX IF NOT EXISTS idx_orders_user_id   ON orders(user_id);
 CREATE INDEX IF NOT EXISTS idx_orders_status    ON orders(status);
 CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id);
 CREATE INDEX IF NOT EXISTS idx_foods_category   ON foods(category);
 
+-- Keyset pagination: ORDER BY created_at DESC, id DESC (+ optional user/status filter)
+CREATE INDEX IF NOT EXISTS idx_orders_created_id        ON orders(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_user_created_id   ON orders(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created_id ON orders(status, created_at DESC, id DESC);
+
 -- ── Row Level Security (optional but recommended) ───────────
 -- Enable RLS on all tables (policies can be added per your authz needs)
 ALTER TABLE users       ENABLE ROW LEVEL SECURITY;
@@ -65,3 +74,214 @@ CREATE POLICY "Service role full access" ON users       FOR ALL USING (true) WIT
 CREATE POLICY "Service role full access" ON foods       FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY "Service role full access" ON orders      FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY "Service role full access" ON order_items FOR ALL USING (true) WITH CHECK (true);
+
+-- ── Order placement (single round-trip, transactional) ──────
+-- Called by the backend as supabase.rpc("place_order", ...).
+-- Validates every item, prices it from the foods table and inserts
+-- the order with its items atomically. Validation failures raise
+-- SQLSTATE P0001 with a user-facing message.
+--
+-- Stock-tracked foods (stock IS NOT NULL) are decremented by one
+-- conditional UPDATE each, so concurrent checkouts can never sell more
+-- than is left; a food reaching 0 is marked unavailable in the same
+-- statement and listed in the result's "sold_out". Foods are locked in
+-- food_id order, so two checkouts cannot deadlock on each other.
+CREATE OR REPLACE FUNCTION place_order(p_user_id UUID, p_items JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_item     JSONB;
+    v_food     foods%ROWTYPE;
+    v_food_id  UUID;
+    v_qty      INTEGER;
+    v_prices   JSONB := '{}'::JSONB;
+    v_sold_out JSONB := '[]'::JSONB;
+    v_total    NUMERIC(10,2) := 0;
+    v_lines    JSONB := '[]'::JSONB;
+    v_order    orders%ROWTYPE;
+BEGIN
+    IF jsonb_typeof(p_items) IS DISTINCT FROM 'array' OR jsonb_array_length(p_items) = 0 THEN
+        RAISE EXCEPTION 'Order must contain at least one item' USING ERRCODE = 'P0001';
+    END IF;
+
+    FOR v_item IN SELECT * FROM jsonb_array_elements(p_items) LOOP
+        v_qty := (v_item->>'quantity')::INTEGER;
+        IF v_qty IS NULL OR v_qty < 1 THEN
+            RAISE EXCEPTION 'Invalid quantity for food item %', v_item->>'food_id'
+                USING ERRCODE = 'P0001';
+        END IF;
+    END LOOP;
+
+    -- One pass per food (repeated lines summed), in food_id order
+    FOR v_food_id, v_qty IN
+        SELECT (e->>'food_id')::UUID, sum((e->>'quantity')::INTEGER)
+        FROM jsonb_array_elements(p_items) AS e
+        GROUP BY 1
+        ORDER BY 1
+    LOOP
+        -- Tracked stock: take it or match nothing (a concurrent taker waits
+        -- for the row lock, then re-checks stock >= qty on the new value)
+        UPDATE foods
+        SET stock = stock - v_qty, is_available = stock - v_qty > 0
+        WHERE id = v_food_id AND is_available AND stock >= v_qty
+        RETURNING * INTO v_food;
+
+        IF FOUND THEN
+            IF v_food.stock = 0 THEN
+                v_sold_out := v_sold_out || to_jsonb(v_food.id);
+            END IF;
+        ELSE
+            -- FOR SHARE blocks a concurrent price/availability edit until we commit
+            SELECT * INTO v_food FROM foods WHERE id = v_food_id FOR SHARE;
+            IF NOT FOUND THEN
+                RAISE EXCEPTION 'Food item % not found', v_food_id USING ERRCODE = 'P0001';
+            END IF;
+            IF v_food.stock = 0 THEN
+                RAISE EXCEPTION '''%'' is sold out', v_food.name USING ERRCODE = 'P0001';
+            END IF;
+            IF NOT v_food.is_available THEN
+                RAISE EXCEPTION '''%'' is currently unavailable', v_food.name USING ERRCODE = 'P0001';
+            END IF;
+            IF v_food.stock IS NOT NULL THEN
+                RAISE EXCEPTION 'Only % left of ''%''', v_food.stock, v_food.name
+                    USING ERRCODE = 'P0001';
+            END IF;
+        END IF;
+        v_prices := v_prices || jsonb_build_object(v_food.id::TEXT, v_food.price);
+    END LOOP;
+
+    FOR v_item IN SELECT * FROM jsonb_array_elements(p_items) LOOP
+        v_qty := (v_item->>'quantity')::INTEGER;
+        v_food_id := (v_item->>'food_id')::UUID;
+        v_total := v_total + (v_prices->>v_food_id::TEXT)::NUMERIC * v_qty;
+        v_lines := v_lines || jsonb_build_object(
+            'food_id', v_food_id, 'quantity', v_qty,
+            'price', (v_prices->>v_food_id::TEXT)::NUMERIC * v_qty
+        );
+    END LOOP;
+
+    INSERT INTO orders (user_id, status, total_price)
+    VALUES (p_user_id, 'pending', round(v_total, 2))
+    RETURNING * INTO v_order;
+
+    INSERT INTO order_items (order_id, food_id, quantity, price)
+    SELECT v_order.id, (l->>'food_id')::UUID, (l->>'quantity')::INTEGER, (l->>'price')::NUMERIC
+    FROM jsonb_array_elements(v_lines) AS l;
+
+    RETURN to_jsonb(v_order) || jsonb_build_object(
+        'items',
+        (SELECT jsonb_agg(l || jsonb_build_object('order_id', v_order.id))
+         FROM jsonb_array_elements(v_lines) AS l),
+        'sold_out', v_sold_out
+    );
+END;
+$$;
+
+-- ── Restocking (atomic) ─────────────────────────────────────
+-- Called by the backend as supabase.rpc("restock_food", ...) for
+-- POST /api/foods/<id>/restock. Adds p_add portions, or sets the stock
+-- to p_set when p_add is NULL (p_set NULL = stop tracking). Stock left
+-- makes the item available again; a stock of 0 makes it unavailable.
+-- Returns the food row, or NULL if it does not exist.
+CREATE OR REPLACE FUNCTION restock_food(p_food_id UUID, p_add INTEGER DEFAULT NULL,
+                                        p_set INTEGER DEFAULT NULL)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_food foods%ROWTYPE;
+BEGIN
+    IF (p_add IS NOT NULL AND p_add < 1) OR (p_set IS NOT NULL AND p_set < 0) THEN
+        RAISE EXCEPTION 'Invalid stock change' USING ERRCODE = 'P0001';
+    END IF;
+    UPDATE foods
+    SET stock = CASE WHEN p_add IS NOT NULL THEN COALESCE(stock, 0) + p_add ELSE p_set END,
+        is_available = CASE
+            WHEN p_add IS NOT NULL THEN TRUE
+            WHEN p_set IS NULL THEN is_available
+            ELSE p_set > 0
+        END
+    WHERE id = p_food_id
+    RETURNING * INTO v_food;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    RETURN to_jsonb(v_food);
+END;
+$$;
+
+-- ── Bulk menu edits ─────────────────────────────────────────
+-- Called by the backend as supabase.rpc("update_foods", ...) for menu
+-- imports. p_rows is a JSON array of {"id", <columns>}; each row changes
+-- only the columns it names, so stock (kept by place_order() and
+-- restock_food()) and concurrent edits to other columns are left alone.
+-- Returns the updated rows; ids that do not exist are skipped.
+CREATE OR REPLACE FUNCTION update_foods(p_rows JSONB)
+RETURNS JSONB
+LANGUAGE sql
+AS $$
+    WITH updated AS (
+        UPDATE foods AS f
+        SET (name, price, category, is_available, image_url) = (
+            SELECT p.name, p.price, p.category, p.is_available, p.image_url
+            FROM jsonb_populate_record(f, r.value) AS p
+        )
+        FROM jsonb_array_elements(p_rows) AS r
+        WHERE f.id = (r.value->>'id')::UUID
+        RETURNING f.*
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(updated)), '[]'::JSONB) FROM updated;
+$$;
+
+-- ── Dashboard aggregates (one round-trip) ───────────────────
+-- Called by the backend as supabase.rpc("order_stats", ...) for
+-- GET /api/orders/stats. Aggregates the orders created in
+-- [p_from, p_to) — range scan on idx_orders_created_id — so the
+-- dashboard never downloads order rows. Days and hours are local to
+-- p_tz; top_foods ranks foods by quantity sold.
+CREATE OR REPLACE FUNCTION order_stats(p_from TIMESTAMPTZ, p_to TIMESTAMPTZ,
+                                       p_top INTEGER DEFAULT 5, p_tz TEXT DEFAULT 'UTC')
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH o AS (
+        SELECT id, status, total_price, created_at AT TIME ZONE p_tz AS local_time
+        FROM orders
+        WHERE created_at >= p_from AND created_at < p_to
+    )
+    SELECT jsonb_build_object(
+        'order_count', (SELECT count(*) FROM o),
+        'revenue', (SELECT COALESCE(sum(total_price), 0) FROM o),
+        'average_order_value', (SELECT COALESCE(round(avg(total_price), 2), 0) FROM o),
+        'status_counts', (
+            SELECT COALESCE(jsonb_object_agg(status, n), '{}'::JSONB)
+            FROM (SELECT status, count(*) AS n FROM o GROUP BY status) s
+        ),
+        'revenue_by_day', (
+            SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                       'day', day, 'orders', n, 'revenue', revenue) ORDER BY day), '[]'::JSONB)
+            FROM (SELECT local_time::DATE AS day, count(*) AS n, sum(total_price) AS revenue
+                  FROM o GROUP BY 1) d
+        ),
+        'revenue_by_hour', (
+            SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                       'hour', hour, 'orders', n, 'revenue', revenue) ORDER BY hour), '[]'::JSONB)
+            FROM (SELECT extract(HOUR FROM local_time)::INTEGER AS hour, count(*) AS n,
+                         sum(total_price) AS revenue
+                  FROM o GROUP BY 1) h
+        ),
+        'top_foods', (
+            SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                       'food_id', t.food_id, 'name', f.name, 'quantity', t.quantity,
+                       'revenue', t.revenue) ORDER BY t.quantity DESC, f.name), '[]'::JSONB)
+            FROM (SELECT oi.food_id, sum(oi.quantity) AS quantity, sum(oi.price) AS revenue
+                  FROM order_items oi JOIN o ON o.id = oi.order_id
+                  GROUP BY oi.food_id
+                  ORDER BY sum(oi.quantity) DESC, oi.food_id
+                  LIMIT p_top) t
+            JOIN foods f ON f.id = t.food_id
+        )
+    );
+$$;
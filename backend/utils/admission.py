@@ -0,0 +1,308 @@
+"""Admission control — concurrency caps, bounded queues and load shedding per endpoint class.
+
+At the lunch rush every request lands on the same gunicorn threads, so a
+burst of checkouts and menu reloads slows everyone down — including the
+admins clearing the kitchen queue. Each ``/api`` request is put in a
+class before its view runs:
+
+  * admin    — any request carrying an admin token (kitchen queue, status
+               updates, dashboard)
+  * checkout — ``POST /api/orders``
+  * listing  — other reads (menu, order history)
+  * default  — other writes (login, OTP, registration)
+
+Health checks, metrics, CORS preflights and the live order stream (capped
+by SSE_MAX_STREAMS) are never held back.
+
+A class runs at most its ``max_in_flight`` requests at once, and all
+classes together at most ADMISSION_MAX_IN_FLIGHT — which admin requests
+may exceed by ADMISSION_ADMIN_RESERVED, so admins always have room.
+Requests over the limits wait in their class's queue, oldest first; a
+freed slot goes to a waiting admin request first, then checkout, listing
+and default. Requests are shed rather than left to time out:
+
+  * ``429`` at once when the class's queue is full;
+  * ``503`` at once when the expected wait (queue position x average time
+    a request of the class holds its slot) is longer than the class's
+    ``max_wait``, and after waiting ``max_wait`` without a slot.
+
+Both carry a ``Retry-After`` from the same estimate. In-flight requests,
+queue depths, waits and rejections are exported on ``/api/metrics`` and
+summarised at ``/api/admission``. Limits are per worker process.
+
+Off unless ADMISSION_ENABLED is set. The default limits fit one gunicorn
+worker with ``--threads 8``: a worker never holds more requests than it
+has threads, so with queues at least that long nothing is shed for a
+full queue below capacity — requests over the class caps wait their
+turn (admins first) and are shed only when they would miss ``max_wait``.
+A queued request holds its thread while it waits; under uvicorn waiting
+is free and the queue lengths are real bounds. Size them with
+``python -m bench.bench_serving --admission``.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+
+from flask import g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+from utils.aio import serving_asgi
+from utils.metrics import record_admission_queue, record_admission_rejected, record_admission_slot
+from utils.responses import error_response
+
+ADMIN, CHECKOUT, LISTING, DEFAULT = "admin", "checkout", "listing", "default"
+PRIORITY = (ADMIN, CHECKOUT, LISTING, DEFAULT)  # a freed slot goes to the first class with a waiter
+
+EXEMPT_ENDPOINTS = {"health", "ops.metrics", "ops.boot", "orders.order_stream"}
+SERVICE_TIME_SMOOTHING = 0.2  # weight of the latest request in the average slot time
+
+QUEUE_FULL = "queue_full"
+DEADLINE = "deadline"
+
+
+def parse_class_limits(spec: str) -> tuple[int, int, float]:
+    """``"3,2,5"`` -> ``(3, 2, 5.0)``: max in flight, max queued, max wait in seconds."""
+    try:
+        in_flight, queue, wait = (part.strip() for part in spec.split(","))
+        limits = int(in_flight), int(queue), float(wait)
+    except ValueError:
+        raise ValueError(f"Invalid admission limits {spec!r} (expected '<in flight>,<queue>,<max wait s>')")
+    if limits[0] < 1 or limits[1] < 0 or limits[2] < 0:
+        raise ValueError(f"Invalid admission limits {spec!r}")
+    return limits
+
+
+class _Waiter:
+    __slots__ = ("wake", "admitted", "queued_at")
+
+    def __init__(self, wake):
+        self.wake = wake          # called (outside the lock) once a slot is granted
+        self.admitted = False
+        self.queued_at = time.monotonic()
+
+
+class AdmissionController:
+    """Slots and wait queues for the endpoint classes of one worker."""
+
+    def __init__(self, limits: dict[str, tuple[int, int, float]], max_in_flight: int = 6,
+                 admin_reserved: int = 2):
+        self.limits = {cls: limits[cls] for cls in PRIORITY}
+        self.max_in_flight = max(1, max_in_flight)
+        self.admin_reserved = max(0, admin_reserved)
+        self._lock = threading.Lock()
+        self._in_flight = {cls: 0 for cls in PRIORITY}
+        self._queues: dict[str, deque] = {cls: deque() for cls in PRIORITY}
+        self._service_time = {cls: 0.0 for cls in PRIORITY}  # average seconds a slot is held
+        self._rejected = {cls: {QUEUE_FULL: 0, DEADLINE: 0} for cls in PRIORITY}
+
+    # ── Slot accounting (callers hold the lock) ────────────────────
+    def _fits(self, cls: str) -> bool:
+        if self._in_flight[cls] >= self.limits[cls][0]:
+            return False
+        cap = self.max_in_flight + (self.admin_reserved if cls == ADMIN else 0)
+        return sum(self._in_flight.values()) < cap
+
+    def _expected_wait(self, cls: str, position: int) -> float:
+        return position * self._service_time[cls] / self.limits[cls][0]
+
+    def _grant(self, cls: str) -> None:
+        self._in_flight[cls] += 1
+        record_admission_slot(cls, +1)
+
+    def _dispatch(self) -> list[_Waiter]:
+        """Hand free slots to waiters in priority order; returns the ones to wake."""
+        woken = []
+        for cls in PRIORITY:
+            queue = self._queues[cls]
+            while queue and self._fits(cls):
+                waiter = queue.popleft()
+                record_admission_queue(cls, -1, time.monotonic() - waiter.queued_at)
+                waiter.admitted = True
+                self._grant(cls)
+                woken.append(waiter)
+        return woken
+
+    def _reject(self, cls: str, reason: str, retry_after: float) -> tuple[str, float]:
+        self._rejected[cls][reason] += 1
+        record_admission_rejected(cls, reason)
+        return reason, retry_after
+
+    # ── Admission ───────────────────────────────────────────────────
+    def _enter(self, cls: str, waiter: _Waiter) -> tuple[str, float] | None:
+        """Admit, queue or reject a new request; None once it holds a slot or is queued.
+
+        Returns ``(reason, retry_after)`` when it is shed.
+        """
+        _max_in_flight, max_queue, max_wait = self.limits[cls]
+        with self._lock:
+            queue = self._queues[cls]
+            if not queue and self._fits(cls):
+                waiter.admitted = True
+                self._grant(cls)
+                return None
+            expected = self._expected_wait(cls, len(queue) + 1)
+            if len(queue) >= max_queue:
+                return self._reject(cls, QUEUE_FULL, expected)
+            if expected > max_wait:
+                return self._reject(cls, DEADLINE, expected)
+            queue.append(waiter)
+            record_admission_queue(cls, +1)
+            return None
+
+    def _give_up(self, cls: str, waiter: _Waiter, shed: bool = True) -> tuple[str, float] | None:
+        """The wait ended without a wake-up; None if a slot was granted meanwhile."""
+        with self._lock:
+            if waiter.admitted:
+                return None
+            queue = self._queues[cls]
+            queue.remove(waiter)
+            record_admission_queue(cls, -1, time.monotonic() - waiter.queued_at)
+            retry_after = self._expected_wait(cls, len(queue) + 1)
+            return self._reject(cls, DEADLINE, retry_after) if shed else (DEADLINE, retry_after)
+
+    def admit(self, cls: str) -> tuple[str, float] | None:
+        """Wait (blocking this thread) for a slot in *cls*; ``(reason, retry_after)`` if shed."""
+        event = threading.Event()
+        waiter = _Waiter(event.set)
+        shed = self._enter(cls, waiter)
+        if shed is not None or waiter.admitted:
+            return shed
+        if event.wait(self.limits[cls][2]):
+            return None
+        return self._give_up(cls, waiter)
+
+    async def admit_async(self, cls: str) -> tuple[str, float] | None:
+        """``admit`` for the event loop: the wait suspends instead of blocking."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(True))
+
+        waiter = _Waiter(wake)
+        shed = self._enter(cls, waiter)
+        if shed is not None or waiter.admitted:
+            return shed
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self.limits[cls][2])
+            return None
+        except asyncio.TimeoutError:
+            return self._give_up(cls, waiter)
+        except BaseException:
+            # Cancelled while queued: leave the queue, or hand back a slot granted meanwhile
+            if self._give_up(cls, waiter, shed=False) is None:
+                self.release(cls, 0.0)
+            raise
+
+    def release(self, cls: str, held: float) -> None:
+        """Free a slot of *cls* held for *held* seconds and wake the next waiters."""
+        with self._lock:
+            self._in_flight[cls] -= 1
+            record_admission_slot(cls, -1)
+            previous = self._service_time[cls]
+            self._service_time[cls] = held if previous == 0 else (
+                previous + SERVICE_TIME_SMOOTHING * (held - previous))
+            woken = self._dispatch()
+        for waiter in woken:
+            waiter.wake()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "admin_reserved": self.admin_reserved,
+                "in_flight": sum(self._in_flight.values()),
+                "classes": {
+                    cls: {
+                        "in_flight": self._in_flight[cls],
+                        "queued": len(self._queues[cls]),
+                        "max_in_flight": limits[0],
+                        "max_queue": limits[1],
+                        "max_wait_seconds": limits[2],
+                        "avg_service_ms": round(self._service_time[cls] * 1000, 1),
+                        "rejected": dict(self._rejected[cls]),
+                    }
+                    for cls, limits in self.limits.items()
+                },
+            }
+
+
+def _is_admin() -> bool:
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False  # the view answers bad tokens itself
+    return (get_jwt() or {}).get("role") == "admin"
+
+
+def classify() -> str | None:
+    """Endpoint class of the current request, or None when it is never held back."""
+    if (request.method == "OPTIONS" or request.endpoint is None
+            or not request.path.startswith("/api/") or request.endpoint in EXEMPT_ENDPOINTS):
+        return None
+    if _is_admin():
+        return ADMIN
+    if request.endpoint == "orders.create_order":
+        return CHECKOUT
+    if request.method in ("GET", "HEAD"):
+        return LISTING
+    return DEFAULT
+
+
+def _shed_response(reason: str, retry_after: float):
+    seconds = max(1, math.ceil(retry_after))
+    if reason == QUEUE_FULL:
+        response, status = error_response(f"Too many requests right now — try again in {seconds} seconds", 429)
+    else:
+        response, status = error_response(f"Server is busy — try again in {seconds} seconds", 503)
+    response.headers["Retry-After"] = str(seconds)
+    return response, status
+
+
+_controller: AdmissionController | None = None
+
+
+def init_admission(app) -> AdmissionController | None:
+    """Create the controller from ADMISSION_* settings and register its request hooks."""
+    global _controller
+    cfg = app.config
+    if not cfg.get("ADMISSION_ENABLED", False):
+        _controller = None
+        return None
+    _controller = controller = AdmissionController(
+        limits={
+            ADMIN: parse_class_limits(cfg.get("ADMISSION_ADMIN", "8,32,10")),
+            CHECKOUT: parse_class_limits(cfg.get("ADMISSION_CHECKOUT", "4,32,3")),
+            LISTING: parse_class_limits(cfg.get("ADMISSION_LISTING", "6,32,2")),
+            DEFAULT: parse_class_limits(cfg.get("ADMISSION_DEFAULT", "4,32,2")),
+        },
+        max_in_flight=cfg.get("ADMISSION_MAX_IN_FLIGHT", 6),
+        admin_reserved=cfg.get("ADMISSION_ADMIN_RESERVED", 2),
+    )
+
+    @app.before_request
+    async def _admission_enter():
+        cls = classify()
+        if cls is None:
+            return None
+        shed = await controller.admit_async(cls) if serving_asgi() else controller.admit(cls)
+        if shed is not None:
+            return _shed_response(*shed)
+        g._admission = (cls, time.monotonic())
+        return None
+
+    @app.teardown_request
+    def _admission_exit(_exc):
+        held = g.pop("_admission", None)
+        if held is not None:
+            controller.release(held[0], time.monotonic() - held[1])
+
+    return controller
+
+
+def get_admission_controller() -> AdmissionController | None:
+    """Return the controller, or None when admission control is off."""
+    return _controller
@@ -0,0 +1,311 @@
+"""Async serving mode — one set of coroutine views for WSGI and ASGI.
+
+Route handlers and services are ``async def``. How they run depends on
+the serving mode of the app:
+
+  * WSGI (gunicorn, ``app:application``) — coroutines are driven to
+    completion with ``run_sync`` on the request thread. The data and
+    email clients are the synchronous ones, so nothing ever suspends and
+    no event loop is involved; behaviour is the same as plain views.
+  * ASGI (uvicorn, ``asgi:application``) — ``ASGIAdapter`` awaits the
+    coroutine views on the server's event loop, and the clients are the
+    async ones (supabase AsyncClient, psycopg AsyncConnectionPool,
+    httpx.AsyncClient). Requests overlap their I/O waits instead of each
+    holding a thread. Plain ``def`` views (SSE stream, ops endpoints)
+    run on a bounded thread pool.
+
+Code shared by both modes awaits ``maybe_await(client_call())`` so it
+works with whichever client the mode installed.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import Flask, current_app, has_app_context, request
+from flask.globals import request_ctx
+from flask.signals import request_started
+
+# Request bodies are buffered before dispatch; larger ones get a 413
+DEFAULT_MAX_BODY_BYTES = 16 * 1024 * 1024
+_END = object()
+
+
+def run_sync(coro):
+    """Run a coroutine that never suspends and return its result.
+
+    In WSGI mode every awaited call completes immediately; a coroutine
+    that does suspend (an async client in the wrong mode) is a bug.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("Coroutine suspended in WSGI mode — an async client was used")
+
+
+async def maybe_await(value):
+    """Await *value* if the client returned an awaitable, else pass it through."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def serving_asgi() -> bool:
+    """True while handling a request of an app served over ASGI."""
+    return has_app_context() and getattr(current_app, "asgi", False)
+
+
+def _is_coroutine_view(view) -> bool:
+    return inspect.iscoroutinefunction(inspect.unwrap(view))
+
+
+class AsyncFlask(Flask):
+    """Flask app whose coroutine views run under WSGI or ASGI."""
+
+    #: Set by create_app(asgi=True); switches how coroutines are run
+    asgi = False
+    #: Thread pool for plain views in ASGI mode (set by ASGIAdapter)
+    sync_executor: ThreadPoolExecutor | None = None
+    #: Startup phase timings (utils.boot.BootProfile, set by create_app)
+    boot_profile = None
+
+    def ensure_sync(self, func):
+        # Under ASGI, decorators such as @jwt_required hand the coroutine
+        # back to ASGIAdapter to await on the event loop
+        if self.asgi or not inspect.iscoroutinefunction(func):
+            return func
+        return self.async_to_sync(func)
+
+    def async_to_sync(self, func):
+        @wraps(func)
+        def run(*args, **kwargs):
+            return run_sync(func(*args, **kwargs))
+
+        return run
+
+    # ── ASGI request handling (mirrors full_dispatch_request) ──────
+    async def full_dispatch_request_async(self):
+        self._got_first_request = True
+        try:
+            request_started.send(self, _async_wrapper=self.ensure_sync)
+            rv = await self.preprocess_request_async()
+            if rv is None:
+                rv = await self.dispatch_request_async()
+        except Exception as e:
+            rv = self.handle_user_exception(e)
+        return self.finalize_request(rv)
+
+    async def preprocess_request_async(self):
+        """``preprocess_request`` that awaits async ``before_request`` hooks (admission waits)."""
+        names = (None, *reversed(request.blueprints))
+        for name in names:
+            for url_func in self.url_value_preprocessors.get(name, ()):
+                url_func(request.endpoint, request.view_args)
+        for name in names:
+            for before_func in self.before_request_funcs.get(name, ()):
+                rv = await maybe_await(self.ensure_sync(before_func)())
+                if rv is not None:
+                    return rv
+        return None
+
+    async def dispatch_request_async(self):
+        req = request_ctx.request
+        if req.routing_exception is not None:
+            self.raise_routing_exception(req)
+        rule = req.url_rule
+        if getattr(rule, "provide_automatic_options", False) and req.method == "OPTIONS":
+            return self.make_default_options_response()
+        view = self.view_functions[rule.endpoint]
+        if _is_coroutine_view(view):
+            # Sync decorators (JWT checks) run here and return the coroutine,
+            # or an error response they produced themselves
+            return await maybe_await(view(**req.view_args))
+        return await self.run_in_thread(view, **req.view_args)
+
+    async def run_in_thread(self, fn, *args, **kwargs):
+        """Run a blocking callable on the sync pool with the current context."""
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.sync_executor, lambda: context.run(fn, *args, **kwargs)
+        )
+
+
+# ── ASGI → Flask bridge ─────────────────────────────────────────────
+def _build_environ(scope: dict, body: bytes) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "asgi.scope": scope,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+        if name == "CONTENT_LENGTH":
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class ASGIAdapter:
+    """ASGI application serving an AsyncFlask app.
+
+    The request body is read up front (bounded by MAX_CONTENT_LENGTH),
+    the request context is pushed in the connection's task, coroutine
+    views are awaited on the loop and streamed bodies (SSE) are pulled
+    from the thread pool chunk by chunk.
+    """
+
+    def __init__(self, app: AsyncFlask, threads: int = 32):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi-sync")
+        app.sync_executor = self.executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.app.config.get("WARMUP"):
+                    from utils.boot import warm_up
+
+                    await warm_up(self.app)
+                if self.app.boot_profile is not None:
+                    self.app.boot_profile.mark_ready()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                from extensions import get_repository
+                from utils.http_client import aclose_sessions
+
+                repository = get_repository()
+                if repository is not None:
+                    await repository.aclose()
+                await aclose_sessions()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive) -> bytes | None:
+        limit = self.app.config.get("MAX_CONTENT_LENGTH") or DEFAULT_MAX_BODY_BYTES
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > limit:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def _http(self, scope, receive, send) -> None:
+        body = await self._read_body(receive)
+        if body is None:
+            await send({"type": "http.response.start", "status": 413,
+                        "headers": [(b"content-type", b"text/plain"), (b"connection", b"close")]})
+            await send({"type": "http.response.body", "body": b"Request body too large"})
+            return
+
+        app = self.app
+        environ = _build_environ(scope, body)
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                response = await app.full_dispatch_request_async()
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            except BaseException:  # cancelled by the server
+                error = sys.exc_info()[1]
+                raise
+            app_iter, status, headers = response.get_wsgi_response(environ)
+        finally:
+            if error is not None and app.should_ignore_error(error):
+                error = None
+            ctx.pop(error)
+
+        await send({
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+        if response.is_streamed:
+            await self._stream(app_iter, receive, send)
+            return
+        try:
+            for chunk in app_iter:
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+    async def _stream(self, app_iter, receive, send) -> None:
+        """Pull chunks of a blocking generator on the pool until it ends or the client leaves.
+
+        Every step runs in one copied context, so ``stream_with_context``
+        sees the request context it pushed whichever pool thread runs it.
+        """
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        def step(fn, *args):
+            return loop.run_in_executor(self.executor, context.run, fn, *args)
+
+        watcher = asyncio.create_task(watch())
+        iterator = iter(app_iter)
+        try:
+            while not disconnected.is_set():
+                chunk = await step(next, iterator, _END)
+                if chunk is _END or disconnected.is_set():
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not disconnected.is_set():
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+            if hasattr(app_iter, "close"):
+                await step(app_iter.close)
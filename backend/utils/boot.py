@@ -0,0 +1,103 @@
+"""Boot profile and warmup — what a cold start spends its time on.
+
+On Render the service sleeps and every wake-up is a cold start: the
+interpreter imports the app, ``create_app`` builds the clients, and the
+first requests fill the caches. ``BootProfile`` records how long each
+phase took; the report is logged once the worker is ready and served at
+``GET /api/boot``.
+
+With LAZY_INIT the Supabase client (and the supabase-py import behind
+it) is built on first use instead of in ``create_app``. With WARMUP the
+worker preloads the menu cache, the database client or pool, and the
+email template and provider HTTP sessions before it takes traffic — in
+``app.py`` for gunicorn, in the lifespan startup for uvicorn.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Started when app.py imports this module, before its other imports
+_clock_start = time.perf_counter()
+_imports_seconds: float | None = None
+
+
+def mark_imports_done() -> None:
+    """Record how long the app module's imports took (first call wins)."""
+    global _imports_seconds
+    if _imports_seconds is None:
+        _imports_seconds = time.perf_counter() - _clock_start
+
+
+class BootProfile:
+    """Ordered ``(phase, seconds)`` timings of one app's startup."""
+
+    def __init__(self, lazy: bool = False):
+        self.lazy = lazy
+        self.phases: list[tuple[str, float]] = []
+        self.warmup_errors: dict[str, str] = {}
+        self.ready = False
+        if _imports_seconds is not None:
+            self.phases.append(("imports", _imports_seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def total_seconds(self) -> float:
+        return sum(seconds for _name, seconds in self.phases)
+
+    def mark_ready(self) -> None:
+        """The worker is about to take traffic: log the report once."""
+        if self.ready:
+            return
+        self.ready = True
+        logger.info(
+            "Boot %.0f ms (%s): %s", self.total_seconds() * 1000, "lazy" if self.lazy else "eager",
+            ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases),
+        )
+
+    def report(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "lazy_init": self.lazy,
+            "ready": self.ready,
+            "total_ms": round(self.total_seconds() * 1000, 1),
+            "phases": [{"name": name, "ms": round(seconds * 1000, 1)} for name, seconds in self.phases],
+            "warmup_errors": self.warmup_errors,
+        }
+
+
+async def warm_up(app) -> None:
+    """Preload the menu, the database client and the email path.
+
+    Awaited on the event loop in ASGI mode and driven with ``run_sync``
+    under WSGI. A failing step is logged and recorded, never fatal: the
+    worker still starts and the first request pays that cost instead.
+    """
+    from services.food_service import get_menu
+    from utils.email import build_otp_email, warm_email_sessions
+
+    profile = app.boot_profile
+    with app.app_context():
+        try:
+            with profile.phase("warmup.menu"):
+                menu = await get_menu()
+                menu["body"].encoded()
+        except Exception as exc:  # noqa: BLE001 — warmup must not stop the worker
+            profile.warmup_errors["menu"] = str(exc)
+            logger.warning("Warmup: menu preload failed: %s", exc)
+        try:
+            with profile.phase("warmup.email"):
+                build_otp_email("000000")
+                warm_email_sessions()
+        except Exception as exc:  # noqa: BLE001
+            profile.warmup_errors["email"] = str(exc)
+            logger.warning("Warmup: email preload failed: %s", exc)
@@ -0,0 +1,106 @@
+"""Small in-process TTL cache with LRU eviction.
+
+Used for read-mostly data (e.g. the menu) that every request would
+otherwise fetch from Supabase. Each gunicorn worker keeps its own copy,
+so entries must be safe to serve for up to *ttl* seconds after a write
+made in another worker.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after *ttl* seconds.
+
+    Holds at most *maxsize* entries; the least recently used entry is
+    evicted when a new key would exceed that bound.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by clear() so in-flight loads are discarded
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for *key*, or *default* if missing/expired."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if now >= expires_at:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        """Store *value* under *key*, evicting the LRU entry if full."""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for *key*, calling *loader()* on a miss.
+
+        The loader runs outside the lock, so concurrent misses for the same
+        key may each call it once. A result loaded while ``clear()`` ran is
+        returned to its caller but not cached, so a write that invalidates
+        the cache can never be overwritten by a stale in-flight read.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = self._generation
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value, None)
+        return value
+
+    async def get_or_load_async(self, key, loader):
+        """``get_or_load`` for a coroutine *loader* (awaited on a miss)."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = self._generation
+        value = await loader()
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value, None)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        """Drop every entry (used for write invalidation)."""
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+
+    def _store(self, key, value, ttl: float | None) -> None:
+        """Insert under the lock and enforce *maxsize*."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+_MISSING = object()
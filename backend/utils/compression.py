@@ -0,0 +1,105 @@
+"""Response compression — gzip, and brotli when installed.
+
+An ``after_request`` hook compresses response bodies of at least
+COMPRESSION_MIN_SIZE bytes with the best encoding the client lists in
+``Accept-Encoding``. Streamed responses (SSE), bodies that already have
+a Content-Encoding and responses marked ``Cache-Control: no-transform``
+are left alone. A strong ETag becomes weak, since the bytes on the wire
+are no longer the representation it was computed for.
+
+Routes serving cached bodies (the menu) pass the cache entry's store to
+``reuse_compressed``; each encoding is then compressed once per entry
+and the stored bytes are sent on later hits.
+
+Bytes in/out and the CPU time spent compressing are recorded per
+encoding in the metrics registry (``/api/metrics``).
+"""
+
+import gzip
+import time
+
+from flask import request
+
+from utils.metrics import record_compression
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/msgpack", "application/javascript")
+
+
+def _compressible(response) -> bool:
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if "Content-Encoding" in response.headers or "no-transform" in response.headers.get("Cache-Control", ""):
+        return False
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def reuse_compressed(response, store: dict):
+    """Keep compressed copies of *response*'s body in *store* (a cache entry's dict)."""
+    response.compression_store = store
+    return response
+
+
+class Compressor:
+    """Negotiates an encoding and compresses eligible responses."""
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _compressed_body(self, response, body: bytes, encoding: str) -> bytes:
+        store = getattr(response, "compression_store", None)
+        key = (response.mimetype, encoding)
+        if store is not None:
+            stored = store.get(key)
+            if stored is not None and stored[0] == body:
+                record_compression(encoding, len(body), len(stored[1]), 0.0, cached=True)
+                return stored[1]
+        start = time.thread_time()
+        compressed = self.compress(body, encoding)
+        record_compression(encoding, len(body), len(compressed), time.thread_time() - start)
+        if store is not None:
+            store[key] = (body, compressed)
+        return compressed
+
+    def __call__(self, response):
+        if not _compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        compressed = self._compressed_body(response, body, encoding)
+        if len(compressed) >= len(body):
+            return response
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_compression(app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5) -> Compressor:
+    """Register the compression hook; returns the Compressor."""
+    compressor = Compressor(min_size, gzip_level, brotli_quality)
+    app.after_request(compressor)
+    return compressor
@@ -1,5 +1,15 @@
 from functools import wraps
-from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask import current_app, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from utils.idempotency import (
+    HEADER as IDEMPOTENCY_HEADER,
+    MAX_KEY_LENGTH as IDEMPOTENCY_MAX_KEY_LENGTH,
+    IdempotencyKeyInFlight,
+    IdempotencyKeyReused,
+    get_idempotency_keys,
+    request_fingerprint,
+)
+from utils.rate_limit import get_rate_limiter, retry_after_seconds
 from utils.responses import error_response
 
 
@@ -13,7 +23,8 @@ def role_required(required_role: str):
             claims = get_jwt()
             if claims.get("role") != required_role:
                 return error_response("Admin access required", 403)
-            return fn(*args, **kwargs)
+            # Like @jwt_required: runs async views too (see utils.aio)
+            return current_app.ensure_sync(fn)(*args, **kwargs)
 
         return wrapper
 
@@ -23,3 +34,60 @@ def role_required(required_role: str):
 def admin_required(fn):
     """Shortcut decorator for admin-only routes."""
     return role_required("admin")(fn)
+
+
+def rate_limited(rule: str):
+    """Decorator that answers 429 once the client's *rule* buckets are empty (see utils.rate_limit)."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            limiter = get_rate_limiter()
+            wait = limiter.check_request(rule) if limiter is not None else 0
+            if wait > 0:
+                seconds = retry_after_seconds(wait)
+                response, status = error_response(f"Too many attempts — try again in {seconds} seconds", 429)
+                response.headers["Retry-After"] = str(seconds)
+                return response, status
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def idempotent(scope: str):
+    """Decorator for async views behind ``@jwt_required`` that honours ``Idempotency-Key`` (see utils.idempotency).
+
+    Requests without the header run as usual.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            keys = get_idempotency_keys()
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if keys is None or key is None:
+                return await fn(*args, **kwargs)
+            if not key.strip() or len(key) > IDEMPOTENCY_MAX_KEY_LENGTH or not key.isprintable():
+                return error_response(
+                    f"{IDEMPOTENCY_HEADER} must be 1-{IDEMPOTENCY_MAX_KEY_LENGTH} printable characters", 400
+                )
+            try:
+                return await keys.execute(
+                    keys.store_key(scope, get_jwt_identity(), key),
+                    request_fingerprint(),
+                    lambda: fn(*args, **kwargs),
+                )
+            except IdempotencyKeyReused:
+                return error_response(f"{IDEMPOTENCY_HEADER} was already used for a different request", 422)
+            except IdempotencyKeyInFlight:
+                response, status = error_response(
+                    f"A request with this {IDEMPOTENCY_HEADER} is still being processed", 409
+                )
+                response.headers["Retry-After"] = "1"
+                return response, status
+
+        return wrapper
+
+    return decorator
@@ -1,22 +1,36 @@
 """Email utility — send premium branded OTP emails.
 
-Supports two providers:
-  1. Resend (HTTP API) — works everywhere including Render (recommended)
-  2. SMTP            — fallback for local development
+Supports three providers, tried in order:
+  1. Brevo  (HTTP API) — free 300/day, sends to any recipient
+  2. Resend (HTTP API) — works everywhere including Render
+  3. SMTP              — fallback for local development
+
+Each provider sits behind a circuit breaker so a provider that keeps
+failing is skipped instead of costing its full timeout on every login.
+
+``deliver_email`` blocks (background dispatcher, WSGI); ``deliver_email_async``
+awaits the HTTP APIs on the async client and runs SMTP in a thread (ASGI).
 """
 
+import asyncio
 import json
 import smtplib
-import urllib.request
-import urllib.error
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
 from flask import current_app
 
+from utils.aio import maybe_await, run_sync, serving_asgi
+from utils.circuit_breaker import CircuitBreaker
+from utils.http_client import get_session
+from utils.metrics import track_email_send
+from utils.tracing import span, traced
+
 
 # ── Premium HTML template (hosted logo URL) ─────────────────────────
+@traced(name="email._build_html")
 def _build_html(otp: str, logo_url: str) -> str:
     year = datetime.utcnow().year
 
@@ -130,8 +144,50 @@ def _build_html(otp: str, logo_url: str) -> str:
 </html>"""
 
 
+# ── Pooled HTTP sessions for the provider APIs ──────────────────────
+# provider -> (config key, default API base URL)
+_PROVIDER_URLS = {
+    "brevo": ("BREVO_API_URL", "https://api.brevo.com"),
+    "resend": ("RESEND_API_URL", "https://api.resend.com"),
+}
+
+
+def _provider_session(name: str):
+    """Shared keep-alive session for *name* sized from the app config."""
+    cfg = current_app.config
+    url_key, default_url = _PROVIDER_URLS[name]
+    return get_session(
+        name,
+        cfg.get(url_key) or default_url,
+        pool_size=cfg.get("EMAIL_HTTP_POOL_SIZE", 4),
+        connect_timeout=cfg.get("EMAIL_HTTP_CONNECT_TIMEOUT", 3.0),
+        read_timeout=cfg.get("EMAIL_HTTP_READ_TIMEOUT", 10.0),
+    )
+
+
+def warm_email_sessions() -> list[str]:
+    """Open the keep-alive session of every configured HTTP provider (startup warmup)."""
+    cfg = current_app.config
+    names = []
+    if cfg.get("BREVO_API_KEY") and cfg.get("BREVO_SENDER_EMAIL"):
+        names.append("brevo")
+    if cfg.get("RESEND_API_KEY"):
+        names.append("resend")
+    for name in names:
+        session = _provider_session(name)
+        if serving_asgi():
+            session.async_client()
+    return names
+
+
+def _post_json(name: str, asynchronous: bool):
+    session = _provider_session(name)
+    return session.post_json_async if asynchronous else session.post_json
+
+
 # ── Send via Brevo (Sendinblue) HTTP API ────────────────────────────
-def _send_via_brevo(api_key, sender_email, sender_name, to_email, subject, html, text):
+async def _send_via_brevo(api_key, sender_email, sender_name, to_email, subject, html, text,
+                          asynchronous=False):
     """Send email using Brevo REST API. Free tier: 300 emails/day, any recipient."""
     payload = json.dumps({
         "sender": {"name": sender_name, "email": sender_email},
@@ -141,31 +197,27 @@ def _send_via_brevo(api_key, sender_email, sender_name, to_email, subject, html,
         "textContent": text,
     }).encode("utf-8")
 
-    req = urllib.request.Request(
-        "https://api.brevo.com/v3/smtp/email",
-        data=payload,
-        headers={
-            "api-key": api_key,
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        },
-        method="POST",
-    )
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            body = resp.read().decode("utf-8", errors="replace")
-            current_app.logger.info(f"Brevo response {resp.status}: {body}")
-    except urllib.error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace")
-        current_app.logger.error(f"Brevo API error {exc.code}: {body}")
-        raise RuntimeError(f"Brevo API error {exc.code}: {body}") from exc
+        status, body = await maybe_await(_post_json("brevo", asynchronous)(
+            "/v3/smtp/email",
+            payload,
+            headers={
+                "api-key": api_key,
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            },
+        ))
     except Exception as exc:
         current_app.logger.error(f"Brevo request failed: {exc}")
         raise RuntimeError(f"Brevo request failed: {exc}") from exc
+    if status >= 400:
+        current_app.logger.error(f"Brevo API error {status}: {body}")
+        raise RuntimeError(f"Brevo API error {status}: {body}")
+    current_app.logger.info(f"Brevo response {status}: {body}")
 
 
 # ── Send via Resend HTTP API ────────────────────────────────────────
-def _send_via_resend(api_key, from_addr, to_email, subject, html, text):
+async def _send_via_resend(api_key, from_addr, to_email, subject, html, text, asynchronous=False):
     """Send email using Resend REST API (HTTPS, never blocked)."""
     payload = json.dumps({
         "from": from_addr,
@@ -175,28 +227,24 @@ def _send_via_resend(api_key, from_addr, to_email, subject, html, text):
         "text": text,
     }).encode("utf-8")
 
-    req = urllib.request.Request(
-        "https://api.resend.com/emails",
-        data=payload,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "User-Agent": "SmartServe/1.0",
-            "Accept": "application/json",
-        },
-        method="POST",
-    )
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            body = resp.read().decode("utf-8", errors="replace")
-            current_app.logger.info(f"Resend response {resp.status}: {body}")
-    except urllib.error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace")
-        current_app.logger.error(f"Resend API error {exc.code}: {body}")
-        raise RuntimeError(f"Resend API error {exc.code}: {body}") from exc
+        status, body = await maybe_await(_post_json("resend", asynchronous)(
+            "/emails",
+            payload,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+                "User-Agent": "SmartServe/1.0",
+                "Accept": "application/json",
+            },
+        ))
     except Exception as exc:
         current_app.logger.error(f"Resend request failed: {exc}")
         raise RuntimeError(f"Resend request failed: {exc}") from exc
+    if status >= 400:
+        current_app.logger.error(f"Resend API error {status}: {body}")
+        raise RuntimeError(f"Resend API error {status}: {body}")
+    current_app.logger.info(f"Resend response {status}: {body}")
 
 
 # ── Send via SMTP ───────────────────────────────────────────────────
@@ -237,14 +285,46 @@ def _send_via_smtp(smtp_host, smtp_port, smtp_user, smtp_pass, from_addr, to_ema
             raise
 
 
-# ── Public helper ───────────────────────────────────────────────────
-def send_otp_email(to_email: str, otp: str) -> None:
-    """Send a premium branded 6-digit OTP email.
+async def _send_via_smtp_async(*args, asynchronous=False):
+    """SMTP send; in a worker thread when *asynchronous* (smtplib blocks)."""
+    if asynchronous:
+        await asyncio.to_thread(_send_via_smtp, *args)
+    else:
+        _send_via_smtp(*args)
 
-    Uses Resend (HTTP) if RESEND_API_KEY is set, otherwise falls back to SMTP.
-    """
+
+# ── Provider circuit breakers ───────────────────────────────────────
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Return the per-process circuit breaker for *provider*."""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            cfg = current_app.config
+            breaker = CircuitBreaker(
+                provider,
+                failure_threshold=cfg.get("EMAIL_BREAKER_FAILURES", 3),
+                reset_timeout=cfg.get("EMAIL_BREAKER_RESET_SECONDS", 60),
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def breaker_states() -> dict:
+    """Snapshot of every provider breaker created so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+# ── Public helpers ──────────────────────────────────────────────────
+@traced(name="email.build_otp_email")
+def build_otp_email(otp: str) -> tuple[str, str, str]:
+    """Return (subject, html, text) for a premium branded OTP email."""
     cfg = current_app.config
-    from_name = cfg.get("SMTP_FROM_NAME", "SmartServe")
 
     # Build logo URL from backend's public URL
     base_url = cfg.get("RENDER_EXTERNAL_URL", "http://localhost:5000")
@@ -262,51 +342,97 @@ def send_otp_email(to_email: str, otp: str) -> None:
         f"Never share this code with anyone.\n\n"
         f"— SmartServe Team\n"
     )
+    return subject, html, text
+
+
+def _configured_providers(to_email, subject, html, text, asynchronous=False) -> list:
+    """Return [(name, send_coroutine_fn)] for every configured provider, in priority order."""
+    cfg = current_app.config
+    from_name = cfg.get("SMTP_FROM_NAME", "SmartServe")
+    providers = []
 
     # ── Strategy 1: Brevo (HTTP API — free, sends to ANY email) ──
     brevo_key = cfg.get("BREVO_API_KEY", "")
     brevo_sender = cfg.get("BREVO_SENDER_EMAIL", "")
-    api_failed = False
     if brevo_key and brevo_sender:
-        try:
-            _send_via_brevo(brevo_key, brevo_sender, from_name, to_email, subject, html, text)
-            current_app.logger.info(f"OTP email sent to {to_email} via Brevo")
-            return
-        except Exception as exc:
-            current_app.logger.error(f"Brevo failed for {to_email}: {exc} — trying Resend")
-            api_failed = True
+        providers.append(("brevo", lambda: _send_via_brevo(
+            brevo_key, brevo_sender, from_name, to_email, subject, html, text,
+            asynchronous=asynchronous)))
 
     # ── Strategy 2: Resend (HTTP API — needs verified domain for non-owner emails)
     resend_key = cfg.get("RESEND_API_KEY", "")
     if resend_key:
         resend_from = cfg.get("RESEND_FROM", "") or f"{from_name} <onboarding@resend.dev>"
-        try:
-            _send_via_resend(resend_key, resend_from, to_email, subject, html, text)
-            current_app.logger.info(f"OTP email sent to {to_email} via Resend")
-            return
-        except Exception as exc:
-            current_app.logger.error(f"Resend failed for {to_email}: {exc} — falling back to SMTP")
-            api_failed = True
+        providers.append(("resend", lambda: _send_via_resend(
+            resend_key, resend_from, to_email, subject, html, text,
+            asynchronous=asynchronous)))
 
     # ── Strategy 3: SMTP (fallback — local dev, blocked on Render free tier) ───
-    smtp_host = cfg.get("SMTP_HOST", "smtp.gmail.com")
-    smtp_port = cfg.get("SMTP_PORT", 465)
     smtp_user = cfg.get("SMTP_USER", "")
     smtp_pass = cfg.get("SMTP_PASSWORD", "")
+    if smtp_user and smtp_pass:
+        smtp_host = cfg.get("SMTP_HOST", "smtp.gmail.com")
+        smtp_port = cfg.get("SMTP_PORT", 465)
+        from_addr = f"{from_name} <{smtp_user}>"
+        providers.append(("smtp", lambda: _send_via_smtp_async(
+            smtp_host, smtp_port, smtp_user, smtp_pass, from_addr, to_email, subject, html, text,
+            asynchronous=asynchronous)))
+
+    return providers
+
+
+def deliver_email(to_email: str, subject: str, html: str, text: str) -> str | None:
+    """Try each configured provider in order and return the one that delivered.
+
+    Providers whose circuit breaker is open are skipped without waiting on
+    their timeout. Returns None when no provider is configured; raises
+    RuntimeError when every configured provider failed or was skipped.
+    """
+    return run_sync(_deliver(to_email, subject, html, text, asynchronous=False))
+
 
-    if not smtp_user or not smtp_pass:
-        if api_failed:
-            raise RuntimeError("Could not send OTP email. Please try again later.")
+async def deliver_email_async(to_email: str, subject: str, html: str, text: str) -> str | None:
+    """``deliver_email`` for the event loop (ASGI mode)."""
+    return await _deliver(to_email, subject, html, text, asynchronous=True)
+
+
+async def _deliver(to_email, subject, html, text, asynchronous) -> str | None:
+    providers = _configured_providers(to_email, subject, html, text, asynchronous)
+    if not providers:
         current_app.logger.warning(
-            "Neither RESEND_API_KEY nor SMTP credentials configured — "
-            "OTP email NOT sent."
+            "No email provider (Brevo, Resend or SMTP) configured — OTP email NOT sent."
         )
-        return
+        return None
 
-    from_addr = f"{from_name} <{smtp_user}>"
-    try:
-        _send_via_smtp(smtp_host, smtp_port, smtp_user, smtp_pass, from_addr, to_email, subject, html, text)
-        current_app.logger.info(f"OTP email sent to {to_email} via SMTP")
-    except Exception as exc:
-        current_app.logger.error(f"SMTP failed for {to_email}: {exc}")
-        raise RuntimeError("Could not send OTP email. Please try again later.") from exc
+    for name, send in providers:
+        breaker = get_breaker(name)
+        if not breaker.allow():
+            current_app.logger.warning(f"{name} circuit open — skipping for {to_email}")
+            continue
+        try:
+            with span(f"email.send {name}", kind="email"), track_email_send(name):
+                await send()
+        except Exception as exc:
+            breaker.record_failure()
+            current_app.logger.error(f"{name} failed for {to_email}: {exc}")
+            continue
+        breaker.record_success()
+        current_app.logger.info(f"OTP email sent to {to_email} via {name}")
+        return name
+
+    raise RuntimeError("Could not send OTP email. Please try again later.")
+
+
+def send_otp_email(to_email: str, otp: str) -> str | None:
+    """Send a premium branded 6-digit OTP email synchronously.
+
+    Tries Brevo, then Resend, then SMTP; returns the provider used.
+    """
+    subject, html, text = build_otp_email(otp)
+    return deliver_email(to_email, subject, html, text)
+
+
+async def send_otp_email_async(to_email: str, otp: str) -> str | None:
+    """``send_otp_email`` without blocking the event loop (ASGI mode)."""
+    subject, html, text = build_otp_email(otp)
+    return await deliver_email_async(to_email, subject, html, text)
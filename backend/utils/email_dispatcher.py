@@ -0,0 +1,201 @@
+"""Background OTP email delivery.
+
+``/api/auth/login`` only stores the OTP and enqueues a delivery job; a
+small pool of daemon threads builds the email and sends it through
+``utils.email.deliver_email`` (which applies the provider circuit
+breakers). Failed jobs are retried with exponential backoff.
+
+Delivery status is written to a TTL store, so it can be queried from any
+worker when the store is the shared SQLite backend.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from utils.email import build_otp_email, deliver_email
+from utils.tracing import current_trace_id, get_tracer
+from utils.ttl_store import TTLStore, MemoryTTLStore
+
+logger = logging.getLogger(__name__)
+
+STATUS_TTL_SECONDS = 15 * 60
+
+# Delivery states
+QUEUED = "queued"
+SENDING = "sending"
+RETRYING = "retrying"
+SENT = "sent"
+FAILED = "failed"
+
+
+class EmailQueueFull(RuntimeError):
+    """Raised when the delivery queue is at capacity."""
+
+
+class EmailDispatcher:
+    """Bounded queue plus worker threads that deliver OTP emails."""
+
+    def __init__(self, app, status_store: TTLStore | None = None, workers: int = 2,
+                 queue_size: int = 200, max_attempts: int = 3, backoff_seconds: float = 2.0):
+        self.app = app
+        self.status_store = status_store or MemoryTTLStore()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: list[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._pending_retries = 0
+        self.sent = 0
+        self.failed = 0
+
+    # ── Lifecycle ───────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        """Start worker threads on first use (after gunicorn has forked)."""
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, daemon=True, name=f"email-worker-{i}"
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    # ── Public API ──────────────────────────────────────────────────
+    def submit(self, to_email: str, otp: str) -> str:
+        """Queue an OTP email and return its delivery id.
+
+        Raises EmailQueueFull when the queue is at capacity.
+        """
+        self._ensure_started()
+        delivery_id = uuid.uuid4().hex
+        job = {"id": delivery_id, "to": to_email, "otp": otp, "attempt": 0,
+               "trace_id": current_trace_id()}
+        self._set_status(delivery_id, QUEUED, attempts=0)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._set_status(delivery_id, FAILED, attempts=0, error="queue full")
+            raise EmailQueueFull("Email service is busy. Please try again shortly.")
+        return delivery_id
+
+    def get_status(self, delivery_id: str) -> dict | None:
+        """Return ``{status, attempts, provider, error, updated_at}`` or None."""
+        return self.status_store.get(f"delivery:{delivery_id}")
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "pending_retries": self._pending_retries,
+            "workers": len(self._threads),
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+    # ── Internals ───────────────────────────────────────────────────
+    def _set_status(self, delivery_id: str, status: str, attempts: int,
+                    provider: str | None = None, error: str | None = None) -> None:
+        self.status_store.set(
+            f"delivery:{delivery_id}",
+            {
+                "status": status,
+                "attempts": attempts,
+                "provider": provider,
+                "error": error,
+                "updated_at": time.time(),
+            },
+            ttl=STATUS_TTL_SECONDS,
+        )
+
+    def _bump(self, counter: str, delta: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + delta)
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            # Continue the submitting request's trace (same trace id) if it had one
+            tracer = get_tracer()
+            token = tracer.start("email.deliver", job["trace_id"], force=job["trace_id"] is not None)
+            try:
+                with self.app.app_context():
+                    self._process(job)
+            except Exception:  # noqa: BLE001 — never let a worker die
+                logger.exception("Email worker crashed on delivery %s", job["id"])
+            finally:
+                tracer.finish(token, delivery_id=job["id"], attempt=job["attempt"])
+                self._queue.task_done()
+
+    def _process(self, job: dict) -> None:
+        job["attempt"] += 1
+        self._set_status(job["id"], SENDING, attempts=job["attempt"])
+        try:
+            subject, html, text = build_otp_email(job["otp"])
+            provider = deliver_email(job["to"], subject, html, text)
+        except Exception as exc:  # noqa: BLE001
+            if job["attempt"] >= self.max_attempts:
+                self._bump("failed")
+                self._set_status(job["id"], FAILED, attempts=job["attempt"], error=str(exc))
+                return
+            self._set_status(job["id"], RETRYING, attempts=job["attempt"], error=str(exc))
+            self._schedule_retry(job)
+            return
+        if provider is None:
+            # Nothing configured to send through — retrying will not help
+            self._bump("failed")
+            self._set_status(job["id"], FAILED, attempts=job["attempt"],
+                             error="No email provider configured")
+            return
+        self._bump("sent")
+        self._set_status(job["id"], SENT, attempts=job["attempt"], provider=provider)
+
+    def _schedule_retry(self, job: dict) -> None:
+        delay = self.backoff_seconds * (2 ** (job["attempt"] - 1))
+        self._bump("_pending_retries")
+
+        def requeue():
+            self._bump("_pending_retries", -1)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._bump("failed")
+                self._set_status(job["id"], FAILED, attempts=job["attempt"],
+                                 error="queue full on retry")
+
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True
+        timer.start()
+
+
+_dispatcher: EmailDispatcher | None = None
+
+
+def init_email_dispatcher(app, status_store: TTLStore | None = None) -> EmailDispatcher | None:
+    """Create the dispatcher when EMAIL_ASYNC is enabled (otherwise None)."""
+    global _dispatcher
+    cfg = app.config
+    if not cfg.get("EMAIL_ASYNC", True):
+        _dispatcher = None
+        return None
+    _dispatcher = EmailDispatcher(
+        app,
+        status_store=status_store,
+        workers=cfg.get("EMAIL_WORKERS", 2),
+        queue_size=cfg.get("EMAIL_QUEUE_SIZE", 200),
+        max_attempts=cfg.get("EMAIL_MAX_ATTEMPTS", 3),
+        backoff_seconds=cfg.get("EMAIL_RETRY_BACKOFF_SECONDS", 2.0),
+    )
+    return _dispatcher
+
+
+def get_email_dispatcher() -> EmailDispatcher | None:
+    """Return the dispatcher, or None when email is sent synchronously."""
+    return _dispatcher
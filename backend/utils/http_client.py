@@ -0,0 +1,169 @@
+"""Shared keep-alive HTTP sessions for the email provider APIs.
+
+One ``httpx.Client`` per provider keeps TLS connections to
+api.brevo.com / api.resend.com open between OTPs, so only the first
+send after start-up (or after an idle period) pays the TCP + TLS
+handshake. Clients are thread-safe, bounded to a fixed pool size and use
+separate connect and read timeouts. Every request is timed so
+per-provider latency can be reported.
+
+In ASGI mode the same session also hands out an ``httpx.AsyncClient``
+(created on first use, same limits) for sends awaited on the event loop.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+
+# Number of recent request durations kept per provider for percentiles
+LATENCY_WINDOW = 512
+
+
+class LatencyStats:
+    """Request counters plus a sliding window of recent latencies."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._recent: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self._recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            requests, errors = self.requests, self.errors
+            total, peak = self.total_seconds, self.max_seconds
+
+        def pct(p: float) -> float | None:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1)
+
+        return {
+            "requests": requests,
+            "errors": errors,
+            "avg_ms": round(total / requests * 1000, 1) if requests else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(peak * 1000, 1) if requests else None,
+        }
+
+
+class ProviderSession:
+    """Pooled keep-alive client for one provider's API host."""
+
+    def __init__(self, name: str, base_url: str, pool_size: int = 4,
+                 connect_timeout: float = 3.0, read_timeout: float = 10.0):
+        self.name = name
+        self.base_url = base_url
+        self.stats = LatencyStats()
+        self._options = {
+            "base_url": base_url,
+            "timeout": httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=120.0,
+            ),
+        }
+        self._client = httpx.Client(**self._options)
+        self._async_client: httpx.AsyncClient | None = None
+
+    def post_json(self, path: str, payload: bytes, headers: dict) -> tuple[int, str]:
+        """POST *payload* and return (status code, body text).
+
+        Transport errors (connect/read timeouts, resets) propagate as
+        ``httpx.HTTPError``; HTTP error statuses are returned, not raised.
+        """
+        start = time.perf_counter()
+        ok = False
+        try:
+            resp = self._client.post(path, content=payload, headers=headers)
+            ok = resp.status_code < 400
+            return resp.status_code, resp.text
+        finally:
+            self.stats.record(time.perf_counter() - start, ok)
+
+    async def post_json_async(self, path: str, payload: bytes, headers: dict) -> tuple[int, str]:
+        """``post_json`` on the async client (ASGI mode)."""
+        client = self.async_client()
+        start = time.perf_counter()
+        ok = False
+        try:
+            resp = await client.post(path, content=payload, headers=headers)
+            ok = resp.status_code < 400
+            return resp.status_code, resp.text
+        finally:
+            self.stats.record(time.perf_counter() - start, ok)
+
+    def async_client(self) -> httpx.AsyncClient:
+        """The async client, created on first use."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(**self._options)
+        return self._async_client
+
+    def close(self) -> None:
+        """Close the sync client; the async one belongs to its event loop and is only dropped."""
+        self._client.close()
+        self._async_client = None
+
+    async def aclose(self) -> None:
+        """Close both clients, from the event loop the async one runs on."""
+        self._client.close()
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.aclose()
+
+
+_sessions: dict[str, ProviderSession] = {}
+_sessions_pid = os.getpid()
+_sessions_lock = threading.Lock()
+
+
+def get_session(name: str, base_url: str, pool_size: int = 4,
+                connect_timeout: float = 3.0, read_timeout: float = 10.0) -> ProviderSession:
+    """Return the shared session for *name*, creating it on first use.
+
+    Sessions are never shared across a fork: a gunicorn worker that
+    inherits the parent's sessions discards them and opens its own.
+    """
+    global _sessions_pid
+    with _sessions_lock:
+        if _sessions_pid != os.getpid():
+            _sessions.clear()  # dropped, not closed: the connections are the parent's
+            _sessions_pid = os.getpid()
+        session = _sessions.get(name)
+        if session is None:
+            session = ProviderSession(name, base_url, pool_size, connect_timeout, read_timeout)
+            _sessions[name] = session
+        return session
+
+
+async def aclose_sessions() -> None:
+    """Close and forget every session of this process (ASGI shutdown)."""
+    with _sessions_lock:
+        sessions = list(_sessions.values()) if _sessions_pid == os.getpid() else []
+        _sessions.clear()
+    for session in sessions:
+        await session.aclose()
+
+
+def session_stats() -> dict:
+    """Per-provider latency stats for every session opened so far."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    return {s.name: s.stats.snapshot() for s in sessions}
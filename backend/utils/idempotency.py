@@ -0,0 +1,197 @@
+"""Idempotency keys for retried writes (``POST /api/orders``).
+
+A client that times out and retries sends the same ``Idempotency-Key``
+header with every attempt. The first attempt for a (user, key) pair
+claims the key in a TTL store and runs the view; its response — status,
+media type and body — is stored for IDEMPOTENCY_TTL_SECONDS and replayed
+to every retry (with ``Idempotent-Replayed: true``) without calling the
+view or the database again. A retry that arrives while the first attempt
+is still running waits for its response, up to IDEMPOTENCY_WAIT_SECONDS,
+then gets ``409``. Reusing a key for a different request body is a
+``422``.
+
+A 5xx response or an exception releases the key so the client can retry,
+and a claim left behind by a crashed worker is taken over after
+IDEMPOTENCY_LOCK_SECONDS. Records live in a TTL store capped at
+IDEMPOTENCY_MAX_ENTRIES — the shared SQLite store when
+OTP_STORE_BACKEND=sqlite, so a retry that lands on another worker is
+answered from the same record.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import secrets
+import time
+
+from flask import Response, current_app, request
+
+from utils.aio import serving_asgi
+from utils.metrics import record_idempotency
+from utils.ttl_store import MemoryTTLStore, TTLStore
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+PENDING = "pending"
+DONE = "done"
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was first used for a different request."""
+
+
+class IdempotencyKeyInFlight(Exception):
+    """The first request with this key is still running."""
+
+
+def request_fingerprint() -> str:
+    """Digest of the current request's method, path and body (JSON compared canonically)."""
+    body = request.get_json(silent=True)
+    if body is None:
+        canonical = request.get_data()
+    else:
+        canonical = json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(f"{request.method} {request.path}\n".encode("utf-8"))
+    digest.update(canonical)
+    return digest.hexdigest()
+
+
+async def _sleep(seconds: float) -> None:
+    # WSGI coroutines must never suspend (see utils.aio.run_sync)
+    if serving_asgi():
+        await asyncio.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+
+class IdempotencyKeys:
+    """Claims, stored responses and replays for ``(scope, subject, key)`` triples."""
+
+    def __init__(self, store: TTLStore | None = None, ttl: float = 24 * 3600, lock_ttl: float = 60.0,
+                 wait_seconds: float = 10.0, poll_interval: float = 0.05):
+        self.store = store or MemoryTTLStore()
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+
+    @staticmethod
+    def store_key(scope: str, subject: str, key: str) -> str:
+        # Hashed so the stored key has a fixed length whatever the client sent
+        return f"{scope}:{subject}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+    def claim(self, store_key: str, fingerprint: str) -> tuple[bool, dict]:
+        """Claim *store_key* for a new attempt.
+
+        Returns ``(True, claim)`` when this request should run, else
+        ``(False, record)`` with the pending or finished record found.
+        """
+        record = self.store.get(store_key)
+        if record is not None and record["state"] == DONE:
+            return False, record
+        outcome = {}
+
+        def take(current):
+            # Runs atomically in the store
+            now = time.time()
+            if current is None or (current["state"] == PENDING
+                                   and now - current["claimed_at"] >= self.lock_ttl):
+                current = {"state": PENDING, "fingerprint": fingerprint,
+                           "claimed_at": now, "token": secrets.token_hex(8)}
+                outcome["claimed"] = True
+            outcome["record"] = current
+            return current
+
+        self.store.update(store_key, take, ttl=self.ttl)
+        return bool(outcome.get("claimed")), outcome["record"]
+
+    def complete(self, store_key: str, claim: dict, response: Response) -> None:
+        """Store *response* as the result of *claim*, replacing the pending record.
+
+        Skipped if another request has taken the key over, so retries keep
+        getting that request's response.
+        """
+        record = {
+            "state": DONE,
+            "fingerprint": claim["fingerprint"],
+            "status": response.status_code,
+            "mimetype": response.mimetype,
+            "body": base64.b64encode(response.get_data()).decode("ascii"),
+        }
+        self.store.update(
+            store_key,
+            lambda current: record if current and current.get("token") == claim["token"] else current,
+            ttl=self.ttl,
+        )
+
+    def release(self, store_key: str, claim: dict) -> None:
+        """Drop *claim* (unless another request has taken the key over) so a retry runs again."""
+        self.store.update(
+            store_key,
+            lambda current: None if current and current.get("token") == claim["token"] else current,
+        )
+
+    @staticmethod
+    def replay(record: dict) -> Response:
+        response = Response(base64.b64decode(record["body"]), status=record["status"],
+                            mimetype=record["mimetype"])
+        response.headers[REPLAYED_HEADER] = "true"
+        return response
+
+    async def execute(self, store_key: str, fingerprint: str, call) -> Response:
+        """Run ``await call()`` once per key and return its response; replay it for retries.
+
+        Raises ``IdempotencyKeyReused`` or ``IdempotencyKeyInFlight``.
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        waited = False
+        while True:
+            claimed, record = self.claim(store_key, fingerprint)
+            if claimed:
+                break
+            if record["fingerprint"] != fingerprint:
+                record_idempotency("reused")
+                raise IdempotencyKeyReused()
+            if record["state"] == DONE:
+                record_idempotency("waited" if waited else "replayed")
+                return self.replay(record)
+            if time.monotonic() >= deadline:
+                record_idempotency("in_flight")
+                raise IdempotencyKeyInFlight()
+            waited = True
+            await _sleep(self.poll_interval)
+
+        record_idempotency("new")
+        try:
+            response = current_app.make_response(await call())
+        except BaseException:
+            self.release(store_key, record)
+            raise
+        if response.status_code >= 500:
+            self.release(store_key, record)
+        else:
+            self.complete(store_key, record, response)
+        return response
+
+
+_keys: IdempotencyKeys | None = None
+
+
+def init_idempotency(app, store: TTLStore | None = None) -> IdempotencyKeys:
+    """Create the key registry from IDEMPOTENCY_* settings."""
+    global _keys
+    cfg = app.config
+    _keys = IdempotencyKeys(
+        store,
+        ttl=cfg.get("IDEMPOTENCY_TTL_SECONDS", 24 * 3600),
+        lock_ttl=cfg.get("IDEMPOTENCY_LOCK_SECONDS", 60.0),
+        wait_seconds=cfg.get("IDEMPOTENCY_WAIT_SECONDS", 10.0),
+    )
+    return _keys
+
+
+def get_idempotency_keys() -> IdempotencyKeys | None:
+    return _keys
@@ -0,0 +1,380 @@
+"""In-process metrics — request latency, database and email call stats.
+
+Every thread records into its own shard (plain dicts, no locks on the hot
+path); a scrape of ``/api/metrics`` merges the shards and renders the
+Prometheus text exposition format. Shards of threads that have exited
+are folded into a single retired shard so short-lived threads (retry
+timers, SSE streams) do not grow the registry.
+
+Counters are cumulative per process — with several gunicorn workers,
+Prometheus sums them across scrapes of each worker.
+"""
+
+import inspect
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+from utils.tracing import query_span
+
+# Seconds; the last bucket (+Inf) is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Database round-trips per HTTP request
+CALLS_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+# name -> (type, help)
+_METRIC_INFO = {
+    "http_requests_total": ("counter", "HTTP requests by endpoint, method and status code."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by endpoint."),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being handled."),
+    "http_request_db_calls": ("histogram", "Database round-trips (Supabase or Postgres) made per HTTP request."),
+    "supabase_requests_total": ("counter", "Supabase (PostgREST) calls by table, operation and outcome."),
+    "supabase_request_duration_seconds": ("histogram", "Supabase call latency by table and operation."),
+    "postgres_queries_total": ("counter", "Direct Postgres statements by table, operation and outcome."),
+    "postgres_query_duration_seconds": ("histogram", "Direct Postgres statement latency (pool wait excluded)."),
+    "email_send_total": ("counter", "Email provider send attempts by provider and outcome."),
+    "email_send_duration_seconds": ("histogram", "Email provider send latency."),
+    "jwt_claims_cache_total": ("counter", "Verified-JWT claims cache lookups by result (hit, miss, expired, revoked)."),
+    "http_compressed_responses_total": ("counter", "Compressed responses by encoding and source (fresh or cached)."),
+    "http_compression_bytes_in_total": ("counter", "Response bytes before compression by encoding."),
+    "http_compression_bytes_out_total": ("counter", "Response bytes after compression by encoding."),
+    "http_compression_cpu_seconds_total": ("counter", "Thread CPU time spent compressing responses by encoding."),
+    "rate_limited_requests_total": ("counter", "Requests rejected with 429 by rate limit rule and bucket scope (ip, email)."),
+    "admission_in_flight": ("gauge", "Requests holding an admission slot by endpoint class."),
+    "admission_queue_depth": ("gauge", "Requests waiting for an admission slot by endpoint class."),
+    "admission_wait_seconds": ("histogram", "Time queued requests waited for a slot (or until shed) by endpoint class."),
+    "admission_rejected_total": ("counter", "Requests shed by admission control by endpoint class and reason (queue_full = 429, deadline = 503)."),
+    "idempotency_requests_total": ("counter", "Requests with an Idempotency-Key by outcome (new, replayed, waited, in_flight, reused)."),
+}
+
+
+class _Shard:
+    """One thread's counters, gauges and histograms."""
+
+    __slots__ = ("counters", "histograms", "__weakref__")
+
+    def __init__(self):
+        self.counters: dict = {}     # (name, labels) -> float
+        self.histograms: dict = {}   # (name, labels) -> [bucket counts..., +Inf, sum]
+
+
+class MetricsRegistry:
+    """Per-thread sharded metric storage with merge-on-scrape."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()  # only taken for shard registration and scrapes
+        self._shards: list[tuple[weakref.ref, _Shard]] = []
+        self._retired = _Shard()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    # ── Recording (hot path, lock-free) ─────────────────────────────
+    def inc(self, name: str, labels: tuple = (), value: float = 1.0) -> None:
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: tuple, value: float, buckets: tuple = LATENCY_BUCKETS) -> None:
+        histograms = self._shard().histograms
+        key = (name, labels)
+        hist = histograms.get(key)
+        if hist is None:
+            hist = [0] * (len(buckets) + 1) + [0.0]
+            histograms[key] = hist
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                hist[i] += 1
+                break
+        else:
+            hist[len(buckets)] += 1
+        hist[-1] += value
+
+    # ── Scraping ────────────────────────────────────────────────────
+    @staticmethod
+    def _merge_into(target: _Shard, shard: _Shard) -> None:
+        for key, value in list(shard.counters.items()):
+            target.counters[key] = target.counters.get(key, 0.0) + value
+        for key, hist in list(shard.histograms.items()):
+            hist = list(hist)
+            existing = target.histograms.get(key)
+            if existing is None:
+                target.histograms[key] = hist
+            else:
+                target.histograms[key] = [a + b for a, b in zip(existing, hist)]
+
+    def collect(self) -> _Shard:
+        """Merge every shard into one snapshot (retiring dead threads' shards)."""
+        merged = _Shard()
+        with self._lock:
+            alive = []
+            for thread_ref, shard in self._shards:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    self._merge_into(self._retired, shard)
+                else:
+                    alive.append((thread_ref, shard))
+            self._shards = alive
+            self._merge_into(merged, self._retired)
+            for _ref, shard in alive:
+                self._merge_into(merged, shard)
+        return merged
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+# ── Instrumentation helpers ─────────────────────────────────────────
+def record_supabase_call(table: str, op: str, seconds: float, ok: bool) -> None:
+    labels = (("table", table), ("op", op))
+    _registry.inc("supabase_requests_total", labels + (("outcome", "ok" if ok else "error"),))
+    _registry.observe("supabase_request_duration_seconds", labels, seconds)
+    if has_request_context():
+        g._db_calls = g.get("_db_calls", 0) + 1
+
+
+def record_postgres_query(table: str, op: str, seconds: float, ok: bool) -> None:
+    labels = (("table", table), ("op", op))
+    _registry.inc("postgres_queries_total", labels + (("outcome", "ok" if ok else "error"),))
+    _registry.observe("postgres_query_duration_seconds", labels, seconds)
+    if has_request_context():
+        g._db_calls = g.get("_db_calls", 0) + 1
+
+
+@contextmanager
+def track_email_send(provider: str):
+    """Time one provider send attempt; the outcome follows the exception."""
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        _registry.inc("email_send_total", (("provider", provider), ("outcome", "ok" if ok else "error")))
+        _registry.observe("email_send_duration_seconds", (("provider", provider),),
+                          time.perf_counter() - start)
+
+
+def record_claims_cache(result: str) -> None:
+    _registry.inc("jwt_claims_cache_total", (("result", result),))
+
+
+def record_rate_limited(rule: str, scope: str) -> None:
+    _registry.inc("rate_limited_requests_total", (("rule", rule), ("scope", scope)))
+
+
+def record_admission_slot(cls: str, delta: int) -> None:
+    _registry.inc("admission_in_flight", (("class", cls),), float(delta))
+
+
+def record_admission_queue(cls: str, delta: int, waited: float | None = None) -> None:
+    """Track queue depth; *waited* is observed when a request leaves the queue."""
+    labels = (("class", cls),)
+    _registry.inc("admission_queue_depth", labels, float(delta))
+    if waited is not None:
+        _registry.observe("admission_wait_seconds", labels, waited)
+
+
+def record_admission_rejected(cls: str, reason: str) -> None:
+    _registry.inc("admission_rejected_total", (("class", cls), ("reason", reason)))
+
+
+def record_idempotency(outcome: str) -> None:
+    _registry.inc("idempotency_requests_total", (("outcome", outcome),))
+
+
+def record_compression(encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float,
+                       cached: bool = False) -> None:
+    labels = (("encoding", encoding),)
+    _registry.inc("http_compressed_responses_total", labels + (("source", "cached" if cached else "fresh"),))
+    _registry.inc("http_compression_bytes_in_total", labels, bytes_in)
+    _registry.inc("http_compression_bytes_out_total", labels, bytes_out)
+    if cpu_seconds:
+        _registry.inc("http_compression_cpu_seconds_total", labels, cpu_seconds)
+
+
+def compression_ratio() -> float | None:
+    """Compressed / original bytes over all compressed responses (None before the first)."""
+    counters = _registry.collect().counters
+    bytes_in = sum(v for (name, _), v in counters.items() if name == "http_compression_bytes_in_total")
+    bytes_out = sum(v for (name, _), v in counters.items() if name == "http_compression_bytes_out_total")
+    return round(bytes_out / bytes_in, 4) if bytes_in else None
+
+
+class _InstrumentedBuilder:
+    """Wraps a postgrest request builder so ``execute()`` is timed and traced."""
+
+    __slots__ = ("_builder", "_table", "_op")
+
+    def __init__(self, builder, table: str, op: str | None):
+        self._builder = builder
+        self._table = table
+        self._op = op
+
+    def execute(self, *args, **kwargs):
+        if inspect.iscoroutinefunction(self._builder.execute):
+            return self._execute_async(*args, **kwargs)
+        op = self._op or "select"
+        start = time.perf_counter()
+        ok = False
+        try:
+            with query_span(self._table, op, self._builder):
+                result = self._builder.execute(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            record_supabase_call(self._table, op, time.perf_counter() - start, ok)
+
+    async def _execute_async(self, *args, **kwargs):
+        """Same as ``execute`` for the builders of ``supabase.AsyncClient``."""
+        op = self._op or "select"
+        start = time.perf_counter()
+        ok = False
+        try:
+            with query_span(self._table, op, self._builder):
+                result = await self._builder.execute(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            record_supabase_call(self._table, op, time.perf_counter() - start, ok)
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                op = self._op
+                if op is None and name in ("select", "insert", "update", "upsert", "delete"):
+                    op = name
+                return _InstrumentedBuilder(result, self._table, op)
+            return result
+
+        return call
+
+
+class InstrumentedClient:
+    """Supabase client proxy that records every ``table()``/``rpc()`` call."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str):
+        return _InstrumentedBuilder(self._client.table(name), name, None)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict | None = None, *args, **kwargs):
+        builder = self._client.rpc(fn, params or {}, *args, **kwargs)
+        return _InstrumentedBuilder(builder, f"rpc:{fn}", "rpc")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# ── Flask request hooks ─────────────────────────────────────────────
+def _endpoint_label() -> str:
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def init_metrics(app) -> None:
+    """Register request hooks that time every request."""
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        g._metrics_endpoint = _endpoint_label()
+        _registry.inc("http_requests_in_flight", (("endpoint", g._metrics_endpoint),))
+
+    @app.after_request
+    def _metrics_record(response):
+        start = g.get("_metrics_start")
+        if start is not None:
+            endpoint = g._metrics_endpoint
+            _registry.inc("http_requests_total", (
+                ("endpoint", endpoint), ("method", request.method), ("status", str(response.status_code)),
+            ))
+            _registry.observe("http_request_duration_seconds", (("endpoint", endpoint),),
+                              time.perf_counter() - start)
+            _registry.observe("http_request_db_calls", (("endpoint", endpoint),),
+                              g.get("_db_calls", 0), buckets=CALLS_BUCKETS)
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(_exc):
+        endpoint = g.get("_metrics_endpoint")
+        if endpoint is not None:
+            _registry.inc("http_requests_in_flight", (("endpoint", endpoint),), -1.0)
+
+
+# ── Prometheus exposition ───────────────────────────────────────────
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels) + "}"
+
+
+def _fmt_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(extra_gauges: dict | None = None) -> str:
+    """Render every metric in Prometheus text format (version 0.0.4).
+
+    *extra_gauges* maps ``name -> (help, value)`` for point-in-time values
+    read at scrape time (queue depths, cache sizes).
+    """
+    snapshot = _registry.collect()
+    by_name: dict[str, list] = {}
+    for (name, labels), value in snapshot.counters.items():
+        by_name.setdefault(name, []).append((labels, value))
+    for (name, labels), hist in snapshot.histograms.items():
+        by_name.setdefault(name, []).append((labels, hist))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = _METRIC_INFO.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+            if kind != "histogram":
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_number(value)}")
+                continue
+            buckets = CALLS_BUCKETS if name == "http_request_db_calls" else LATENCY_BUCKETS
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', _fmt_number(bound)),))} {cumulative}")
+            cumulative += value[len(buckets)]
+            lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_number(value[-1])}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {cumulative}")
+
+    for name, (help_text, value) in sorted((extra_gauges or {}).items()):
+        if value is None:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_fmt_number(value)}")
+    return "\n".join(lines) + "\n"
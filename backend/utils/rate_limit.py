@@ -0,0 +1,137 @@
+"""Token-bucket rate limiting for the OTP endpoints.
+
+Every OTP request sends an email (Brevo's free tier allows 300 a day) and
+every verification is a guess at a 6-digit code, so ``/api/auth/login``,
+``/api/auth/admin-login`` and ``/api/auth/verify-otp`` are throttled per
+client IP and per email address. A rule such as ``"5/15m"`` is a bucket
+of 5 tokens refilled at 5 per 15 minutes: bursts up to the capacity are
+allowed, after that one request per refill interval.
+
+Buckets live in a TTL store — the shared SQLite store when
+OTP_STORE_BACKEND=sqlite, so all workers draw from the same bucket — and
+are refilled and drawn from in one atomic ``update``. A bucket expires
+once it would be full again. Rejected requests get ``429`` with a
+``Retry-After`` header and are counted in ``/api/metrics``.
+"""
+
+import math
+import re
+import time
+
+from flask import request
+
+from utils.metrics import record_rate_limited
+from utils.ttl_store import MemoryTTLStore, TTLStore
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_RULE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$")
+
+
+def parse_rule(spec: str) -> tuple[int, float] | None:
+    """``"5/15m"`` -> ``(5, 300.0)``: capacity and seconds per token; None for ``""``/``"0"``."""
+    if not spec or spec.strip() == "0":
+        return None
+    match = _RULE_RE.match(spec)
+    if match is None:
+        raise ValueError(f"Invalid rate limit {spec!r} (expected e.g. '5/15m', '20/m')")
+    capacity = int(match.group(1))
+    if capacity == 0:
+        return None
+    period = int(match.group(2) or 1) * _PERIODS[match.group(3)]
+    return capacity, period / capacity
+
+
+class TokenBucketLimiter:
+    """Named rules, each with an optional per-IP and per-email bucket."""
+
+    def __init__(self, store: TTLStore | None = None, rules: dict | None = None, proxy_hops: int = 0):
+        self.store = store or MemoryTTLStore()
+        # rule -> {"ip": (capacity, seconds per token), "email": ...}
+        self.rules = {
+            name: {scope: parsed for scope, spec in scopes.items() if (parsed := parse_rule(spec))}
+            for name, scopes in (rules or {}).items()
+        }
+        self.proxy_hops = proxy_hops
+
+    def take(self, key: str, capacity: int, interval: float) -> float:
+        """Draw one token from bucket *key*; 0 if allowed, else seconds until one is available."""
+        outcome = {"wait": 0.0}
+
+        def draw(state):
+            # Runs atomically in the store; state is [tokens, updated_at]
+            now = time.time()
+            tokens, updated_at = state if state is not None else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated_at) / interval)
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                outcome["wait"] = (1 - tokens) * interval
+            return [tokens, now]
+
+        self.store.update(key, draw, ttl=capacity * interval)
+        return outcome["wait"]
+
+    def check(self, rule: str, ip: str | None, email: str | None) -> float:
+        """Draw from *rule*'s IP bucket, then its email bucket; returns the wait (0 = allowed)."""
+        for scope, subject in (("ip", ip), ("email", email)):
+            limit = self.rules.get(rule, {}).get(scope)
+            if limit is None or not subject:
+                continue
+            wait = self.take(f"{rule}:{scope}:{subject}", *limit)
+            if wait > 0:
+                record_rate_limited(rule, scope)
+                return wait
+        return 0.0
+
+    def client_ip(self) -> str | None:
+        """The request's client address, from X-Forwarded-For behind *proxy_hops* proxies."""
+        if self.proxy_hops > 0:
+            forwarded = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",")
+                         if hop.strip()]
+            if len(forwarded) >= self.proxy_hops:
+                return forwarded[-self.proxy_hops]
+        return request.remote_addr
+
+    def check_request(self, rule: str) -> float:
+        """``check`` for the current request, the email taken from its JSON body."""
+        body = request.get_json(force=True, silent=True)
+        email = body.get("email") if isinstance(body, dict) else None
+        email = email.strip().lower() if isinstance(email, str) else None
+        return self.check(rule, self.client_ip(), email)
+
+
+def retry_after_seconds(wait: float) -> int:
+    """Whole seconds for a ``Retry-After`` header (at least 1)."""
+    return max(1, math.ceil(wait))
+
+
+_limiter: TokenBucketLimiter | None = None
+
+
+def init_rate_limiter(app, store: TTLStore | None = None) -> TokenBucketLimiter | None:
+    """Create the limiter when RATE_LIMIT_ENABLED is set (otherwise None)."""
+    global _limiter
+    cfg = app.config
+    if not cfg.get("RATE_LIMIT_ENABLED", True):
+        _limiter = None
+        return None
+    _limiter = TokenBucketLimiter(
+        store,
+        rules={
+            "otp_send": {
+                "ip": cfg.get("RATE_LIMIT_OTP_SEND_PER_IP", ""),
+                "email": cfg.get("RATE_LIMIT_OTP_SEND_PER_EMAIL", ""),
+            },
+            "otp_verify": {
+                "ip": cfg.get("RATE_LIMIT_OTP_VERIFY_PER_IP", ""),
+                "email": cfg.get("RATE_LIMIT_OTP_VERIFY_PER_EMAIL", ""),
+            },
+        },
+        proxy_hops=cfg.get("RATE_LIMIT_PROXY_HOPS", 0),
+    )
+    return _limiter
+
+
+def get_rate_limiter() -> TokenBucketLimiter | None:
+    """Return the limiter, or None when rate limiting is off."""
+    return _limiter
@@ -1,17 +1,39 @@
-from flask import jsonify
+from flask import Response, has_request_context, request
 
+from utils.serializers import JSON_MIMETYPE, encode_envelope, negotiate, offered_mimetypes
 
-def success_response(data=None, message="Success", status_code=200):
-    """Return a standardised success JSON response."""
+
+def response_mimetype() -> str:
+    """Media type this request's responses are encoded as (from ``Accept``)."""
+    return negotiate(request.accept_mimetypes) if has_request_context() else JSON_MIMETYPE
+
+
+def _encoded_response(payload: dict, status_code: int) -> tuple[Response, int]:
+    mimetype = response_mimetype()
+    response = Response(encode_envelope(payload, mimetype), status=status_code, mimetype=mimetype)
+    if len(offered_mimetypes()) > 1:
+        response.vary.add("Accept")
+    return response, status_code
+
+
+def success_response(data=None, message="Success", status_code=200, meta=None):
+    """Return a standardised success JSON (or MessagePack) response.
+
+    *meta* carries envelope-level extras such as pagination cursors.
+    *data* may be a ``utils.serializers.Serialized`` whose cached bytes
+    are used as-is.
+    """
     payload = {"success": True, "message": message}
     if data is not None:
         payload["data"] = data
-    return jsonify(payload), status_code
+    if meta is not None:
+        payload["meta"] = meta
+    return _encoded_response(payload, status_code)
 
 
 def error_response(message="Something went wrong", status_code=400, errors=None):
-    """Return a standardised error JSON response."""
+    """Return a standardised error JSON (or MessagePack) response."""
     payload = {"success": False, "message": message}
     if errors:
         payload["errors"] = errors
-    return jsonify(payload), status_code
+    return _encoded_response(payload, status_code)
@@ -0,0 +1,150 @@
+"""Response body serializers — fast JSON, optional MessagePack.
+
+``success_response`` / ``error_response`` encode their envelope with the
+serializer negotiated from the request's ``Accept`` header:
+
+  * ``application/json`` (default) — orjson when it is installed,
+    otherwise the stdlib encoder with the same compact, UTF-8 output.
+  * ``application/msgpack`` — only offered when ``msgpack`` is installed
+    and RESPONSE_MSGPACK is on; clients must ask for it explicitly.
+
+Values that are served many times unchanged (the cached menu) can be
+wrapped in ``Serialized``: each format is encoded once and the bytes are
+spliced into every later envelope without re-encoding.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON only
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+def _default(obj):
+    """Types neither encoder handles natively (Decimal from Postgres, etc.)."""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def _dumps_stdlib(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def _dumps_orjson(obj) -> bytes:
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _dumps_msgpack(obj) -> bytes:
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def _msgpack_map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes((0x80 | size,))
+    if size < 1 << 16:
+        return b"\xde" + size.to_bytes(2, "big")
+    return b"\xdf" + size.to_bytes(4, "big")
+
+
+def _json_envelope(parts: list[tuple[bytes, bytes]]) -> bytes:
+    return b"{" + b",".join(key + b":" + value for key, value in parts) + b"}"
+
+
+def _msgpack_envelope(parts: list[tuple[bytes, bytes]]) -> bytes:
+    return _msgpack_map_header(len(parts)) + b"".join(key + value for key, value in parts)
+
+
+# mimetype -> (dumps, envelope builder); filled by init_serializers()
+_serializers: dict = {}
+_offered: list[str] = [JSON_MIMETYPE]
+
+
+def init_serializers(json_encoder: str = "auto", msgpack_enabled: bool = True) -> None:
+    """Pick the JSON encoder ("auto", "orjson" or "stdlib") and whether to offer MessagePack."""
+    if json_encoder == "orjson" and orjson is None:
+        raise RuntimeError("RESPONSE_JSON_ENCODER=orjson but orjson is not installed")
+    if json_encoder not in ("auto", "orjson", "stdlib"):
+        raise ValueError(f"Unknown RESPONSE_JSON_ENCODER {json_encoder!r}")
+    use_orjson = orjson is not None and json_encoder != "stdlib"
+    _serializers.clear()
+    _serializers[JSON_MIMETYPE] = (_dumps_orjson if use_orjson else _dumps_stdlib, _json_envelope)
+    offered = [JSON_MIMETYPE]
+    if msgpack_enabled and msgpack is not None:
+        _serializers[MSGPACK_MIMETYPE] = (_dumps_msgpack, _msgpack_envelope)
+        offered.append(MSGPACK_MIMETYPE)
+    _offered[:] = offered
+
+
+def json_encoder_name() -> str:
+    """"orjson" or "stdlib" — the encoder behind application/json."""
+    return "orjson" if _serializers[JSON_MIMETYPE][0] is _dumps_orjson else "stdlib"
+
+
+def offered_mimetypes() -> list[str]:
+    """Media types responses can be encoded as, JSON first."""
+    return list(_offered)
+
+
+def negotiate(accept) -> str:
+    """Best offered media type for a ``request.accept_mimetypes``; JSON on ties."""
+    if len(_offered) == 1 or accept is None:
+        return JSON_MIMETYPE
+    return accept.best_match(_offered, default=JSON_MIMETYPE)
+
+
+def dumps(obj, mimetype: str = JSON_MIMETYPE) -> bytes:
+    """Encode *obj* as *mimetype*."""
+    return _serializers[mimetype][0](obj)
+
+
+class Serialized:
+    """A value whose encoding per media type is computed once and reused.
+
+    Safe to share between threads: two threads encoding the same format
+    at once both produce identical bytes and one of them is kept.
+    """
+
+    __slots__ = ("value", "_encoded")
+
+    def __init__(self, value):
+        self.value = value
+        self._encoded: dict[str, bytes] = {}
+
+    def encoded(self, mimetype: str = JSON_MIMETYPE) -> bytes:
+        body = self._encoded.get(mimetype)
+        if body is None:
+            body = self._encoded[mimetype] = dumps(self.value, mimetype)
+        return body
+
+
+def encode_envelope(payload: dict, mimetype: str = JSON_MIMETYPE) -> bytes:
+    """Encode a response envelope, splicing in ``Serialized`` values as-is."""
+    dump, envelope = _serializers[mimetype]
+    if not any(isinstance(value, Serialized) for value in payload.values()):
+        return dump(payload)
+    return envelope([
+        (dump(key), value.encoded(mimetype) if isinstance(value, Serialized) else dump(value))
+        for key, value in payload.items()
+    ])
+
+
+init_serializers()
@@ -0,0 +1,156 @@
+"""Verified-JWT claims cache and token revocation.
+
+Access tokens live for JWT_EXPIRY_HOURS and the kitchen screens send the
+same one with every request, so ``CachingJWTManager`` keeps the claims of
+tokens it has already verified in a bounded LRU keyed by a SHA-256 digest
+of the token. A hit skips the signature check; an entry is dropped once
+the token's ``exp`` passes or it has been revoked.
+
+``RevocationList`` holds revoked token ids (``jti``) and per-user
+"revoked before" marks in a TTL store — the shared SQLite store when
+OTP_STORE_BACKEND=sqlite, so a logout is seen by every worker. Entries
+expire with the tokens they revoke. It is consulted once per request:
+by the cache on a hit, by the manager after verifying a token otherwise.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import jwt as pyjwt
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.exceptions import RevokedTokenError
+
+from utils.metrics import record_claims_cache
+from utils.ttl_store import MemoryTTLStore, TTLStore
+
+
+class RevocationList:
+    """Revoked token ids and users, each kept until the tokens it covers expire."""
+
+    def __init__(self, store: TTLStore | None = None, token_lifetime: float = 24 * 3600):
+        self.store = store or MemoryTTLStore()
+        self.token_lifetime = token_lifetime
+
+    def revoke_token(self, jti: str, expires_at: float) -> None:
+        """Revoke one token until its ``exp``."""
+        self.store.set(f"jti:{jti}", True, ttl=max(1.0, expires_at - time.time()))
+
+    def revoke_user(self, user_id: str) -> None:
+        """Revoke every token issued to *user_id* before the current second.
+
+        ``iat`` has whole-second resolution, so a token issued later in
+        the same second (a login right after the logout) stays valid.
+        """
+        self.store.set(f"user:{user_id}", math.floor(time.time()), ttl=self.token_lifetime)
+
+    def is_revoked(self, claims: dict) -> bool:
+        if self.store.get(f"jti:{claims.get('jti')}") is not None:
+            return True
+        revoked_before = self.store.get(f"user:{claims.get('sub')}")
+        return revoked_before is not None and claims.get("iat", 0) < revoked_before
+
+
+class ClaimsCache:
+    """Thread-safe LRU of verified claims, at most *maxsize* tokens."""
+
+    def __init__(self, maxsize: int = 1024, revocations: RevocationList | None = None):
+        self.maxsize = maxsize
+        self.revocations = revocations
+        self._data: OrderedDict = OrderedDict()  # token digest -> claims
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> dict | None:
+        """Claims of a previously verified, unexpired, unrevoked *token*; else None."""
+        key = self._digest(token)
+        with self._lock:
+            claims = self._data.get(key)
+            if claims is not None:
+                self._data.move_to_end(key)
+        if claims is None:
+            result = "miss"
+        elif claims.get("exp", 0) <= time.time():
+            result = "expired"
+        elif self.revocations is not None and self.revocations.is_revoked(claims):
+            result = "revoked"
+        else:
+            result = "hit"
+        with self._lock:
+            if result == "hit":
+                self.hits += 1
+            else:
+                self.misses += 1
+                if claims is not None:
+                    self._data.pop(key, None)
+        record_claims_cache(result)
+        return claims if result == "hit" else None
+
+    def put(self, token: str, claims: dict) -> None:
+        key = self._digest(token)
+        with self._lock:
+            self._data[key] = claims
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager whose token decoding goes through a ``ClaimsCache``.
+
+    Every flask-jwt-extended entry point (``@jwt_required``,
+    ``verify_jwt_in_request`` in ``role_required``) decodes through
+    ``_decode_jwt_from_config``. A freshly verified token is checked
+    against the revocation list before it is cached (a cache hit was
+    checked by the cache); a revoked one raises ``RevokedTokenError``,
+    answered by the ``revoked_token_loader`` callback. Callers get a copy
+    of the claims so they cannot alter the cached entry.
+    """
+
+    claims_cache: ClaimsCache | None = None
+    revocations: RevocationList | None = None
+
+    def _decode_jwt_from_config(self, encoded_token: str, csrf_value=None, allow_expired: bool = False) -> dict:
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        cache = self.claims_cache
+        claims = cache.get(encoded_token) if cache is not None else None
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            if self.revocations is not None and self.revocations.is_revoked(claims):
+                raise RevokedTokenError(pyjwt.get_unverified_header(encoded_token), claims)
+            if cache is not None:
+                cache.put(encoded_token, claims)
+        return dict(claims)
+
+
+def init_token_cache(manager: CachingJWTManager, store: TTLStore | None = None,
+                     maxsize: int = 1024, token_lifetime: float = 24 * 3600) -> ClaimsCache | None:
+    """Install the revocation list and (when *maxsize* > 0) the claims cache on *manager*."""
+    manager.revocations = RevocationList(store, token_lifetime)
+    manager.claims_cache = ClaimsCache(maxsize, manager.revocations) if maxsize > 0 else None
+    return manager.claims_cache
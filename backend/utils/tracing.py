@@ -0,0 +1,395 @@
+"""Lightweight request tracing — spans from route to service to Supabase/email.
+
+A trace is started per HTTP request (and per background email job) and
+kept in a context variable. Spans are recorded by:
+
+* ``@traced`` on service functions,
+* the instrumented Supabase client (one span per ``.execute()``),
+* ``utils.email`` around message building and each provider attempt.
+
+When a trace finishes it is checked for repeated queries (same table,
+operation and filter columns — the N+1 pattern — and exact duplicates),
+slow spans are flagged, and the trace is kept in a small in-memory ring
+and optionally appended to a JSONL file by a background writer.
+
+Tracing is switched at runtime via ``get_tracer().configure()``. When it
+is off no trace is created, so ``@traced`` and the query hook reduce to a
+single context-variable lookup.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS_PER_TRACE = 500
+RECENT_TRACES = 50
+EXPORT_QUEUE_SIZE = 1000
+_STOP_EXPORT = object()  # queued by _JsonlExporter.stop()
+
+_TRACE_ID_RE = re.compile(r"^[0-9a-fA-F-]{8,36}$")
+_current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Spans recorded for one request or background job."""
+
+    __slots__ = ("trace_id", "name", "started_at", "_t0", "spans", "dropped_spans",
+                 "_stack", "_shapes", "_exact", "attrs")
+
+    def __init__(self, name: str, trace_id: str | None = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: list[dict] = []
+        self.dropped_spans = 0
+        self._stack: list[int] = []
+        self._shapes: Counter = Counter()
+        self._exact: Counter = Counter()
+        self.attrs: dict = {}
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs):
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped_spans += 1
+            yield None
+            return
+        span = {
+            "span_id": len(self.spans) + 1,
+            "parent_id": self._stack[-1] if self._stack else None,
+            "name": name,
+            "kind": kind,
+            "start_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+        }
+        if attrs:
+            span["attrs"] = attrs
+        self.spans.append(span)
+        self._stack.append(span["span_id"])
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as exc:
+            span["error"] = f"{type(exc).__name__}: {exc}"[:200]
+            raise
+        finally:
+            span["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self._stack.pop()
+
+    def note_query(self, shape: str, exact: str) -> None:
+        self._shapes[shape] += 1
+        self._exact[exact] += 1
+
+    def finish(self, slow_span_ms: float, n_plus_one_threshold: int) -> dict:
+        duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+        slow = []
+        for span in self.spans:
+            if span.get("duration_ms", 0) >= slow_span_ms:
+                span["slow"] = True
+                slow.append(span["span_id"])
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": duration_ms,
+            **self.attrs,
+            "span_count": len(self.spans),
+            "dropped_spans": self.dropped_spans,
+            "slow_spans": slow,
+            "n_plus_one": [
+                {"query": shape, "count": count}
+                for shape, count in self._shapes.items() if count >= n_plus_one_threshold
+            ],
+            "duplicate_queries": [
+                {"query": query, "count": count}
+                for query, count in self._exact.items() if count > 1
+            ],
+            "spans": self.spans,
+        }
+
+
+class _JsonlExporter:
+    """Appends finished traces to a JSONL file from a background thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="trace-exporter")
+        self._thread.start()
+
+    def submit(self, record: dict) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        """Let the thread write what is queued so far, then exit."""
+        self._queue.put(_STOP_EXPORT)  # waits only while a full queue is being written
+
+    def _run(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            while records[-1] is not _STOP_EXPORT and not self._queue.empty():
+                records.append(self._queue.get_nowait())
+            stopping = records[-1] is _STOP_EXPORT
+            if stopping:
+                records.pop()
+            if records:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as fh:
+                        for record in records:
+                            fh.write(json.dumps(record, default=str) + "\n")
+                except Exception:  # noqa: BLE001 — never let the exporter die
+                    logger.exception("Could not write traces to %s", self.path)
+            if stopping:
+                return
+
+
+class Tracer:
+    """Holds the runtime switch, thresholds, recent traces and exporter."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.slow_span_ms = 500.0
+        self.n_plus_one_threshold = 3
+        self.export_path = ""
+        self.finished = 0
+        self._recent: deque = deque(maxlen=RECENT_TRACES)
+        self._exporter: _JsonlExporter | None = None
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool | None = None, sample_rate: float | None = None,
+                  slow_span_ms: float | None = None, n_plus_one_threshold: int | None = None,
+                  export_path: str | None = None) -> dict:
+        """Update any subset of settings (takes effect for the next trace)."""
+        with self._lock:
+            if enabled is not None:
+                self.enabled = bool(enabled)
+            if sample_rate is not None:
+                self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+            if slow_span_ms is not None:
+                self.slow_span_ms = float(slow_span_ms)
+            if n_plus_one_threshold is not None:
+                self.n_plus_one_threshold = max(2, int(n_plus_one_threshold))
+            replaced = None
+            if export_path is not None and export_path != self.export_path:
+                self.export_path = export_path
+                replaced = self._exporter
+                self._exporter = _JsonlExporter(export_path) if export_path else None
+        if replaced is not None:
+            replaced.stop()
+        return self.state()
+
+    def state(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_span_ms": self.slow_span_ms,
+            "n_plus_one_threshold": self.n_plus_one_threshold,
+            "export_path": self.export_path or None,
+            "finished_traces": self.finished,
+            "export_dropped": self._exporter.dropped if self._exporter else 0,
+        }
+
+    # ── Trace lifecycle ─────────────────────────────────────────────
+    def start(self, name: str, trace_id: str | None = None, force: bool = False):
+        """Start a trace in the current context; returns a reset token or None."""
+        if not self.enabled:
+            return None
+        if not force and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        return _current_trace.set(Trace(name, trace_id))
+
+    def finish(self, token, **attrs) -> dict | None:
+        """Finish the trace started with *token*, record and export it."""
+        if token is None:
+            return None
+        trace = _current_trace.get()
+        _current_trace.reset(token)
+        if trace is None:
+            return None
+        trace.attrs.update(attrs)
+        record = trace.finish(self.slow_span_ms, self.n_plus_one_threshold)
+        self.finished += 1
+        self._recent.append(record)
+        if record["n_plus_one"] or record["slow_spans"]:
+            logger.warning(
+                "trace %s %s took %.1f ms: %d slow span(s), repeated queries %s",
+                record["trace_id"], record["name"], record["duration_ms"],
+                len(record["slow_spans"]), [q["query"] for q in record["n_plus_one"]],
+            )
+        exporter = self._exporter
+        if exporter is not None:
+            exporter.submit(record)
+        return record
+
+    def recent(self, limit: int = 20) -> list[dict]:
+        """Summaries (without spans) of the most recent traces, newest first."""
+        traces = list(self._recent)[-limit:]
+        return [{k: v for k, v in t.items() if k != "spans"} for t in reversed(traces)]
+
+    def get(self, trace_id: str) -> list[dict]:
+        """Every recent record for *trace_id* — the request plus any email job it queued."""
+        return [record for record in list(self._recent) if record["trace_id"] == trace_id]
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def current_trace_id() -> str | None:
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+# ── Span helpers ────────────────────────────────────────────────────
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs):
+    """Record a span if a trace is active; otherwise do nothing."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name, kind, **attrs) as s:
+        yield s
+
+
+def traced(fn=None, *, name: str | None = None):
+    """Decorator recording a span named ``<module>.<function>`` per call.
+
+    Works on plain and ``async def`` functions alike.
+    """
+
+    def decorate(func):
+        span_name = name or f"{func.__module__.rpartition('.')[2]}.{func.__name__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return await func(*args, **kwargs)
+                with trace.span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with trace.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate(fn) if fn is not None else decorate
+
+
+def _query_fingerprints(table: str, op: str, request_config) -> tuple[str, str]:
+    """Return (shape, exact) strings for a postgrest request.
+
+    The shape keeps column names and operators but drops values, so
+    ``id=eq.1`` and ``id=eq.2`` count as the same query.
+    """
+    params = getattr(request_config, "params", None)
+    items = list(params.multi_items()) if params is not None else []
+    shape = "&".join(sorted(f"{k}={v.split('.', 1)[0]}" if k != "select" else f"select={v}"
+                            for k, v in items))
+    body = getattr(request_config, "json", None)
+    exact = "&".join(f"{k}={v}" for k, v in items)
+    if op == "rpc" and body:
+        exact += " " + json.dumps(body, sort_keys=True, default=str)
+    prefix = f"{op} {table}"
+    return f"{prefix}?{shape}" if shape else prefix, f"{prefix}?{exact}" if exact else prefix
+
+
+@contextmanager
+def query_span(table: str, op: str, builder):
+    """Span for one Supabase ``.execute()``; also feeds N+1 detection."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    shape, exact = _query_fingerprints(table, op, getattr(builder, "request", None))
+    trace.note_query(shape, exact)
+    with trace.span(f"supabase.{op} {table}", kind="db", query=shape) as s:
+        yield s
+
+
+@contextmanager
+def statement_span(table: str, op: str, statement: str, params=()):
+    """Span for one SQL statement on the direct Postgres backend.
+
+    The statement text (parameters stay out of it) is the query shape.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    shape = f"{op} {table} " + " ".join(statement.split())
+    trace.note_query(shape, shape + " " + json.dumps(params, default=str))
+    with trace.span(f"postgres.{op} {table}", kind="db", query=shape[:300]) as s:
+        yield s
+
+
+# ── Flask integration ───────────────────────────────────────────────
+def init_tracing(app) -> Tracer:
+    """Apply config and register hooks that trace every request."""
+    from flask import g, request
+
+    cfg = app.config
+    _tracer.configure(
+        enabled=cfg.get("TRACING_ENABLED", False),
+        sample_rate=cfg.get("TRACING_SAMPLE_RATE", 1.0),
+        slow_span_ms=cfg.get("TRACING_SLOW_SPAN_MS", 500),
+        n_plus_one_threshold=cfg.get("TRACING_N_PLUS_ONE_THRESHOLD", 3),
+        export_path=cfg.get("TRACING_EXPORT_PATH", ""),
+    )
+
+    @app.before_request
+    def _trace_start():
+        if not _tracer.enabled:
+            return
+        incoming = request.headers.get("X-Trace-Id", "")
+        trace_id = incoming if _TRACE_ID_RE.match(incoming) else None
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        g._trace_token = _tracer.start(f"{request.method} {rule}", trace_id)
+
+    @app.after_request
+    def _trace_header(response):
+        trace_id = current_trace_id()
+        if trace_id and g.get("_trace_token") is not None:
+            response.headers["X-Trace-Id"] = trace_id
+            g._trace_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _trace_finish(_exc):
+        token = g.pop("_trace_token", None)
+        if token is not None:
+            _tracer.finish(token, status=g.pop("_trace_status", 500))
+
+    return _tracer
@@ -0,0 +1,281 @@
+"""Key/value stores whose entries expire after a TTL.
+
+Two backends share one interface:
+
+  1. MemoryTTLStore — per-process dict with an expiry heap and a size cap
+  2. SqliteTTLStore — SQLite file in WAL mode, shared by every gunicorn
+                      worker on the same machine
+
+Values must be JSON-serialisable so both backends behave the same.
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class TTLStore(ABC):
+    """Interface for the TTL key/value backends."""
+
+    @abstractmethod
+    def get(self, key: str):
+        """Return the live value for *key*, or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float) -> None:
+        """Store *value* under *key* for *ttl* seconds."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop(self, key: str):
+        """Remove *key* and return its live value, or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, key: str, fn, ttl: float | None = None):
+        """Atomically replace the value of *key* with ``fn(current)``.
+
+        *current* is None when the key is missing or expired. If *fn*
+        returns None the key is deleted. *ttl* None keeps the existing
+        expiry (it is required when the key does not exist yet).
+        Returns the new value.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        raise NotImplementedError
+
+
+# ── In-memory backend ───────────────────────────────────────────────
+class MemoryTTLStore(TTLStore):
+    """Thread-safe per-process store bounded to *max_entries*.
+
+    Expired entries are dropped lazily on access and in bulk by
+    ``sweep()``, which runs whenever a write finds the store full. If the
+    store is still full after sweeping, the entry closest to expiry is
+    evicted.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._data: dict = {}  # key -> (expires_at, value)
+        self._heap: list = []  # (expires_at, key); may hold stale pairs
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if now >= item[0]:
+            del self._data[key]
+            return None
+        return item
+
+    def _put(self, key, value, expires_at) -> None:
+        if key not in self._data and len(self._data) >= self.max_entries:
+            self._sweep_locked(time.monotonic())
+            while len(self._data) >= self.max_entries and self._heap:
+                exp, victim = heapq.heappop(self._heap)
+                item = self._data.get(victim)
+                if item is not None and item[0] == exp:
+                    del self._data[victim]
+        self._data[key] = (expires_at, value)
+        heapq.heappush(self._heap, (expires_at, key))
+        if len(self._heap) > 2 * self.max_entries:
+            # Compact stale heap pairs left behind by overwrites
+            self._heap = [(exp, k) for k, (exp, _v) in self._data.items()]
+            heapq.heapify(self._heap)
+
+    def _sweep_locked(self, now) -> int:
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            exp, key = heapq.heappop(self._heap)
+            item = self._data.get(key)
+            if item is not None and item[0] == exp:
+                del self._data[key]
+                removed += 1
+        return removed
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key, time.monotonic())
+        return None if item is None else item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._put(key, value, time.monotonic() + ttl)
+
+    def pop(self, key):
+        with self._lock:
+            item = self._live(key, time.monotonic())
+            if item is None:
+                return None
+            del self._data[key]
+        return item[1]
+
+    def update(self, key, fn, ttl=None):
+        with self._lock:
+            now = time.monotonic()
+            item = self._live(key, now)
+            new_value = fn(None if item is None else item[1])
+            if new_value is None:
+                self._data.pop(key, None)
+                return None
+            if ttl is not None:
+                expires_at = now + ttl
+            elif item is not None:
+                expires_at = item[0]
+            else:
+                raise ValueError("ttl is required when creating a key")
+            self._put(key, new_value, expires_at)
+            return new_value
+
+    def sweep(self):
+        with self._lock:
+            return self._sweep_locked(time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# ── SQLite (multi-worker) backend ───────────────────────────────────
+class SqliteTTLStore(TTLStore):
+    """Store backed by a SQLite file in WAL mode.
+
+    Every worker process opens the same *path*, so a value written by one
+    worker is visible to all others. Each thread keeps its own
+    connection. Expired rows are purged every *sweep_interval* seconds,
+    and the oldest rows beyond *max_entries* are trimmed at the same time.
+    """
+
+    def __init__(self, path: str, table: str = "ttl_store",
+                 max_entries: int = 10_000, sweep_interval: float = 30.0):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_expires ON {table}(expires_at)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep()
+
+    def get(self, key):
+        now = time.time()
+        row = self._conn().execute(
+            f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        self._conn().execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), now + ttl),
+        )
+        self._maybe_sweep(now)
+
+    def pop(self, key):
+        now = time.time()
+        row = self._conn().execute(
+            f"DELETE FROM {self.table} WHERE key = ? RETURNING value, expires_at",
+            (key,),
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        return json.loads(row[0])
+
+    def update(self, key, fn, ttl=None):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            live = row is not None and row[1] > now
+            new_value = fn(json.loads(row[0]) if live else None)
+            if new_value is None:
+                if row is not None:
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            else:
+                if ttl is not None:
+                    expires_at = now + ttl
+                elif live:
+                    expires_at = row[1]
+                else:
+                    raise ValueError("ttl is required when creating a key")
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at)"
+                    " VALUES (?, ?, ?)",
+                    (key, json.dumps(new_value), expires_at),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._maybe_sweep(now)
+        return new_value
+
+    def sweep(self):
+        conn = self._conn()
+        removed = conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        # Enforce the size cap by dropping the entries closest to expiry
+        removed += conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f" SELECT key FROM {self.table} ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        return removed
+
+
+def default_store_path(name: str) -> str:
+    """Return a per-machine path for a shared store file, e.g. in /tmp."""
+    return os.path.join(tempfile.gettempdir(), f"smartserve-{name}.sqlite3")
+
+
+def create_ttl_store(backend: str, path: str | None = None, table: str = "ttl_store",
+                     max_entries: int = 10_000) -> TTLStore:
+    """Build a store for *backend* ("memory" or "sqlite")."""
+    backend = (backend or "memory").lower()
+    if backend == "memory":
+        return MemoryTTLStore(max_entries=max_entries)
+    if backend == "sqlite":
+        return SqliteTTLStore(path or default_store_path(table), table=table,
+                              max_entries=max_entries)
+    raise ValueError(f"Unknown TTL store backend: {backend!r}")
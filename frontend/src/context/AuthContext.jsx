@@ -60,6 +60,9 @@ export function AuthProvider({ children }) {
   }, []);
 
   const logout = useCallback(() => {
+    // Revoke the token server-side; logging out locally does not wait for it
+    const token = getToken();
+    if (token) authAPI.logout(token).catch(() => {});
     clearToken();
     setUser(null);
   }, []);
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 
 export function useFetch(apiFn, deps = []) {
   const [data, setData] = useState(null);
@@ -25,3 +25,56 @@ export function useFetch(apiFn, deps = []) {
 
   return { data, loading, error, refetch: execute };
 }
+
+// For cursor-paginated lists ({ data: [...], meta: { next_cursor } }).
+// fetchPage(cursor) loads one page — cursor is undefined for the first;
+// loadMore() appends the next page while hasMore is true.
+export function usePagedFetch(fetchPage, deps = []) {
+  const [items, setItems] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+  const generation = useRef(0); // pages from before a refetch are dropped
+
+  const load = useCallback(fetchPage, deps);
+
+  const refetch = useCallback(async () => {
+    const current = ++generation.current;
+    try {
+      setLoading(true);
+      setError(null);
+      const res = await load(undefined);
+      if (current !== generation.current) return;
+      setItems(Array.isArray(res.data?.data) ? res.data.data : []);
+      setCursor(res.data?.meta?.next_cursor ?? null);
+    } catch (err) {
+      if (current === generation.current) setError(err.response?.data?.message || err.message);
+    } finally {
+      if (current === generation.current) setLoading(false);
+    }
+  }, [load]);
+
+  const loadMore = useCallback(async () => {
+    if (!cursor || loadingMore) return;
+    const current = generation.current;
+    try {
+      setLoadingMore(true);
+      setError(null);
+      const res = await load(cursor);
+      if (current !== generation.current) return;
+      setItems((prev) => [...prev, ...(Array.isArray(res.data?.data) ? res.data.data : [])]);
+      setCursor(res.data?.meta?.next_cursor ?? null);
+    } catch (err) {
+      if (current === generation.current) setError(err.response?.data?.message || err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [load, cursor, loadingMore]);
+
+  useEffect(() => {
+    refetch();
+  }, [refetch]);
+
+  return { items, loading, loadingMore, error, hasMore: Boolean(cursor), loadMore, refetch };
+}
@@ -4,12 +4,17 @@ import { orderAPI, foodAPI } from '../services/api';
 import { useFetch } from '../hooks/useFetch';
 import './AdminDashboard.css';
 
+const STATS_DAYS = 30;
+
 export default function AdminDashboard() {
   const { data: foodData, loading: foodLoading } = useFetch(() => foodAPI.getAll(), []);
-  const { data: orderData, loading: orderLoading } = useFetch(() => orderAPI.getAdminOrders(), []);
+  const { data: statsData, loading: statsLoading } = useFetch(() => orderAPI.getStats({ days: STATS_DAYS, top: 5 }), []);
+  const { data: orderData, loading: orderLoading } = useFetch(() => orderAPI.getAdminOrders({ limit: 5 }), []);
 
   const foods = Array.isArray(foodData) ? foodData : [];
   const orders = Array.isArray(orderData) ? orderData : [];
+  const statusCounts = statsData?.status_counts || {};
+  const topFoods = statsData?.top_foods || [];
 
   const stats = [
     {
@@ -20,26 +25,26 @@ export default function AdminDashboard() {
     },
     {
       icon: HiOutlineClipboardList,
-      label: 'Total Orders',
-      value: orders.length,
+      label: `Orders (${STATS_DAYS} days)`,
+      value: statsData?.order_count ?? 0,
       color: '#e8652e',
     },
     {
       icon: HiOutlineClock,
       label: 'Pending',
-      value: orders.filter((o) => o.status === 'pending' || o.status === 'preparing').length,
+      value: (statusCounts.pending || 0) + (statusCounts.preparing || 0),
       color: '#f39c12',
     },
     {
       icon: HiOutlineTrendingUp,
-      label: 'Revenue',
-      value: `₹${orders.reduce((sum, o) => sum + (Number(o.total_price) || 0), 0).toFixed(0)}`,
+      label: `Revenue (${STATS_DAYS} days) · avg ₹${Number(statsData?.average_order_value || 0).toFixed(0)}`,
+      value: `₹${Number(statsData?.revenue || 0).toFixed(0)}`,
       color: '#2ecc71',
     },
   ];
 
   const recentOrders = orders.slice(0, 5);
-  const loading = foodLoading || orderLoading;
+  const loading = foodLoading || statsLoading || orderLoading;
 
   return (
     <div className="admin-dashboard">
@@ -71,6 +76,36 @@ export default function AdminDashboard() {
         ))}
       </div>
 
+      {/* Best Sellers */}
+      <motion.div
+        className="admin-recent"
+        initial={{ opacity: 0, y: 20 }}
+        animate={{ opacity: 1, y: 0 }}
+        transition={{ delay: 0.25, duration: 0.4 }}
+      >
+        <h3>Best Sellers ({STATS_DAYS} days)</h3>
+        {loading ? (
+          <div style={{ display: 'flex', flexDirection: 'column', gap: '0.5rem' }}>
+            {Array.from({ length: 3 }).map((_, i) => (
+              <div key={i} className="skeleton" style={{ height: 50, borderRadius: 10 }} />
+            ))}
+          </div>
+        ) : topFoods.length === 0 ? (
+          <p className="admin-recent__empty">No sales yet</p>
+        ) : (
+          <div className="admin-recent__list">
+            {topFoods.map((food, i) => (
+              <div key={food.food_id} className="admin-recent__row">
+                <span className="admin-recent__id">#{i + 1}</span>
+                <span className="admin-recent__items">{food.name}</span>
+                <span className="admin-recent__items">{food.quantity} sold</span>
+                <span className="admin-recent__total">₹{Number(food.revenue).toFixed(0)}</span>
+              </div>
+            ))}
+          </div>
+        )}
+      </motion.div>
+
       {/* Recent Orders */}
       <motion.div
         className="admin-recent"
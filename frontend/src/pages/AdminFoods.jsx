@@ -6,7 +6,8 @@ import { useFetch } from '../hooks/useFetch';
 import Toast from '../components/Toast';
 import './AdminFoods.css';
 
-const emptyForm = { name: '', price: '', category: '', image_url: '', is_available: true };
+// stock: '' = not tracked (always orderable while available)
+const emptyForm = { name: '', price: '', category: '', image_url: '', stock: '', is_available: true };
 
 export default function AdminFoods() {
   const { data, loading, refetch } = useFetch(() => foodAPI.getAll(true), []);
@@ -31,6 +32,7 @@ export default function AdminFoods() {
       price: food.price || '',
       category: food.category || '',
       image_url: food.image_url || '',
+      stock: food.stock ?? '',
       is_available: food.is_available !== false,
     });
     setShowModal(true);
@@ -43,8 +45,14 @@ export default function AdminFoods() {
       const payload = { ...form, price: Number(form.price) };
       // Convert empty image_url to null so backend validation doesn't reject ''
       if (!payload.image_url) payload.image_url = null;
+      payload.stock = payload.stock === '' ? null : Number(payload.stock);
       if (editId) {
-        await foodAPI.update(editId, payload);
+        // Stock is set through restock, atomically with orders taking it
+        const { stock, ...fields } = payload;
+        await foodAPI.update(editId, fields);
+        if (stock !== (foods.find((f) => f.id === editId)?.stock ?? null)) {
+          await foodAPI.restock(editId, { stock });
+        }
         setToast({ message: 'Food item updated!', type: 'success' });
       } else {
         await foodAPI.create(payload);
@@ -79,6 +87,20 @@ export default function AdminFoods() {
     }
   };
 
+  const handleRestock = async (food) => {
+    const input = prompt(`Portions of ${food.name} to add:`, '10');
+    const add = Number(input);
+    if (!input || !Number.isInteger(add) || add < 1) return;
+    try {
+      // Added server-side in one UPDATE, so orders placed meanwhile are not lost
+      await foodAPI.restock(food.id, { add });
+      setToast({ message: `${food.name} restocked`, type: 'success' });
+      refetch();
+    } catch (err) {
+      setToast({ message: err.response?.data?.message || 'Failed to restock', type: 'error' });
+    }
+  };
+
   return (
     <div className="admin-foods">
       <motion.div initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} transition={{ duration: 0.4 }}>
@@ -114,6 +136,7 @@ export default function AdminFoods() {
                   <th>Item</th>
                   <th>Category</th>
                   <th>Price</th>
+                  <th>Stock</th>
                   <th>Available</th>
                   <th>Actions</th>
                 </tr>
@@ -133,6 +156,18 @@ export default function AdminFoods() {
                     </td>
                     <td><span className="food-category-tag">{food.category || '—'}</span></td>
                     <td className="food-price">₹{food.price}</td>
+                    <td>
+                      {food.stock == null ? (
+                        <span className="food-stock food-stock--untracked">—</span>
+                      ) : (
+                        <div className="food-stock">
+                          <span className={food.stock === 0 ? 'food-stock--out' : ''}>{food.stock}</span>
+                          <button className="btn btn-ghost btn-sm" onClick={() => handleRestock(food)} title="Restock">
+                            <HiOutlinePlus />
+                          </button>
+                        </div>
+                      )}
+                    </td>
                     <td>
                       <button
                         className={`toggle-switch ${food.is_available !== false ? 'toggle-switch--on' : ''}`}
@@ -213,6 +248,17 @@ export default function AdminFoods() {
                     />
                   </div>
                 </div>
+                <div className="modal__field">
+                  <label>Stock (portions)</label>
+                  <input
+                    type="number"
+                    className="input-field"
+                    value={form.stock}
+                    onChange={(e) => setForm({ ...form, stock: e.target.value })}
+                    min="0"
+                    placeholder="Leave empty to not track stock"
+                  />
+                </div>
                 <div className="modal__field">
                   <label>Image URL</label>
                   <input
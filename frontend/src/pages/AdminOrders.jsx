@@ -1,8 +1,8 @@
 import { useState } from 'react';
 import { motion } from 'framer-motion';
 import { HiOutlineRefresh } from 'react-icons/hi';
-import { orderAPI } from '../services/api';
-import { useFetch } from '../hooks/useFetch';
+import { orderAPI, kitchenAPI } from '../services/api';
+import { useFetch, usePagedFetch } from '../hooks/useFetch';
 import Toast from '../components/Toast';
 import './AdminOrders.css';
 
@@ -36,10 +36,32 @@ const nextButtonLabel = {
 const statusFilterOptions = ['pending', 'preparing', 'ready', 'completed'];
 
 export default function AdminOrders() {
-  const { data, loading, refetch } = useFetch(() => orderAPI.getAdminOrders(), []);
-  const orders = Array.isArray(data) ? data : [];
   const [toast, setToast] = useState(null);
   const [filter, setFilter] = useState('all');
+  // Filtered server-side, so every page holds only orders in that status
+  const {
+    items: orders, loading, loadingMore, error, hasMore, loadMore, refetch: refetchOrders,
+  } = usePagedFetch(
+    (cursor) => orderAPI.getAdminOrders({ cursor, status: filter === 'all' ? undefined : filter }),
+    [filter],
+  );
+  const { data: queueData, refetch: refetchQueue } = useFetch(() => kitchenAPI.getQueue(), []);
+  const batches = queueData?.batches || [];
+
+  const refetch = () => {
+    refetchOrders();
+    refetchQueue();
+  };
+
+  const handleCompleteBatch = async (batch) => {
+    try {
+      const res = await kitchenAPI.completeBatch(batch);
+      setToast({ message: `${batch.name || 'Batch'} done — ${res.data?.message}`, type: 'success' });
+      refetch();
+    } catch (err) {
+      setToast({ message: err.response?.data?.message || 'Failed to complete batch', type: 'error' });
+    }
+  };
 
   const handleAdvanceStatus = async (id, currentStatus) => {
     const next = nextStatus[currentStatus];
@@ -53,8 +75,6 @@ export default function AdminOrders() {
     }
   };
 
-  const filtered = filter === 'all' ? orders : orders.filter((o) => o.status === filter);
-
   return (
     <div className="admin-orders">
       <motion.div initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} transition={{ duration: 0.4 }}>
@@ -68,6 +88,28 @@ export default function AdminOrders() {
           </button>
         </div>
 
+        {/* Prep queue — portions to cook across open orders, oldest first */}
+        {batches.length > 0 && (
+          <div className="admin-prep">
+            <h3>Prep Queue</h3>
+            <div className="admin-prep__list">
+              {batches.map((batch) => (
+                <div key={`${batch.food_id}-${batch.order_ids[0]}`} className="admin-prep__batch">
+                  <span className="admin-prep__qty">×{batch.quantity}</span>
+                  <span className="admin-prep__name">{batch.name || 'Unknown item'}</span>
+                  <span className="admin-prep__orders">{batch.order_ids.length} order(s)</span>
+                  <button
+                    className="btn btn-primary btn-sm admin-order-advance-btn"
+                    onClick={() => handleCompleteBatch(batch)}
+                  >
+                    ✅ Batch Done
+                  </button>
+                </div>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Filters */}
         <div className="admin-orders__filters">
           {['all', ...statusFilterOptions].map((s) => (
@@ -77,9 +119,9 @@ export default function AdminOrders() {
               onClick={() => setFilter(s)}
             >
               {s === 'all' ? 'All' : statusLabels[s]}
-              {s !== 'all' && (
+              {filter === s && !loading && (
                 <span className="filter-count">
-                  {orders.filter((o) => o.status === s).length}
+                  {orders.length}{hasMore ? '+' : ''}
                 </span>
               )}
             </button>
@@ -92,14 +134,14 @@ export default function AdminOrders() {
               <div key={i} className="skeleton" style={{ height: 80, borderRadius: 12 }} />
             ))}
           </div>
-        ) : filtered.length === 0 ? (
+        ) : orders.length === 0 ? (
           <div className="admin-orders__empty">
             <span>📋</span>
-            <p>No orders found</p>
+            <p>{error ? `Failed to load orders: ${error}` : 'No orders found'}</p>
           </div>
         ) : (
           <div className="admin-orders__list">
-            {filtered.map((order, i) => (
+            {orders.map((order, i) => (
               <motion.div
                 key={order.id}
                 className="admin-order-card"
@@ -159,6 +201,14 @@ export default function AdminOrders() {
                 </div>
               </motion.div>
             ))}
+            {hasMore && (
+              <div className="admin-orders__more">
+                {error && <p>Failed to load more orders: {error}</p>}
+                <button className="btn btn-secondary btn-sm" onClick={loadMore} disabled={loadingMore}>
+                  {loadingMore ? 'Loading…' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </motion.div>
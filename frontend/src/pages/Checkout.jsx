@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import { motion } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import { HiOutlineArrowRight, HiOutlineLocationMarker } from 'react-icons/hi';
@@ -13,6 +13,9 @@ export default function Checkout() {
   const [note, setNote] = useState('');
   const [loading, setLoading] = useState(false);
   const [toast, setToast] = useState(null);
+  // One Idempotency-Key per order: retrying the same cart after a timeout
+  // gets the first attempt's result instead of placing a second order
+  const attempt = useRef(null);
 
   const handleOrder = async () => {
     if (items.length === 0) return;
@@ -24,11 +27,18 @@ export default function Checkout() {
           quantity: i.quantity,
         })),
       };
-      await orderAPI.create(orderData);
+      const body = JSON.stringify(orderData);
+      if (attempt.current?.body !== body) {
+        attempt.current = { body, key: crypto.randomUUID() };
+      }
+      await orderAPI.create(orderData, attempt.current.key);
+      attempt.current = null;
       clearCart();
       setToast({ message: 'Order placed successfully!', type: 'success' });
       setTimeout(() => navigate('/orders'), 1500);
     } catch (err) {
+      // Keep the key only when no answer arrived (the order may have gone through)
+      if (err.response) attempt.current = null;
       setToast({ message: err.response?.data?.message || 'Failed to place order', type: 'error' });
     } finally {
       setLoading(false);
@@ -1,7 +1,7 @@
 import { motion } from 'framer-motion';
 import { HiOutlineRefresh, HiOutlineClock, HiOutlineCheck, HiOutlineTruck, HiOutlineX } from 'react-icons/hi';
 import { orderAPI } from '../services/api';
-import { useFetch } from '../hooks/useFetch';
+import { usePagedFetch } from '../hooks/useFetch';
 import './Orders.css';
 
 const statusConfig = {
@@ -12,8 +12,9 @@ const statusConfig = {
 };
 
 export default function Orders() {
-  const { data, loading, error, refetch } = useFetch(() => orderAPI.getUserOrders(), []);
-  const orders = Array.isArray(data) ? data : [];
+  const {
+    items: orders, loading, loadingMore, error, hasMore, loadMore, refetch,
+  } = usePagedFetch((cursor) => orderAPI.getUserOrders({ cursor }), []);
 
   return (
     <div className="orders-page">
@@ -39,7 +40,7 @@ export default function Orders() {
                 <div key={i} className="skeleton order-skeleton" style={{ height: 120 }} />
               ))}
             </div>
-          ) : error ? (
+          ) : error && orders.length === 0 ? (
             <div className="orders-empty">
               <p>Failed to load orders: {error}</p>
             </div>
@@ -112,6 +113,14 @@ export default function Orders() {
                   </motion.div>
                 );
               })}
+              {hasMore && (
+                <div className="orders-more">
+                  {error && <p>Failed to load more orders: {error}</p>}
+                  <button className="btn btn-secondary btn-sm" onClick={loadMore} disabled={loadingMore}>
+                    {loadingMore ? 'Loading…' : 'Load more'}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </motion.div>
@@ -50,6 +50,8 @@ export const authAPI = {
   login: (data) => api.post("/auth/login", data),
   adminLogin: (data) => api.post("/auth/admin-login", data),
   verifyOtp: (data) => api.post("/auth/verify-otp", data),
+  // Token passed explicitly: the caller clears the stored one right away
+  logout: (token) => api.post("/auth/logout", null, { headers: { Authorization: `Bearer ${token}` } }),
 };
 
 // ---- Foods ----
@@ -57,15 +59,29 @@ export const foodAPI = {
   getAll: (showAll = false) => api.get(`/foods${showAll ? '?all=true' : ''}`),
   create: (data) => api.post("/foods", data),
   update: (id, data) => api.put(`/foods/${id}`, data),
+  // { add } portions, or { stock } (null = untracked); applied atomically server-side
+  restock: (id, data) => api.post(`/foods/${id}/restock`, data),
   delete: (id) => api.delete(`/foods/${id}`),
 };
 
 // ---- Orders ----
 export const orderAPI = {
-  create: (data) => api.post("/orders", data),
-  getUserOrders: () => api.get("/orders/user"),
-  getAdminOrders: () => api.get("/orders/admin"),
+  // Pass the same idempotencyKey when retrying: the server replays the first result
+  create: (data, idempotencyKey) =>
+    api.post("/orders", data, idempotencyKey ? { headers: { "Idempotency-Key": idempotencyKey } } : undefined),
+  // Paginated: pass { limit, cursor } and read res.data.meta.next_cursor
+  getUserOrders: (params) => api.get("/orders/user", { params }),
+  getAdminOrders: (params) => api.get("/orders/admin", { params }),
+  // Aggregates computed server-side: { days } or { from, to } (YYYY-MM-DD), { top }
+  getStats: (params) => api.get("/orders/stats", { params }),
   updateStatus: (id, status) => api.patch(`/orders/${id}`, { status }),
 };
 
+export const kitchenAPI = {
+  // { totals: [{ food_id, name, pending, preparing, total }], batches: [{ food_id, name, quantity, order_ids }] }
+  getQueue: () => api.get("/kitchen/queue"),
+  completeBatch: (batch) =>
+    api.post("/kitchen/batches/complete", { food_id: batch.food_id, order_ids: batch.order_ids }),
+};
+
 export default api;